@@ -13,6 +13,18 @@ class Settings:
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./ai_dev_academy.db")
 
+    # SQLite connection profile (app/database.py): "performance" (WAL, synchronous=NORMAL,
+    # busy timeout, larger page cache, mmap, in-memory temp tables) or "default" (SQLite's own)
+    SQLITE_PROFILE: str = os.getenv("SQLITE_PROFILE", "performance")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE_KIB: int = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))
+    SQLITE_MMAP_SIZE_BYTES: int = int(os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+
+    # Connection pool per engine (file databases): kept open, extra under load, wait for a free one
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+
     # CORS
     ALLOWED_ORIGINS: str = os.getenv(
         "ALLOWED_ORIGINS",
@@ -21,6 +33,31 @@ class Settings:
 
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
+    # X-Admin-Token of admin endpoints (bulk player delete); empty disables them
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Bug Hunt games in flight (in-process store; file is optional, saved on shutdown)
+    BUG_HUNT_SESSION_TTL_SECONDS: int = int(os.getenv("BUG_HUNT_SESSION_TTL_SECONDS", "3600"))
+    BUG_HUNT_SESSION_FILE: str = os.getenv("BUG_HUNT_SESSION_FILE", "")
+
+    # bug_hunt_games compaction (background job, every INTERVAL seconds; 0 disables):
+    # never-submitted games are deleted after ABANDONED_HOURS, games older than
+    # RETENTION_DAYS are folded into per-template summaries, in batches of BATCH_SIZE
+    BUG_HUNT_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("BUG_HUNT_COMPACTION_INTERVAL_SECONDS", "3600"))
+    BUG_HUNT_ABANDONED_HOURS: int = int(os.getenv("BUG_HUNT_ABANDONED_HOURS", "24"))
+    BUG_HUNT_RETENTION_DAYS: int = int(os.getenv("BUG_HUNT_RETENTION_DAYS", "90"))
+    BUG_HUNT_COMPACTION_BATCH_SIZE: int = int(os.getenv("BUG_HUNT_COMPACTION_BATCH_SIZE", "500"))
+    BUG_HUNT_COMPACTION_MAX_BATCHES: int = int(os.getenv("BUG_HUNT_COMPACTION_MAX_BATCHES", "20"))
+
+    # Per-endpoint SQL statement budgets (app/query_budget.py): off, log or raise
+    QUERY_BUDGET_MODE: str = os.getenv("QUERY_BUDGET_MODE", "log")
+
+    # Rank lookups from in-memory order-statistic indexes (off: indexed SQL counts)
+    RANK_INDEX_ENABLED: bool = os.getenv("RANK_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Player event streams (Server-Sent Events): events buffered per connection, idle keep-alive interval
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+    EVENT_HEARTBEAT_SECONDS: float = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
 
     # API Metadata
     API_TITLE: str = os.getenv("API_TITLE", "AI Dev Academy API")
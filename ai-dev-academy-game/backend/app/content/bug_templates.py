@@ -1,8 +1,13 @@
 """Bug Hunt - Educational bug templates for the mini-game."""
 
+import random
+from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from typing import Any
 
+from app.schemas.minigame import BugResult
+
 
 class BugType(Enum):
     """Types of bugs in the game."""
@@ -300,25 +305,87 @@ async def get_user(user_id: int):
 ]
 
 
+# Template registry
+# Built once at import: templates by id, one tuple per difficulty for O(1)
+# random choice, and per-template answer keys with ready-made results.
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Precomputed grading data for one template."""
+    bug_lines: frozenset[int]
+    bug_results: tuple[tuple[int, BugResult, BugResult], ...]  # (line, result if found, result if missed)
+
+    def results_for(self, submitted_lines: set[int]) -> list[BugResult]:
+        """Per-bug results (template order) for a set of submitted lines."""
+        return [
+            found if line in submitted_lines else missed
+            for line, found, missed in self.bug_results
+        ]
+
+
+def _build_answer_key(template: BugTemplate) -> AnswerKey:
+    def result(bug: dict[str, Any], found: bool) -> BugResult:
+        return BugResult(
+            line=bug["line"],
+            found=found,
+            is_correct=True,
+            bug_type=bug["type"],
+            description=bug["description"]
+        )
+
+    return AnswerKey(
+        bug_lines=frozenset(bug["line"] for bug in template.bugs),
+        bug_results=tuple((bug["line"], result(bug, True), result(bug, False)) for bug in template.bugs)
+    )
+
+
+TEMPLATES_BY_ID: dict[str, BugTemplate] = {template.id: template for template in BUG_TEMPLATES}
+TEMPLATES_BY_DIFFICULTY: dict[str, tuple[BugTemplate, ...]] = {
+    difficulty: tuple(t for t in BUG_TEMPLATES if t.difficulty == difficulty)
+    for difficulty in dict.fromkeys(t.difficulty for t in BUG_TEMPLATES)
+}
+ANSWER_KEYS: dict[str, AnswerKey] = {template.id: _build_answer_key(template) for template in BUG_TEMPLATES}
+_ALL_TEMPLATES = tuple(BUG_TEMPLATES)
+
+
+@lru_cache(maxsize=1024)
+def false_positive_result(line: int) -> BugResult:
+    """Result for a submitted line that has no bug (shared, do not mutate)."""
+    return BugResult(
+        line=line,
+        found=True,
+        is_correct=False,
+        bug_type=None,
+        description="No bug on this line"
+    )
+
+
 def get_random_template(difficulty: str = None) -> BugTemplate:
     """Get a random bug template, optionally filtered by difficulty."""
-    import random
-
     if difficulty:
-        filtered = [t for t in BUG_TEMPLATES if t.difficulty == difficulty]
-        if not filtered:
+        templates = TEMPLATES_BY_DIFFICULTY.get(difficulty)
+        if not templates:
             raise ValueError(f"No templates found for difficulty: {difficulty}")
-        return random.choice(filtered)
+        return random.choice(templates)
 
-    return random.choice(BUG_TEMPLATES)
+    return random.choice(_ALL_TEMPLATES)
 
 
 def get_template_by_id(template_id: str) -> BugTemplate:
     """Get a specific bug template by ID."""
-    for template in BUG_TEMPLATES:
-        if template.id == template_id:
-            return template
-    raise ValueError(f"Template not found: {template_id}")
+    template = TEMPLATES_BY_ID.get(template_id)
+    if template is None:
+        raise ValueError(f"Template not found: {template_id}")
+    return template
+
+
+def get_answer_key(template_id: str) -> AnswerKey:
+    """Get the precomputed answer key of a template."""
+    answer_key = ANSWER_KEYS.get(template_id)
+    if answer_key is None:
+        raise ValueError(f"Template not found: {template_id}")
+    return answer_key
 
 
 def get_all_templates() -> list[BugTemplate]:
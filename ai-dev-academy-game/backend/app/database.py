@@ -1,37 +1,198 @@
 """Database configuration and session management."""
 
+from collections.abc import Callable
+
 from app.config import get_settings
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 settings = get_settings()
 
 # SQLite database URL from environment
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# Create engine
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync database URL into its async driver equivalent.
+
+    Example: sqlite:///./app.db -> sqlite+aiosqlite:///./app.db
+    """
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Async database URL (same database, async driver)
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+
+# SQLite connection profile
+# Pragmas are per connection (journal_mode is stored in the file), so they
+# are run on every new connection of the app's engines.
+
+def sqlite_pragmas(profile: str) -> dict[str, str | int]:
+    """The PRAGMAs for a SQLITE_PROFILE: "performance" or "default" (none: SQLite's own)."""
+    if profile == "default":
+        return {}
+    if profile != "performance":
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}' (expected 'performance' or 'default')")
+    return {
+        "auto_vacuum": "INCREMENTAL",  # As in init_db: new files only, and must precede the switch to WAL
+        "journal_mode": "WAL",  # Readers and the writer no longer block each other
+        "synchronous": "NORMAL",  # fsync at checkpoints: a power cut may lose recent commits, never corrupts
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,  # Wait for the write lock instead of "database is locked"
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KIB,  # Negative: KiB rather than pages
+        "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+        "temp_store": "MEMORY",  # Sorts and temp tables of large queries
+        "foreign_keys": "ON",  # Off by default in SQLite: enforces foreign keys and their ON DELETE CASCADE
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """Run `pragmas` on every new connection of `engine` (no-op for other databases)."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+    statements = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def pool_options(url: str) -> dict:
+    """Pool sizing for file databases (in-memory SQLite keeps SQLAlchemy's single-connection pool)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+SQLITE_PRAGMAS = sqlite_pragmas(settings.SQLITE_PROFILE)
+
+# Create engine (sync - used for table creation, seed data and background jobs)
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False},  # Needed for SQLite
+    **pool_options(SQLALCHEMY_DATABASE_URL)
 )
 
-# Session factory
+# Create async engine (used by all API routes)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+
+apply_sqlite_pragmas(engine, SQLITE_PRAGMAS)
+apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False  # Keep attributes loaded after commit (no implicit IO)
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for FastAPI routes to get DB session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency for FastAPI routes to get an async DB session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Commit hooks
+# In-process caches must only change once the data they mirror is durable,
+# so writers register callbacks that run after the session commits and are
+# dropped if it rolls back. Append-only rows can likewise be buffered and
+# written in one batch just before the commit.
+
+_ON_COMMIT_KEY = "on_commit_callbacks"
+_BUFFERS_KEY = "commit_buffers"
+
+
+def on_commit(db: Session | AsyncSession, callback: Callable[[], None]) -> None:
+    """Run `callback` after the session's current transaction commits."""
+    db.info.setdefault(_ON_COMMIT_KEY, []).append(callback)
+
+
+def commit_buffer(
+    db: Session | AsyncSession,
+    name: str,
+    write: Callable[[Session, list], None]
+) -> list:
+    """
+    Per-transaction list of pending rows, written just before commit.
+
+    Writers append rows to the returned list; right before the session
+    commits, `write(session, rows)` stores them with one batched statement
+    inside the same transaction. A rollback discards the buffer.
+    """
+    buffers = db.info.setdefault(_BUFFERS_KEY, {})
+    if name not in buffers:
+        buffers[name] = (write, [])
+    return buffers[name][1]
+
+
+@event.listens_for(Session, "before_commit")
+def _write_commit_buffers(session: Session) -> None:
+    for write, rows in session.info.pop(_BUFFERS_KEY, {}).values():
+        if rows:
+            write(session, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_ON_COMMIT_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit_callbacks(session: Session) -> None:
+    session.info.pop(_BUFFERS_KEY, None)
+    session.info.pop(_ON_COMMIT_KEY, None)
+
+
+# SQL functions
+# Small deterministic Python functions registered on every SQLite connection,
+# so formulas like the level curve can run inside a single UPDATE statement.
+
+_SQL_FUNCTIONS: dict[str, tuple[int, Callable]] = {}
+
+
+def sql_function(name: str, num_args: int):
+    """Decorator: expose a Python function to SQL as `name(...)` on every connection."""
+    def register(fn: Callable) -> Callable:
+        _SQL_FUNCTIONS[name] = (num_args, fn)
+        return fn
+    return register
+
+
+@event.listens_for(Engine, "connect")
+def _register_sql_functions(dbapi_connection, connection_record) -> None:
+    if not hasattr(dbapi_connection, "create_function"):
+        return  # Not SQLite
+    for name, (num_args, fn) in _SQL_FUNCTIONS.items():
+        dbapi_connection.create_function(name, num_args, fn, deterministic=True)
 
 
 def init_db():
-    """Initialize database (create tables)."""
+    """Initialize database (create tables, plus indexes added to existing tables)."""
+    if engine.dialect.name == "sqlite":
+        # Only takes effect on a new database file: lets compaction hand free pages back
+        with engine.begin() as connection:
+            connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
     Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
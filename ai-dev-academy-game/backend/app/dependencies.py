@@ -0,0 +1,46 @@
+"""Shared route dependencies - The current player, loaded once per request; admin access."""
+
+import secrets
+from typing import Annotated
+
+from app.config import get_settings
+from app.database import get_db
+from app.models.player import Player
+from app.services import player_service
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def require_player(db: AsyncSession, player_id: int, with_stats: bool = False) -> Player:
+    """Load a player through the request's cache (player_service), or raise 404."""
+    player = await player_service.get_player(db, player_id, with_stats)
+    if player is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Player with ID {player_id} not found"
+        )
+    return player
+
+
+async def get_current_player(player_id: int, db: AsyncSession = Depends(get_db)) -> Player:
+    """The player addressed by the `{player_id}` path parameter."""
+    return await require_player(db, player_id)
+
+
+async def get_current_player_with_stats(player_id: int, db: AsyncSession = Depends(get_db)) -> Player:
+    """The `{player_id}` player with `stats` loaded by the same query."""
+    return await require_player(db, player_id, with_stats=True)
+
+
+# Route parameters: `player: CurrentPlayer` replaces the select-then-404 preamble.
+# The route's own `db` is the same session (FastAPI caches get_db per request),
+# so services reusing player_service find the player without another query.
+CurrentPlayer = Annotated[Player, Depends(get_current_player)]
+CurrentPlayerWithStats = Annotated[Player, Depends(get_current_player_with_stats)]
+
+
+async def require_admin(x_admin_token: str = Header(default="")) -> None:
+    """Admin endpoints: the X-Admin-Token header must match ADMIN_TOKEN (unset: disabled)."""
+    token = get_settings().ADMIN_TOKEN
+    if not token or not secrets.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
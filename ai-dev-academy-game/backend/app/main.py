@@ -1,10 +1,15 @@
 """FastAPI main application for AI Dev Academy game."""
 
+import asyncio
+
 from app.config import get_settings
 from app.database import init_db
-from app.routes import achievements, minigames, player, progress
+from app.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render
+from app.responses import FastJSONResponse
+from app.routes import achievements, events, minigames, player, progress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 # Load settings
 settings = get_settings()
@@ -13,7 +18,8 @@ settings = get_settings()
 app = FastAPI(
     title=settings.API_TITLE,
     description="Backend API for AI Dev Academy gamified learning platform",
-    version=settings.API_VERSION
+    version=settings.API_VERSION,
+    default_response_class=FastJSONResponse  # orjson rendering
 )
 
 # Configure CORS - supports both development and production
@@ -25,6 +31,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (added last, so it wraps everything else)
+app.add_middleware(MetricsMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -40,6 +49,38 @@ async def startup_event():
     seed_default_player()
     print("Seed data check complete!")
 
+    # Backfill materialized leaderboards and streaks for databases that predate them
+    from app.database import SessionLocal
+    from app.services import leaderboard_service, streak_service
+    with SessionLocal() as db:
+        leaderboard_service.rebuild_if_empty(db)
+        leaderboard_service.prune_daily_buckets(db)
+        streak_service.rebuild_if_empty(db)
+
+    # Keep bug_hunt_games small: retention, archiving and incremental vacuum in the background
+    if settings.BUG_HUNT_COMPACTION_INTERVAL_SECONDS > 0:
+        from app.services import compaction_service
+        app.state.compaction_task = asyncio.create_task(
+            compaction_service.run_periodically(SessionLocal, settings.BUG_HUNT_COMPACTION_INTERVAL_SECONDS)
+        )
+
+    # Restore Bug Hunt games in flight (only when a session file is configured)
+    if settings.BUG_HUNT_SESSION_FILE:
+        from app.services import game_session_service
+        game_session_service.load(settings.BUG_HUNT_SESSION_FILE)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background compaction and save Bug Hunt games in flight so a restart does not drop them."""
+    compaction_task = getattr(app.state, "compaction_task", None)
+    if compaction_task is not None:
+        compaction_task.cancel()
+
+    if settings.BUG_HUNT_SESSION_FILE:
+        from app.services import game_session_service
+        game_session_service.save(settings.BUG_HUNT_SESSION_FILE)
+
 
 @app.get("/")
 async def root():
@@ -57,11 +98,18 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request and SQL metrics in Prometheus text format."""
+    return PlainTextResponse(render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # Include routers
 app.include_router(minigames.router, prefix="/api/minigames", tags=["minigames"])
 app.include_router(player.router, prefix="/api/player", tags=["player"])
 app.include_router(progress.router, prefix="/api/progress", tags=["progress"])
 app.include_router(achievements.router, prefix="/api/achievements", tags=["achievements"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
 
 if __name__ == "__main__":
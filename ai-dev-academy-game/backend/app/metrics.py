@@ -0,0 +1,239 @@
+"""Request metrics - ASGI middleware, SQL query accounting and Prometheus text export."""
+
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from app.database import async_engine, engine
+from sqlalchemy import event
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+# Metric types
+# Just enough of the Prometheus data model for this app: label values are
+# a tuple matching `labels`, and everything lives in process memory.
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, label_values: tuple = (), amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+
+class Gauge(Counter):
+    """Value that goes up and down per label set."""
+
+    kind = "gauge"
+
+    def dec(self, label_values: tuple = (), amount: float = 1) -> None:
+        self.inc(label_values, -amount)
+
+
+class Histogram:
+    """Cumulative bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values: dict[tuple, list] = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, label_values: tuple, value: float) -> None:
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self):
+        for label_values, (counts, total, count) in self.values.items():
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ("method",)
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+QUERIES = Counter(
+    "db_queries_total", "SQL statements executed while serving a route", ("method", "route")
+)
+QUERY_SECONDS = Counter(
+    "db_query_duration_seconds_total", "Time spent in SQL statements while serving a route", ("method", "route")
+)
+EVENT_SUBSCRIBERS = Gauge(
+    "event_stream_subscribers", "Open player event streams (Server-Sent Events)"
+)
+EVENTS_DROPPED = Counter(
+    "event_stream_dropped_total", "Event streams dropped because the client fell behind"
+)
+
+METRICS = (
+    REQUESTS, REQUEST_LATENCY, IN_PROGRESS, REQUEST_QUERIES, QUERIES, QUERY_SECONDS,
+    EVENT_SUBSCRIBERS, EVENTS_DROPPED,
+)
+
+
+def reset() -> None:
+    """Clear every metric."""
+    for metric in METRICS:
+        metric.values.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# SQL query accounting
+# The middleware puts a QueryStats in a context variable for the request;
+# engine events add every statement executed in that context to it.
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed while serving one request."""
+    count: int = 0
+    seconds: float = 0.0
+
+
+_request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    """Query stats of the request being served (None outside a request)."""
+    return _request_queries.get()
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed inside the block (still added to the request's totals)."""
+    outer = _request_queries.get()
+    stats = QueryStats()
+    token = _request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_queries.reset(token)
+        if outer is not None:
+            outer.count += stats.count
+            outer.seconds += stats.seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, not the pooled connection, so a
+    # statement that raises (no after event) leaves nothing behind
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._metrics_started
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def instrument_engine(target) -> None:
+    """Count statements executed on a (sync) engine. Safe to call more than once."""
+    if event.contains(target, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status codes, in-flight
+    requests and SQL statements per route.
+
+    Routes are labelled by their path template ("/api/player/{player_id}"),
+    unmatched paths as "unmatched", so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500  # Unless the app sends a response start
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = _request_queries.set(stats)
+        IN_PROGRESS.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_PROGRESS.dec((method,))
+            _request_queries.reset(token)
+
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.inc((method, route, str(status_code)))
+            REQUEST_LATENCY.observe((method, route), elapsed)
+            REQUEST_QUERIES.observe((method, route), stats.count)
+            QUERIES.inc((method, route), stats.count)
+            QUERY_SECONDS.inc((method, route), stats.seconds)
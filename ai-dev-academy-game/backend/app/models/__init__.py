@@ -1,15 +1,32 @@
 """Models package - SQLAlchemy models for the game."""
 
 from app.models.achievement import Achievement, PlayerStats, UnlockedTool
-from app.models.minigame import BugHuntGame
+from app.models.client_event import ClientEvent
+from app.models.minigame import (
+    BugHuntDailyBest,
+    BugHuntGame,
+    BugHuntGameSummary,
+    BugHuntLeaderboard,
+    PlayerBugHuntRollup,
+)
 from app.models.player import Player
-from app.models.progress import Progress
+from app.models.progress import PlayerProgressState, Progress
+from app.models.streak import PlayerStreak
+from app.models.xp_ledger import XPLedgerEntry
 
 __all__ = [
     "Player",
     "Progress",
+    "PlayerProgressState",
     "Achievement",
     "PlayerStats",
     "UnlockedTool",
-    "BugHuntGame"
+    "BugHuntGame",
+    "BugHuntLeaderboard",
+    "BugHuntDailyBest",
+    "BugHuntGameSummary",
+    "PlayerBugHuntRollup",
+    "PlayerStreak",
+    "XPLedgerEntry",
+    "ClientEvent"
 ]
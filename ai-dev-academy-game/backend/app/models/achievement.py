@@ -12,7 +12,7 @@ class Achievement(Base):
     __tablename__ = "achievements"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     achievement_id = Column(String, nullable=False)  # 'first_class', 'bug_hunter', etc.
     unlocked_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -34,7 +34,7 @@ class PlayerStats(Base):
     __tablename__ = "player_stats"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, unique=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, unique=True)
     classes_completed = Column(Integer, default=0)
     exercises_completed = Column(Integer, default=0)
     bug_hunt_wins = Column(Integer, default=0)
@@ -56,7 +56,7 @@ class UnlockedTool(Base):
     __tablename__ = "unlocked_tools"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     tool_key = Column(String, nullable=False)  # 'claude_code', 'cursor', 'test_strategist'
     unlocked_at = Column(DateTime(timezone=True), server_default=func.now())
 
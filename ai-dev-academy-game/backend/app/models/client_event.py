@@ -0,0 +1,31 @@
+"""Client event model - idempotency keys of applied offline-sync events."""
+
+from app.database import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+
+class ClientEvent(Base):
+    """
+    Client events table - one row per event applied by POST /api/events/batch.
+
+    The unique key is claimed before an event is applied (see
+    sync_service.apply_batch), so a batch resent after a lost response
+    applies nothing twice.
+    """
+
+    __tablename__ = "client_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String, nullable=False)  # Chosen by the client, unique per player
+    event_type = Column(String, nullable=False)  # progress, exercise, bug_hunt
+    client_timestamp = Column(DateTime(timezone=True), nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('player_id', 'idempotency_key', name='_player_event_key_uc'),
+    )
+
+    def __repr__(self):
+        return f"<ClientEvent(player_id={self.player_id}, key='{self.idempotency_key}', type='{self.event_type}')>"
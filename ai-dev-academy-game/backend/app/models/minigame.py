@@ -1,8 +1,18 @@
 """Minigame models - tracks minigame sessions and scores."""
 
 from app.database import Base
-from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 
 
@@ -12,7 +22,7 @@ class BugHuntGame(Base):
     __tablename__ = "bug_hunt_games"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     template_id = Column(String, nullable=False)  # e.g., "bug_001"
     difficulty = Column(String, nullable=False)  # "easy", "medium", "hard"
 
@@ -33,7 +43,7 @@ class BugHuntGame(Base):
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    player = relationship("Player", backref="bug_hunt_games")
+    player = relationship("Player", backref=backref("bug_hunt_games", passive_deletes=True))
 
     def __repr__(self):
         return f"<BugHuntGame(id={self.id}, player_id={self.player_id}, score={self.score})>"
@@ -52,3 +62,136 @@ class BugHuntGame(Base):
             self.bugs_found == self.bugs_total and
             (not self.false_positives or len(self.false_positives) == 0)
         )
+
+
+class BugHuntLeaderboard(Base):
+    """
+    Bug Hunt leaderboard - best game per player, per board.
+
+    Boards are "all" (global) plus one per difficulty. Maintained by
+    submit_bug_hunt, so reads never touch bug_hunt_games.
+    """
+
+    __tablename__ = "bug_hunt_leaderboard"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    board = Column(String, nullable=False)  # "all", "easy", "medium", "hard"
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    game_id = Column(Integer, ForeignKey("bug_hunt_games.id"), nullable=True)
+
+    # Snapshot of the best game
+    score = Column(Integer, nullable=False)
+    bugs_found = Column(Integer, nullable=False)
+    bugs_total = Column(Integer, nullable=False)
+    time_seconds = Column(Float, nullable=False)
+    difficulty = Column(String, nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=False)
+
+    # One row per player per board, ranked reads walk the (board, score) index
+    __table_args__ = (
+        UniqueConstraint('board', 'player_id', name='_board_player_uc'),
+        Index('ix_bug_hunt_leaderboard_board_score', 'board', score.desc(), 'completed_at'),
+    )
+
+    def __repr__(self):
+        return f"<BugHuntLeaderboard(board='{self.board}', player_id={self.player_id}, score={self.score})>"
+
+
+class BugHuntDailyBest(Base):
+    """
+    Bug Hunt daily buckets - best game per player, per board, per UTC day.
+
+    Rolling leaderboards (day, week, month) merge the buckets in their
+    window instead of filtering bug_hunt_games by date.
+    """
+
+    __tablename__ = "bug_hunt_daily_best"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    day = Column(Integer, nullable=False)  # UTC date.toordinal() of completed_at
+    board = Column(String, nullable=False)  # Same boards as BugHuntLeaderboard
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    game_id = Column(Integer, ForeignKey("bug_hunt_games.id"), nullable=True)
+
+    # Snapshot of the day's best game
+    score = Column(Integer, nullable=False)
+    bugs_found = Column(Integer, nullable=False)
+    bugs_total = Column(Integer, nullable=False)
+    time_seconds = Column(Float, nullable=False)
+    difficulty = Column(String, nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Window reads walk one board's recent days
+    __table_args__ = (
+        UniqueConstraint('board', 'day', 'player_id', name='_board_day_player_uc'),
+        Index('ix_bug_hunt_daily_best_player', 'player_id'),
+    )
+
+    def __repr__(self):
+        return f"<BugHuntDailyBest(board='{self.board}', day={self.day}, player_id={self.player_id}, score={self.score})>"
+
+
+class PlayerBugHuntRollup(Base):
+    """
+    Per-player Bug Hunt totals - updated incrementally on every submit.
+
+    Lets the stats endpoint answer with a single-row read instead of
+    aggregating the player's whole game history.
+    """
+
+    __tablename__ = "player_bug_hunt_rollup"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    games_played = Column(Integer, nullable=False, default=0)
+    total_bugs_found = Column(Integer, nullable=False, default=0)
+    perfect_games = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    total_score = Column(Integer, nullable=False, default=0)
+    total_accuracy = Column(Float, nullable=False, default=0.0)  # Sum of per-game accuracy (%)
+    total_xp_earned = Column(Integer, nullable=False, default=0)
+
+    # Games played per difficulty (favorite difficulty = most played)
+    easy_games = Column(Integer, nullable=False, default=0)
+    medium_games = Column(Integer, nullable=False, default=0)
+    hard_games = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlayerBugHuntRollup(player_id={self.player_id}, games={self.games_played}, best={self.best_score})>"
+
+
+class BugHuntGameSummary(Base):
+    """
+    Archived Bug Hunt games - totals per player, per template.
+
+    Games older than the retention age are folded in here by the
+    compaction job and their bug_hunt_games rows deleted, so history
+    stays countable without keeping every game's JSON forever.
+    """
+
+    __tablename__ = "bug_hunt_game_summaries"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    template_id = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+
+    games_played = Column(Integer, nullable=False, default=0)
+    total_bugs_found = Column(Integer, nullable=False, default=0)
+    perfect_games = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    total_score = Column(Integer, nullable=False, default=0)
+    total_accuracy = Column(Float, nullable=False, default=0.0)  # Sum of per-game accuracy (%)
+    total_time_seconds = Column(Float, nullable=False, default=0.0)
+    total_xp_earned = Column(Integer, nullable=False, default=0)
+
+    first_completed_at = Column(DateTime(timezone=True), nullable=False)
+    last_completed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('player_id', 'template_id', name='_summary_player_template_uc'),
+    )
+
+    def __repr__(self):
+        return f"<BugHuntGameSummary(player_id={self.player_id}, template_id='{self.template_id}', games={self.games_played})>"
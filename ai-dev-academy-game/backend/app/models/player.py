@@ -1,7 +1,7 @@
 """Player model - represents a game player."""
 
 from app.database import Base
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -19,11 +19,24 @@ class Player(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    # Relationships
-    progress = relationship("Progress", back_populates="player", cascade="all, delete-orphan")
-    achievements = relationship("Achievement", back_populates="player", cascade="all, delete-orphan")
-    stats = relationship("PlayerStats", back_populates="player", uselist=False, cascade="all, delete-orphan")
-    unlocked_tools = relationship("UnlockedTool", back_populates="player", cascade="all, delete-orphan")
+    # Relationships (passive_deletes: ON DELETE CASCADE removes the rows, the ORM does not load them first)
+    progress = relationship(
+        "Progress", back_populates="player", cascade="all, delete-orphan", passive_deletes=True
+    )
+    achievements = relationship(
+        "Achievement", back_populates="player", cascade="all, delete-orphan", passive_deletes=True
+    )
+    stats = relationship(
+        "PlayerStats", back_populates="player", uselist=False, cascade="all, delete-orphan", passive_deletes=True
+    )
+    unlocked_tools = relationship(
+        "UnlockedTool", back_populates="player", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    # Rank lookups count players above a given XP
+    __table_args__ = (
+        Index('ix_players_xp', 'xp'),
+    )
 
     def __repr__(self):
         return f"<Player(id={self.id}, username='{self.username}', level={self.level}, xp={self.xp})>"
@@ -1,7 +1,7 @@
 """Progress model - tracks player progress through modules and classes."""
 
 from app.database import Base
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, LargeBinary, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 
@@ -11,7 +11,7 @@ class Progress(Base):
     __tablename__ = "progress"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
     module_number = Column(Integer, nullable=False)
     class_number = Column(Integer, nullable=False)
     status = Column(String, default="locked")  # locked, unlocked, in_progress, completed
@@ -30,3 +30,31 @@ class Progress(Base):
 
     def __repr__(self):
         return f"<Progress(player_id={self.player_id}, module={self.module_number}, class={self.class_number}, status='{self.status}')>"
+
+
+class PlayerProgressState(Base):
+    """
+    Per-player progress state - one row mirroring all of a player's Progress rows.
+
+    Classes are addressed by their content_service class id: bit `id` of a
+    mask, slot `id` of a packed array. Kept in sync on every progress write,
+    so full and module progress are served from this single row.
+    """
+
+    __tablename__ = "player_progress_state"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, unique=True)
+    layout = Column(String, nullable=False)  # content_service.CURRICULUM_LAYOUT the row was built for
+
+    # Status bitmaps (no bit set = locked)
+    unlocked_mask = Column(BigInteger, nullable=False, default=0)
+    in_progress_mask = Column(BigInteger, nullable=False, default=0)
+    completed_mask = Column(BigInteger, nullable=False, default=0)
+
+    # Packed per-class arrays (see progress_state_service)
+    exercises = Column(LargeBinary, nullable=False)  # uint32 exercises completed
+    completed_at = Column(LargeBinary, nullable=False)  # int64 microseconds since epoch (UTC), 0 = never
+
+    def __repr__(self):
+        return f"<PlayerProgressState(player_id={self.player_id}, completed_mask={self.completed_mask:#x})>"
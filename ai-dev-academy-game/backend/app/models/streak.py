@@ -0,0 +1,26 @@
+"""Streak model - daily activity streak per player."""
+
+from app.database import Base
+from sqlalchemy import Column, ForeignKey, Integer, String
+
+
+class PlayerStreak(Base):
+    """
+    Player streak table - O(1) streak state, updated on every activity.
+
+    Days are calendar days in the player's timezone, stored as
+    `date.toordinal()` so consecutive days differ by exactly 1
+    (see streak_service).
+    """
+
+    __tablename__ = "player_streaks"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False, unique=True)
+    timezone = Column(String, nullable=False, default="UTC")  # IANA name, e.g. "Europe/Madrid"
+    last_activity_day = Column(Integer, nullable=True)  # None = no activity yet
+    current_streak = Column(Integer, nullable=False, default=0)  # Run ending on last_activity_day
+    longest_streak = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlayerStreak(player_id={self.player_id}, current={self.current_streak}, longest={self.longest_streak})>"
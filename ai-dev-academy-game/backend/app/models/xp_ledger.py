@@ -0,0 +1,32 @@
+"""XP ledger model - append-only history of XP awards."""
+
+from app.database import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+
+
+class XPLedgerEntry(Base):
+    """
+    XP ledger table - one row per XP award, never updated.
+
+    Rows are buffered during a transaction and inserted in one batch
+    right before it commits (see xp_service.award_xp).
+    """
+
+    __tablename__ = "xp_ledger"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Integer, nullable=False)  # Requested XP (negative for penalties)
+    balance_after = Column(Integer, nullable=False)  # Player XP right after this award
+    level_after = Column(Integer, nullable=False)
+    reason = Column(String, default="")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Player history, newest first
+    __table_args__ = (
+        Index('ix_xp_ledger_player_id', 'player_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<XPLedgerEntry(player_id={self.player_id}, amount={self.amount}, balance_after={self.balance_after})>"
@@ -0,0 +1,55 @@
+"""Query budgets - Cap the SQL statements an endpoint may issue per request."""
+
+import functools
+import logging
+
+from app.config import get_settings
+from app.metrics import count_queries, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """An endpoint issued more SQL statements than its budget allows."""
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the most SQL statements an endpoint may issue per request.
+
+    Apply below the route decorator:
+
+        @router.get("/{player_id}")
+        @query_budget(2)
+        async def get_player(...): ...
+
+    Statements are counted by the engine events in app.metrics. What happens
+    when the budget is exceeded depends on QUERY_BUDGET_MODE: "log" (default)
+    logs a warning, "raise" raises QueryBudgetExceeded (the test suite runs
+    this way, so an N+1 regression fails the tests), "off" skips the check.
+    Requests that end in an exception (404s and the like) are not checked.
+    Statements the request issued before the endpoint ran (dependencies
+    such as CurrentPlayer) count toward the budget too.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request_stats = current_query_stats()
+            spent = request_stats.count if request_stats is not None else 0
+            with count_queries() as stats:
+                result = await endpoint(*args, **kwargs)
+
+            used = spent + stats.count
+            if used > max_queries:
+                mode = get_settings().QUERY_BUDGET_MODE
+                message = f"{endpoint.__qualname__} issued {used} SQL statements (budget {max_queries})"
+                if mode == "raise":
+                    raise QueryBudgetExceeded(message)
+                if mode == "log":
+                    logger.warning(message)
+            return result
+
+        wrapper.max_queries = max_queries
+        return wrapper
+
+    return decorator
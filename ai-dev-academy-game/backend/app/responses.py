@@ -0,0 +1,61 @@
+"""Fast JSON responses - orjson rendering and a trusted path for data built from our own rows."""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional: without it responses are rendered with the stdlib json module
+    orjson = None
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize `content` to compact UTF-8 JSON.
+
+    Pydantic models are dumped by their own (Rust) serializer, so output
+    matches FastAPI's encoding; plain data goes through orjson when it is
+    installed.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: renders with orjson (stdlib json fallback)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(content: Any, status_code: int = 200, headers: dict[str, str] | None = None) -> Response:
+    """
+    Serialize content as is, skipping FastAPI's response_model round trip.
+
+    FastAPI dumps a returned model to a dict, validates that dict against
+    response_model again and encodes the result. For responses assembled
+    from our own rows and definitions that work is redundant: the route
+    keeps `response_model` for the OpenAPI schema, builds plain dicts with
+    the schema's fields in order, and returns this response instead.
+    (Plain dicts, not `model_construct`: on Pydantic 2 constructing
+    without validation is several times slower than plain dicts, see
+    benchmarks/bench_serialization.py.)
+    """
+    return Response(content=dumps(content), status_code=status_code, media_type="application/json", headers=headers)
@@ -2,8 +2,10 @@
 
 
 from app.database import get_db
+from app.dependencies import CurrentPlayer, require_player
 from app.models.achievement import Achievement
-from app.models.player import Player
+from app.query_budget import query_budget
+from app.responses import trusted_response
 from app.schemas.achievement import (
     AchievementWithDetails,
     AvailableAchievementsResponse,
@@ -12,83 +14,75 @@ from app.schemas.achievement import (
     PlayerAchievementsResponse,
     UnlockAchievementRequest,
 )
-from app.services import achievement_service, xp_service
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from app.services import achievement_service, catalog_service, response_cache_service
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
 
 @router.get("/", response_model=AvailableAchievementsResponse)
-async def get_all_achievements():
+async def get_all_achievements(request: Request):
     """
     Get all available achievements in the game.
 
     Returns all achievement definitions with their requirements,
-    icons, rarity, and XP rewards.
+    icons, rarity, and XP rewards (prebuilt at startup).
     """
-    definitions = achievement_service.get_all_achievement_definitions()
-
-    return AvailableAchievementsResponse(
-        total_achievements=len(definitions),
-        achievements=definitions
-    )
+    return catalog_service.serve(request, catalog_service.ACHIEVEMENTS)
 
 
 @router.get("/player/{player_id}", response_model=PlayerAchievementsResponse)
+@query_budget(2)
 async def get_player_achievements(
-    player_id: int,
-    db: Session = Depends(get_db)
+    player: CurrentPlayer,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all achievements unlocked by a player.
 
     Returns achievement records with full details including unlock timestamps.
     """
-    # Validate player exists
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
+    player_id = player.id
 
     # Get all unlocked achievements
-    unlocked = db.query(Achievement).filter(
-        Achievement.player_id == player_id
-    ).all()
+    result = await db.execute(
+        select(Achievement).where(Achievement.player_id == player_id)
+    )
+    unlocked = result.scalars().all()
 
     # Build response with full details
     achievements_with_details = []
     for achievement in unlocked:
         definition = achievement_service.get_achievement_definition(achievement.achievement_id)
         if definition:
-            achievements_with_details.append(
-                AchievementWithDetails(
-                    id=achievement.id,
-                    player_id=achievement.player_id,
-                    achievement_id=achievement.achievement_id,
-                    title=definition.title,
-                    description=definition.description,
-                    icon=definition.icon,
-                    category=definition.category,
-                    rarity=definition.rarity,
-                    xp_reward=definition.xp_reward,
-                    unlocked_at=achievement.unlocked_at
-                )
-            )
-
-    return PlayerAchievementsResponse(
-        player_id=player_id,
-        total_achievements=len(achievements_with_details),
-        achievements=achievements_with_details
-    )
+            achievements_with_details.append({  # AchievementWithDetails
+                "id": achievement.id,
+                "player_id": achievement.player_id,
+                "achievement_id": achievement.achievement_id,
+                "title": definition.title,
+                "description": definition.description,
+                "icon": definition.icon,
+                "category": definition.category,
+                "rarity": definition.rarity,
+                "xp_reward": definition.xp_reward,
+                "unlocked_at": achievement.unlocked_at
+            })
+
+    # Trusted: our own rows and achievement definitions, serialized without re-validation
+    return trusted_response({
+        "player_id": player_id,
+        "total_achievements": len(achievements_with_details),
+        "achievements": achievements_with_details
+    })
 
 
 @router.post("/unlock", response_model=AchievementWithDetails, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def unlock_achievement(
     request: UnlockAchievementRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Manually unlock an achievement for a player.
@@ -100,12 +94,7 @@ async def unlock_achievement(
     - Awards XP to player
     """
     # Validate player exists
-    player = db.query(Player).filter(Player.id == request.player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {request.player_id} not found"
-        )
+    await require_player(db, request.player_id)
 
     # Validate achievement definition exists
     definition = achievement_service.get_achievement_definition(request.achievement_id)
@@ -115,57 +104,24 @@ async def unlock_achievement(
             detail=f"Achievement '{request.achievement_id}' not found"
         )
 
-    # Check if already unlocked
-    existing = db.query(Achievement).filter(
-        Achievement.player_id == request.player_id,
-        Achievement.achievement_id == request.achievement_id
-    ).first()
-
-    if existing:
+    # Insert + XP in one transaction (nothing inserted -> already unlocked)
+    unlocked = await achievement_service.unlock_achievements(
+        request.player_id, [request.achievement_id], db
+    )
+    if not unlocked:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Achievement '{request.achievement_id}' already unlocked for this player"
         )
 
-    # Create achievement record
-    new_achievement = Achievement(
-        player_id=request.player_id,
-        achievement_id=request.achievement_id
-    )
-
-    db.add(new_achievement)
-    db.flush()
-
-    # Award XP using centralized service
-    xp_service.award_xp(
-        player_id=request.player_id,
-        xp_amount=definition.xp_reward,
-        db=db,
-        reason=f"Unlocked achievement: {definition.title}"
-    )
-
-    db.commit()
-    db.refresh(new_achievement)
-
-    # Return with full details
-    return AchievementWithDetails(
-        id=new_achievement.id,
-        player_id=new_achievement.player_id,
-        achievement_id=new_achievement.achievement_id,
-        title=definition.title,
-        description=definition.description,
-        icon=definition.icon,
-        category=definition.category,
-        rarity=definition.rarity,
-        xp_reward=definition.xp_reward,
-        unlocked_at=new_achievement.unlocked_at
-    )
+    return unlocked[0]
 
 
 @router.post("/check", response_model=CheckAchievementsResponse)
+@query_budget(7)
 async def check_achievements(
     request: CheckAchievementsRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Check and automatically unlock achievements after an action.
@@ -177,16 +133,11 @@ async def check_achievements(
 
     Returns list of newly unlocked achievements and total XP earned.
     """
-    # Validate player exists
-    player = db.query(Player).filter(Player.id == request.player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {request.player_id} not found"
-        )
+    # Validate player exists (stats are loaded with it for the rule snapshot)
+    await require_player(db, request.player_id, with_stats=True)
 
     # Check and unlock achievements
-    unlocked_achievements = achievement_service.check_and_unlock_achievements(
+    unlocked_achievements = await achievement_service.check_and_unlock_achievements(
         player_id=request.player_id,
         action_type=request.action_type,
         action_data=request.action_data,
@@ -203,16 +154,18 @@ async def check_achievements(
 
 
 @router.delete("/{achievement_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(2)
 async def delete_achievement(
     achievement_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete an unlocked achievement (admin/debug only).
 
     Note: Does NOT refund XP.
     """
-    achievement = db.query(Achievement).filter(Achievement.id == achievement_id).first()
+    result = await db.execute(select(Achievement).where(Achievement.id == achievement_id))
+    achievement = result.scalar_one_or_none()
 
     if not achievement:
         raise HTTPException(
@@ -220,7 +173,8 @@ async def delete_achievement(
             detail=f"Achievement with ID {achievement_id} not found"
         )
 
-    db.delete(achievement)
-    db.commit()
+    response_cache_service.bump(db, achievement.player_id)
+    await db.delete(achievement)
+    await db.commit()
 
     return None
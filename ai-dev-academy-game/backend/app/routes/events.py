@@ -0,0 +1,44 @@
+"""Event routes - Batched client events for offline progress sync."""
+
+from app.database import get_db
+from app.dependencies import require_player
+from app.query_budget import query_budget
+from app.schemas.events import EventBatchRequest, EventBatchResponse
+from app.services import sync_service
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter()
+
+
+@router.post("/batch", response_model=EventBatchResponse)
+@query_budget(sync_service.BATCH_QUERY_BUDGET)
+async def apply_event_batch(
+    batch: EventBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply a player's queued events in one request and one transaction.
+
+    Event types (`type`):
+    - 'progress': class status change, as `PATCH /api/progress/{progress_id}`
+    - 'exercise': exercises completed in a class so far
+    - 'bug_hunt': a finished Bug Hunt game, as `POST /api/minigames/bug-hunt/submit`
+
+    Events are applied in order, each at its `client_timestamp`. An event
+    whose `idempotency_key` was already applied is skipped, so a batch can
+    be resent safely after a lost response. Events that cannot be applied
+    are rejected without failing the batch. Achievements are evaluated once
+    for the whole batch.
+    """
+    # Stats are loaded with the player: every event below updates them in memory
+    await require_player(db, batch.player_id, with_stats=True)
+
+    result = await sync_service.apply_batch(db, batch.player_id, batch.events)
+
+    return EventBatchResponse(
+        player_id=batch.player_id,
+        results=result.results,
+        xp_earned=result.xp_earned,
+        achievements_unlocked=result.achievements_unlocked
+    )
@@ -1,25 +1,42 @@
 """Player routes - CRUD operations for game players."""
 
 
-from app.database import get_db
+from app.database import get_db, on_commit
+from app.dependencies import CurrentPlayer, CurrentPlayerWithStats, require_admin
 from app.models.achievement import PlayerStats
 from app.models.player import Player
+from app.query_budget import query_budget
 from app.schemas.player import (
+    PlayerBulkDelete,
+    PlayerBulkDeleteMode,
+    PlayerBulkDeleteResponse,
     PlayerCreate,
+    PlayerRankResponse,
     PlayerResponse,
     PlayerStatsResponse,
     PlayerUpdate,
+    RankInfo,
+)
+from app.services import (
+    event_service,
+    leaderboard_service,
+    player_admin_service,
+    rank_service,
+    streak_service,
 )
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
 
 @router.post("/", response_model=PlayerResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_player(
     player_data: PlayerCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new player.
@@ -30,9 +47,10 @@ async def create_player(
     Returns the created player with initial stats (level 1, 0 XP).
     """
     # Check if username already exists
-    existing_player = db.query(Player).filter(
-        Player.username == player_data.username
-    ).first()
+    result = await db.execute(
+        select(Player).where(Player.username == player_data.username)
+    )
+    existing_player = result.scalar_one_or_none()
 
     if existing_player:
         raise HTTPException(
@@ -49,7 +67,7 @@ async def create_player(
     )
 
     db.add(new_player)
-    db.flush()  # Get player.id without committing
+    await db.flush()  # Get player.id without committing
 
     # Create initial player stats
     player_stats = PlayerStats(
@@ -62,38 +80,30 @@ async def create_player(
     )
 
     db.add(player_stats)
-    db.commit()
-    db.refresh(new_player)
+    rank_service.record_score(db, rank_service.XP, new_player.id, 0)
+    await db.commit()
+    await db.refresh(new_player)
 
     return new_player
 
 
 @router.get("/{player_id}", response_model=PlayerResponse)
-async def get_player(
-    player_id: int,
-    db: Session = Depends(get_db)
-):
+@query_budget(1)
+async def get_player(player: CurrentPlayer):
     """
     Get player profile by ID.
 
     Returns player information including level, XP, and avatar.
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
-
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
-
     return player
 
 
 @router.get("/", response_model=list[PlayerResponse])
+@query_budget(1)
 async def list_players(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List all players with pagination.
@@ -104,34 +114,28 @@ async def list_players(
     if limit > 100:
         limit = 100
 
-    players = db.query(Player).offset(skip).limit(limit).all()
-    return players
+    result = await db.execute(select(Player).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.patch("/{player_id}", response_model=PlayerResponse)
+@query_budget(5)
 async def update_player(
-    player_id: int,
+    player: CurrentPlayer,
     player_data: PlayerUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Update player profile (avatar or username).
+    Update player profile (avatar, username or streak timezone).
 
     Only non-null fields in the request will be updated.
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
-
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
-
     # Check if new username is taken (if provided)
     if player_data.username and player_data.username != player.username:
-        existing = db.query(Player).filter(
-            Player.username == player_data.username
-        ).first()
+        result = await db.execute(
+            select(Player).where(Player.username == player_data.username)
+        )
+        existing = result.scalar_one_or_none()
 
         if existing:
             raise HTTPException(
@@ -140,21 +144,27 @@ async def update_player(
             )
 
         player.username = player_data.username
+        on_commit(db, leaderboard_service.invalidate)  # Cached boards show usernames
 
     # Update avatar if provided
     if player_data.avatar:
         player.avatar = player_data.avatar
 
-    db.commit()
-    db.refresh(player)
+    # Timezone streak days are counted in
+    if player_data.timezone:
+        await streak_service.set_timezone(db, player.id, player_data.timezone)
+
+    await db.commit()
+    await db.refresh(player)
 
     return player
 
 
 @router.get("/{player_id}/stats", response_model=PlayerStatsResponse)
+@query_budget(2)
 async def get_player_stats(
-    player_id: int,
-    db: Session = Depends(get_db)
+    player: CurrentPlayerWithStats,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get comprehensive player statistics.
@@ -165,18 +175,9 @@ async def get_player_stats(
     - Minigames played
     - Current and longest streak
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
-
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
-
-    # Get or create stats
-    stats = db.query(PlayerStats).filter(
-        PlayerStats.player_id == player_id
-    ).first()
+    # Get (loaded with the player) or create stats
+    player_id = player.id
+    stats = player.stats
 
     if not stats:
         # Create default stats if they don't exist
@@ -189,36 +190,119 @@ async def get_player_stats(
             longest_streak=0
         )
         db.add(stats)
-        db.commit()
-        db.refresh(stats)
+        await db.commit()
+        await db.refresh(stats)
 
-    return stats
+    # Streaks are kept by streak_service; a run is broken once a whole day passes without activity
+    streak = await streak_service.get_streak(db, player_id)
+    response = PlayerStatsResponse.model_validate(stats)
+    response.current_streak = streak.current_as_of()
+    response.longest_streak = streak.longest_streak
+    return response
+
+
+@router.get("/{player_id}/rank", response_model=PlayerRankResponse)
+@query_budget(4)
+async def get_player_rank(
+    player_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get a player's global rank and percentile by XP and by best Bug Hunt score.
+
+    Ties share a rank. Answered in O(log n) from in-memory rank indexes,
+    without scanning the players table.
+    """
+    xp_rank = await rank_service.get_rank(db, rank_service.XP, player_id)
+    if xp_rank is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Player with ID {player_id} not found"
+        )
+    bug_hunt_rank = await rank_service.get_rank(db, rank_service.BUG_HUNT, player_id)
+
+    def info(rank: rank_service.Rank) -> RankInfo:
+        return RankInfo(score=rank.score, rank=rank.rank, total=rank.total, percentile=rank.percentile)
+
+    return PlayerRankResponse(
+        player_id=player_id,
+        xp=info(xp_rank),
+        bug_hunt=info(bug_hunt_rank) if bug_hunt_rank else None
+    )
+
+
+@router.get("/{player_id}/events")
+@query_budget(1)
+async def stream_player_events(
+    player: CurrentPlayer,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream a player's events as Server-Sent Events (`text/event-stream`).
+
+    Pushes `achievement_unlocked`, `xp_awarded`, `level_up` and
+    `bug_hunt_completed` as they commit, instead of polling the player and
+    achievements endpoints. Events are not replayed: after a reconnect
+    (or a `dropped` event, sent when the client falls behind) refetch state once.
+    """
+    await db.close()  # Hold no connection for the lifetime of the stream
+
+    return StreamingResponse(
+        event_service.stream(player.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.delete("/{player_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(15)
 async def delete_player(
-    player_id: int,
-    db: Session = Depends(get_db)
+    player: CurrentPlayer,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a player and all associated data.
 
-    This will cascade delete:
+    One DELETE per table (player_admin_service), without loading:
     - Player stats
     - Progress records
     - Achievements
     - Unlocked tools
-    - Bug Hunt games
+    - Bug Hunt games, leaderboard entries, rollups and summaries
+    - XP ledger, progress state and streak
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
+    await player_admin_service.delete_players(db, [player.id])
+    await db.commit()
 
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
+    return None
 
-    db.delete(player)
-    db.commit()
 
-    return None
+@router.post(
+    "/admin/bulk-delete",
+    response_model=PlayerBulkDeleteResponse,
+    dependencies=[Depends(require_admin)]
+)
+@query_budget(14)
+async def bulk_delete_players(
+    request: PlayerBulkDelete,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete or anonymize many players in one transaction (admin, X-Admin-Token).
+
+    Set-based: the statement count does not grow with the number of players
+    or the size of their histories. Ids without a player are reported back.
+    """
+    player_ids = list(dict.fromkeys(request.player_ids))
+    if request.mode == PlayerBulkDeleteMode.ANONYMIZE:
+        processed = await player_admin_service.anonymize_players(db, player_ids)
+    else:
+        processed = await player_admin_service.delete_players(db, player_ids)
+    await db.commit()
+
+    found = set(processed)
+    return PlayerBulkDeleteResponse(
+        mode=request.mode,
+        processed=sorted(found),
+        not_found=[player_id for player_id in player_ids if player_id not in found]
+    )
@@ -1,25 +1,31 @@
 """Progress routes - Track player progress through curriculum."""
 
-from datetime import datetime
-
 from app.database import get_db
-from app.models.achievement import PlayerStats
-from app.models.player import Player
+from app.dependencies import require_player
 from app.models.progress import Progress
+from app.query_budget import query_budget
 from app.schemas.progress import (
-    ClassInfoResponse,
-    ClassProgress,
     FullProgressResponse,
     ModuleInfoResponse,
     ModuleProgressResponse,
+    ProgressBatchCreate,
+    ProgressBatchResponse,
     ProgressCreate,
     ProgressResponse,
-    ProgressStatus,
     ProgressUpdate,
+    SkippedClassResponse,
+)
+from app.services import (
+    catalog_service,
+    content_service,
+    progress_service,
+    progress_state_service,
+    response_cache_service,
+    unlock_service,
 )
-from app.services import content_service, xp_service
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
@@ -29,77 +35,38 @@ router = APIRouter()
 
 
 @router.get("/modules", response_model=list[ModuleInfoResponse])
-async def get_all_modules():
+async def get_all_modules(request: Request):
     """
     Get all modules with their class information from the curriculum.
 
-    Returns curriculum metadata (not player progress).
+    Returns curriculum metadata (not player progress), prebuilt at startup.
     """
-    modules = content_service.get_all_modules()
-
-    result = []
-    for module in modules:
-        classes = [
-            ClassInfoResponse(
-                class_number=c.class_number,
-                title=c.title,
-                description=c.description,
-                exercises_count=c.exercises_count,
-                xp_reward=c.xp_reward
-            )
-            for c in module.classes
-        ]
-
-        result.append(ModuleInfoResponse(
-            module_number=module.module_number,
-            title=module.title,
-            description=module.description,
-            total_classes=len(module.classes),
-            classes=classes
-        ))
-
-    return result
+    return catalog_service.serve(request, catalog_service.MODULES)
 
 
 @router.get("/modules/{module_number}", response_model=ModuleInfoResponse)
-async def get_module_info(module_number: int):
+async def get_module_info(module_number: int, request: Request):
     """
     Get specific module information from the curriculum.
 
-    Returns curriculum metadata (not player progress).
+    Returns curriculum metadata (not player progress), prebuilt at startup.
     """
-    module = content_service.get_module_info(module_number)
+    payload = catalog_service.MODULES_BY_NUMBER.get(module_number)
 
-    if not module:
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Module {module_number} not found in curriculum"
         )
 
-    classes = [
-        ClassInfoResponse(
-            class_number=c.class_number,
-            title=c.title,
-            description=c.description,
-            exercises_count=c.exercises_count,
-            xp_reward=c.xp_reward
-        )
-        for c in module.classes
-    ]
-
-    return ModuleInfoResponse(
-        module_number=module.module_number,
-        title=module.title,
-        description=module.description,
-        total_classes=len(module.classes),
-        classes=classes
-    )
+    return catalog_service.serve(request, payload)
 
 
 @router.post("/", response_model=ProgressResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 async def create_or_unlock_class(
     progress_data: ProgressCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create/unlock a class for a player.
@@ -108,82 +75,82 @@ async def create_or_unlock_class(
     - Player exists
     - Class exists in curriculum
     - Prerequisites are met (previous classes completed)
-    """
-    # Validate player exists
-    player = db.query(Player).filter(Player.id == progress_data.player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {progress_data.player_id} not found"
-        )
 
-    # Validate class exists in curriculum
-    class_info = content_service.get_class_info(
-        progress_data.module_number,
-        progress_data.class_number
-    )
-    if not class_info:
+    The checks and the insert are one statement, so concurrent unlocks of
+    the same class get one 201 and 409s.
+    """
+    entry = content_service.get_class_entry(progress_data.module_number, progress_data.class_number)
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Class {progress_data.module_number}.{progress_data.class_number} not found in curriculum"
         )
 
-    # Check if progress already exists
-    existing = db.query(Progress).filter(
-        Progress.player_id == progress_data.player_id,
-        Progress.module_number == progress_data.module_number,
-        Progress.class_number == progress_data.class_number
-    ).first()
+    new_progress = await unlock_service.unlock_class(db, progress_data.player_id, entry, progress_data.status)
 
-    if existing:
+    if new_progress is None:
+        reason = await unlock_service.failure_reason(
+            db, progress_data.player_id, progress_data.module_number, progress_data.class_number
+        )
+        if reason is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Player with ID {progress_data.player_id} not found"
+            )
+        if reason == unlock_service.ALREADY_EXISTS:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Progress already exists for class {progress_data.module_number}.{progress_data.class_number}"
+            )
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Progress already exists for class {progress_data.module_number}.{progress_data.class_number}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Prerequisites not met for class {progress_data.module_number}.{progress_data.class_number}"
         )
 
-    # Get completed classes for prerequisite check
-    completed = db.query(Progress).filter(
-        Progress.player_id == progress_data.player_id,
-        Progress.status == ProgressStatus.COMPLETED
-    ).all()
+    await progress_state_service.record_progress(db, new_progress)
+    await db.commit()
 
-    completed_tuples = [
-        (p.module_number, p.class_number) for p in completed
-    ]
+    return new_progress
 
-    # Check prerequisites
-    can_unlock = content_service.is_class_unlockable(
-        progress_data.module_number,
-        progress_data.class_number,
-        completed_tuples
-    )
 
-    if not can_unlock:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Prerequisites not met for class {progress_data.module_number}.{progress_data.class_number}"
-        )
+@router.post("/batch", response_model=ProgressBatchResponse)
+@query_budget(25)
+async def unlock_classes(
+    batch: ProgressBatchCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Unlock several classes for a player at once (onboarding flows).
 
-    # Create progress
-    new_progress = Progress(
-        player_id=progress_data.player_id,
-        module_number=progress_data.module_number,
-        class_number=progress_data.class_number,
-        status=progress_data.status,
-        exercises_completed=0
-    )
+    Classes are unlocked in the given order in one transaction, each with
+    the same checks as `POST /api/progress/`, so a class whose
+    prerequisites are created earlier in the batch (with status
+    `completed`) unlocks too. Classes that cannot be unlocked are returned
+    in `skipped` with a reason instead of failing the request.
+    """
+    await require_player(db, batch.player_id)
 
-    db.add(new_progress)
-    db.commit()
-    db.refresh(new_progress)
+    unlocked, skipped = await unlock_service.unlock_classes(
+        db,
+        batch.player_id,
+        [(ref.module_number, ref.class_number) for ref in batch.classes],
+        batch.status
+    )
+    await db.commit()
 
-    return new_progress
+    return ProgressBatchResponse(
+        player_id=batch.player_id,
+        unlocked=[ProgressResponse.model_validate(progress) for progress in unlocked],
+        skipped=[SkippedClassResponse(**vars(skip)) for skip in skipped]
+    )
 
 
 @router.get("/{player_id}", response_model=FullProgressResponse)
+@query_budget(3)
 async def get_full_progress(
     player_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get complete progress for a player across all modules.
@@ -194,73 +161,25 @@ async def get_full_progress(
     - Total exercises completed
     - Detailed progress per module
     """
-    # Validate player exists
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
-
-    # Get all progress for player
-    all_progress = db.query(Progress).filter(
-        Progress.player_id == player_id
-    ).all()
+    return await response_cache_service.cached_response(
+        request, player_id, "full", lambda: _build_full_progress(player_id, db)
+    )
 
-    # Create progress dict for quick lookup
-    progress_dict = {
-        (p.module_number, p.class_number): p
-        for p in all_progress
-    }
 
-    # Build module progress
-    modules_response = []
-    total_classes_completed = 0
-    total_exercises = sum(p.exercises_completed for p in all_progress)
-
-    for module_info in content_service.get_all_modules():
-        classes_progress = []
-        completed_in_module = 0
-
-        for class_info in module_info.classes:
-            prog = progress_dict.get((module_info.module_number, class_info.class_number))
-
-            if prog:
-                class_progress = ClassProgress(
-                    class_number=class_info.class_number,
-                    status=prog.status,
-                    exercises_completed=prog.exercises_completed,
-                    completed_at=prog.completed_at
-                )
-                if prog.status == ProgressStatus.COMPLETED:
-                    completed_in_module += 1
-                    total_classes_completed += 1
-            else:
-                # Class not yet unlocked
-                class_progress = ClassProgress(
-                    class_number=class_info.class_number,
-                    status=ProgressStatus.LOCKED,
-                    exercises_completed=0,
-                    completed_at=None
-                )
-
-            classes_progress.append(class_progress)
-
-        module_progress = ModuleProgressResponse(
-            module_number=module_info.module_number,
-            module_name=module_info.title,
-            total_classes=len(module_info.classes),
-            completed_classes=completed_in_module,
-            progress_percentage=content_service.get_module_progress(
-                module_info.module_number,
-                completed_in_module
-            ),
-            classes=classes_progress
-        )
+async def _build_full_progress(player_id: int, db: AsyncSession) -> FullProgressResponse:
+    """Build the full progress response (cache miss path)."""
+    # Validate player exists
+    await require_player(db, player_id)
 
-        modules_response.append(module_progress)
+    # Build module progress from the player's state row
+    state = await progress_state_service.get_state(db, player_id)
+    modules_response = [
+        state.module_progress(module_info.module_number)
+        for module_info in content_service.get_all_modules()
+    ]
 
     # Calculate overall progress
+    total_classes_completed = state.total_classes_completed
     total_classes = content_service.get_total_classes()
     overall_percentage = content_service.calculate_progress_percentage(
         total_classes_completed,
@@ -270,26 +189,31 @@ async def get_full_progress(
     return FullProgressResponse(
         player_id=player_id,
         total_classes_completed=total_classes_completed,
-        total_exercises_completed=total_exercises,
+        total_exercises_completed=state.total_exercises_completed,
         overall_progress_percentage=overall_percentage,
         modules=modules_response
     )
 
 
 @router.get("/{player_id}/module/{module_number}", response_model=ModuleProgressResponse)
+@query_budget(3)
 async def get_module_progress(
     player_id: int,
     module_number: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """Get progress for a specific module."""
+    return await response_cache_service.cached_response(
+        request, player_id, f"module-{module_number}",
+        lambda: _build_module_progress(player_id, module_number, db)
+    )
+
+
+async def _build_module_progress(player_id: int, module_number: int, db: AsyncSession) -> ModuleProgressResponse:
+    """Build the module progress response (cache miss path)."""
     # Validate player exists
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
+    await require_player(db, player_id)
 
     # Validate module exists
     module_info = content_service.get_module_info(module_number)
@@ -299,59 +223,17 @@ async def get_module_progress(
             detail=f"Module {module_number} not found in curriculum"
         )
 
-    # Get progress for this module
-    module_progress = db.query(Progress).filter(
-        Progress.player_id == player_id,
-        Progress.module_number == module_number
-    ).all()
-
-    progress_dict = {p.class_number: p for p in module_progress}
-
-    classes_progress = []
-    completed_count = 0
-
-    for class_info in module_info.classes:
-        prog = progress_dict.get(class_info.class_number)
-
-        if prog:
-            class_progress = ClassProgress(
-                class_number=class_info.class_number,
-                status=prog.status,
-                exercises_completed=prog.exercises_completed,
-                completed_at=prog.completed_at
-            )
-            if prog.status == ProgressStatus.COMPLETED:
-                completed_count += 1
-        else:
-            class_progress = ClassProgress(
-                class_number=class_info.class_number,
-                status=ProgressStatus.LOCKED,
-                exercises_completed=0,
-                completed_at=None
-            )
-
-        classes_progress.append(class_progress)
-
-    progress_percentage = content_service.get_module_progress(
-        module_number,
-        completed_count
-    )
-
-    return ModuleProgressResponse(
-        module_number=module_number,
-        module_name=module_info.title,
-        total_classes=len(module_info.classes),
-        completed_classes=completed_count,
-        progress_percentage=progress_percentage,
-        classes=classes_progress
-    )
+    # Build from the player's state row
+    state = await progress_state_service.get_state(db, player_id)
+    return state.module_progress(module_number)
 
 
 @router.patch("/{progress_id}", response_model=ProgressResponse)
+@query_budget(9)
 async def update_progress(
     progress_id: int,
     progress_data: ProgressUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update progress for a class.
@@ -365,7 +247,8 @@ async def update_progress(
     - Updates player stats
     - Unlocks next class if prerequisites met
     """
-    progress = db.query(Progress).filter(Progress.id == progress_id).first()
+    result = await db.execute(select(Progress).where(Progress.id == progress_id))
+    progress = result.scalar_one_or_none()
 
     if not progress:
         raise HTTPException(
@@ -373,90 +256,43 @@ async def update_progress(
             detail=f"Progress with ID {progress_id} not found"
         )
 
-    # Get class info for XP reward
-    class_info = content_service.get_class_info(
-        progress.module_number,
-        progress.class_number
+    await progress_service.update_progress(
+        db, progress, progress_data.status, progress_data.exercises_completed
     )
 
-    # Update status if provided
-    if progress_data.status:
-        old_status = progress.status
-        progress.status = progress_data.status
-
-        # If marking as completed
-        if progress_data.status == ProgressStatus.COMPLETED and old_status != ProgressStatus.COMPLETED:
-            progress.completed_at = datetime.utcnow()
-
-            # Award XP using centralized service
-            if class_info:
-                xp_service.award_xp(
-                    player_id=progress.player_id,
-                    xp_amount=class_info.xp_reward,
-                    db=db,
-                    reason=f"Completed class {progress.module_number}.{progress.class_number}"
-                )
-
-                # Update player stats
-                stats = db.query(PlayerStats).filter(
-                    PlayerStats.player_id == progress.player_id
-                ).first()
-                if stats:
-                    stats.classes_completed += 1
-
-        # If marking as in_progress for the first time
-        elif progress_data.status == ProgressStatus.IN_PROGRESS and not progress.started_at:
-            progress.started_at = datetime.utcnow()
-
-    # Update exercises completed if provided
-    if progress_data.exercises_completed is not None:
-        old_count = progress.exercises_completed
-        progress.exercises_completed = progress_data.exercises_completed
-
-        # Update player stats
-        if progress_data.exercises_completed > old_count:
-            stats = db.query(PlayerStats).filter(
-                PlayerStats.player_id == progress.player_id
-            ).first()
-            if stats:
-                stats.exercises_completed += (progress_data.exercises_completed - old_count)
-
-    db.commit()
-    db.refresh(progress)
+    await db.flush()
+    await progress_state_service.record_progress(db, progress)
+    await db.commit()
+    await db.refresh(progress)
 
     return progress
 
 
 @router.get("/{player_id}/next-unlockable")
+@query_budget(3)
 async def get_next_unlockable(
     player_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get the next class that can be unlocked for this player.
 
     Returns module_number and class_number, or null if curriculum is complete.
     """
-    # Validate player exists
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Player with ID {player_id} not found"
-        )
+    return await response_cache_service.cached_response(
+        request, player_id, "next-unlockable", lambda: _build_next_unlockable(player_id, db)
+    )
 
-    # Get completed classes
-    completed = db.query(Progress).filter(
-        Progress.player_id == player_id,
-        Progress.status == ProgressStatus.COMPLETED
-    ).all()
 
-    completed_tuples = [
-        (p.module_number, p.class_number) for p in completed
-    ]
+async def _build_next_unlockable(player_id: int, db: AsyncSession) -> dict:
+    """Build the next-unlockable response (cache miss path)."""
+    # Validate player exists
+    await require_player(db, player_id)
 
-    # Get next unlockable
-    next_class = content_service.get_next_unlockable_class(completed_tuples)
+    # Get next unlockable from the player's completion bitmap
+    state = await progress_state_service.get_state(db, player_id)
+    next_class = content_service.get_next_unlockable_class(state.completed_mask)
 
     if next_class:
         module_number, class_number = next_class
@@ -0,0 +1,87 @@
+"""Event schemas - Batches of client events for offline progress sync."""
+
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, Literal
+
+from app.schemas.achievement import AchievementWithDetails
+from app.schemas.progress import ProgressStatus
+from pydantic import BaseModel, Field
+
+MAX_BATCH_EVENTS = 50
+
+
+class ClientEventBase(BaseModel):
+    """Fields every client event carries."""
+    idempotency_key: str = Field(
+        ...,
+        min_length=1,
+        max_length=64,
+        description="Unique per player; an event resent with the same key is not applied again"
+    )
+    client_timestamp: datetime = Field(
+        ...,
+        description="When it happened on the client (times in the future are taken as now)"
+    )
+
+
+class ProgressEvent(ClientEventBase):
+    """A class status change (as PATCH /api/progress/{progress_id} with a status)."""
+    type: Literal["progress"]
+    progress_id: int = Field(..., gt=0)
+    status: ProgressStatus
+
+
+class ExerciseEvent(ClientEventBase):
+    """Exercises done in a class (as PATCH /api/progress/{progress_id} with a count)."""
+    type: Literal["exercise"]
+    progress_id: int = Field(..., gt=0)
+    exercises_completed: int = Field(
+        ...,
+        ge=0,
+        description="Exercises completed in the class so far (a lower count than stored is ignored)"
+    )
+
+
+class BugHuntEvent(ClientEventBase):
+    """A finished Bug Hunt game (as POST /api/minigames/bug-hunt/submit)."""
+    type: Literal["bug_hunt"]
+    session_id: int = Field(..., description="Session ID from the start response")
+    found_bug_lines: list[int] = Field(..., description="List of line numbers identified as bugs")
+    time_seconds: float = Field(..., ge=0, description="Time taken in seconds")
+
+
+BatchEvent = Annotated[ProgressEvent | ExerciseEvent | BugHuntEvent, Field(discriminator="type")]
+
+
+class EventBatchRequest(BaseModel):
+    """Schema for applying a player's queued events at once."""
+    player_id: int = Field(..., gt=0, description="Player ID")
+    events: list[BatchEvent] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_EVENTS,
+        description="Events in the order they happened"
+    )
+
+
+class EventOutcome(str, Enum):
+    """What a batch did with one event."""
+    APPLIED = "applied"
+    DUPLICATE = "duplicate"  # Key already applied (earlier batch or earlier in this one)
+    REJECTED = "rejected"  # Could not be applied; the key stays free for a corrected retry
+
+
+class EventResult(BaseModel):
+    """Outcome of one event of a batch."""
+    idempotency_key: str
+    outcome: EventOutcome
+    detail: str | None = Field(default=None, description="Why the event was rejected")
+
+
+class EventBatchResponse(BaseModel):
+    """Schema for a batch result, one entry per event in request order."""
+    player_id: int
+    results: list[EventResult]
+    xp_earned: int = Field(..., description="XP awarded by the applied events and the achievements they unlocked")
+    achievements_unlocked: list[AchievementWithDetails]
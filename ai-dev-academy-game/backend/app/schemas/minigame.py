@@ -93,6 +93,7 @@ class LeaderboardResponse(BaseModel):
     total_entries: int
     entries: list[LeaderboardEntry]
     difficulty_filter: str | None = None
+    period: str = "all"
 
 
 class PlayerBugHuntStatsResponse(BaseModel):
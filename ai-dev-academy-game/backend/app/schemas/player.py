@@ -1,8 +1,20 @@
 """Pydantic schemas for Player endpoints."""
 
 from datetime import datetime
+from enum import Enum
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+# Usernames given to anonymized players (see player_admin_service); no player may pick one
+RESERVED_USERNAME_PREFIX = "deleted-player-"
+
+
+def check_username(value: str | None) -> str | None:
+    """Reject usernames in the reserved anonymized namespace (any case)."""
+    if value is not None and value.lower().startswith(RESERVED_USERNAME_PREFIX):
+        raise ValueError(f"Usernames starting with '{RESERVED_USERNAME_PREFIX}' are reserved")
+    return value
 
 
 class PlayerCreate(BaseModel):
@@ -10,6 +22,8 @@ class PlayerCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=20, description="Username (3-20 characters)")
     avatar: str = Field(default="default.png", description="Avatar filename")
 
+    _check_username = field_validator("username")(check_username)
+
 
 class PlayerResponse(BaseModel):
     """Schema for player response."""
@@ -29,6 +43,19 @@ class PlayerUpdate(BaseModel):
     """Schema for updating player info."""
     username: str | None = Field(default=None, min_length=3, max_length=50)
     avatar: str | None = Field(default=None)
+    timezone: str | None = Field(default=None, description="IANA timezone streak days are counted in")
+
+    _check_username = field_validator("username")(check_username)
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: str | None) -> str | None:
+        if value is not None:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"Unknown timezone '{value}'") from None
+        return value
 
 
 class PlayerStatsResponse(BaseModel):
@@ -44,3 +71,37 @@ class PlayerStatsResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class RankInfo(BaseModel):
+    """A player's standing on one ranking."""
+    score: int
+    rank: int = Field(..., description="1 = best; tied scores share a rank")
+    total: int = Field(..., description="Players on the ranking")
+    percentile: float = Field(..., description="Share of ranked players at or below this one (100 = top)")
+
+
+class PlayerRankResponse(BaseModel):
+    """Schema for a player's global ranks."""
+    player_id: int
+    xp: RankInfo
+    bug_hunt: RankInfo | None = Field(default=None, description="Best Bug Hunt score rank (None until a game is finished)")
+
+
+class PlayerBulkDeleteMode(str, Enum):
+    """What a bulk delete does to each player."""
+    DELETE = "delete"  # Player and all their data
+    ANONYMIZE = "anonymize"  # Username and avatar only; history kept
+
+
+class PlayerBulkDelete(BaseModel):
+    """Schema for deleting or anonymizing many players in one transaction (admin)."""
+    player_ids: list[int] = Field(..., min_length=1, max_length=500, description="Players to remove")
+    mode: PlayerBulkDeleteMode = Field(default=PlayerBulkDeleteMode.DELETE)
+
+
+class PlayerBulkDeleteResponse(BaseModel):
+    """Schema for a bulk delete result."""
+    mode: PlayerBulkDeleteMode
+    processed: list[int] = Field(..., description="Players deleted or anonymized")
+    not_found: list[int] = Field(..., description="Requested ids without a player")
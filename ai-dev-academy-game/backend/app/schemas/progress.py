@@ -25,6 +25,27 @@ class ProgressCreate(BaseModel):
     )
 
 
+class ClassRef(BaseModel):
+    """A class in the curriculum."""
+    module_number: int = Field(..., ge=0, le=5, description="Module number (0-5)")
+    class_number: int = Field(..., ge=0, description="Class number within module")
+
+
+class ProgressBatchCreate(BaseModel):
+    """Schema for unlocking several classes at once (onboarding)."""
+    player_id: int = Field(..., gt=0, description="Player ID")
+    classes: list[ClassRef] = Field(
+        ...,
+        min_length=1,
+        max_length=20,
+        description="Classes to unlock, in order (later classes may depend on earlier ones)"
+    )
+    status: ProgressStatus = Field(
+        default=ProgressStatus.UNLOCKED,
+        description="Initial status of every class (usually 'unlocked')"
+    )
+
+
 class ProgressUpdate(BaseModel):
     """Schema for updating progress (mark as completed, add exercises)."""
     status: ProgressStatus | None = Field(
@@ -53,6 +74,20 @@ class ProgressResponse(BaseModel):
         from_attributes = True
 
 
+class SkippedClassResponse(BaseModel):
+    """A class a batch unlock did not unlock."""
+    module_number: int
+    class_number: int
+    reason: str  # not_found, already_exists or prerequisites_not_met
+
+
+class ProgressBatchResponse(BaseModel):
+    """Schema for batch unlock results."""
+    player_id: int
+    unlocked: list[ProgressResponse]
+    skipped: list[SkippedClassResponse]
+
+
 class ClassProgress(BaseModel):
     """Schema for a single class progress summary."""
     class_number: int
@@ -1,16 +1,23 @@
 """Achievement service - Manages achievement definitions and unlocking logic."""
 
 
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
 from app.models.achievement import Achievement, PlayerStats
 from app.models.progress import Progress
+from app.models.streak import PlayerStreak
 from app.schemas.achievement import (
     AchievementCategory,
     AchievementDefinition,
     AchievementRarity,
     AchievementWithDetails,
 )
-from app.services import xp_service
-from sqlalchemy.orm import Session
+from app.schemas.progress import ProgressStatus
+from app.services import content_service, event_service, player_service, streak_service, xp_service
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Achievement definitions - all available achievements in the game
 ACHIEVEMENT_DEFINITIONS: dict[str, AchievementDefinition] = {
@@ -252,218 +259,265 @@ def get_achievement_definition(achievement_id: str) -> AchievementDefinition | N
     return ACHIEVEMENT_DEFINITIONS.get(achievement_id)
 
 
-def check_and_unlock_achievements(
-    player_id: int,
-    action_type: str,
-    action_data: dict | None,
-    db: Session
-) -> list[AchievementWithDetails]:
-    """
-    Check if any achievements should be unlocked based on an action.
+# Rule engine
+# Each rule is a pure condition over one stats snapshot. Rules are indexed
+# by action type at import, so an action only evaluates the rules it can
+# trigger, and conditions use thresholds (>=) so several unlocks that become
+# due together (e.g. after a batch of actions) all fire in one evaluation.
 
-    Args:
-        player_id: Player ID
-        action_type: Type of action (e.g., 'complete_class', 'bug_hunt_win')
-        action_data: Additional data about the action
-        db: Database session
 
-    Returns:
-        List of newly unlocked achievements
-    """
-    newly_unlocked = []
+@dataclass(frozen=True)
+class AchievementRule:
+    """Unlock condition for one achievement."""
+    achievement_id: str
+    triggers: tuple[str, ...]
+    condition: Callable[["StatsSnapshot", dict], bool]
+    needs_module_progress: bool = False
+    needs_streak: bool = False
 
-    # Get player stats
-    stats = db.query(PlayerStats).filter(PlayerStats.player_id == player_id).first()
-    if not stats:
-        return []
 
-    # Get already unlocked achievements
-    existing_achievements = db.query(Achievement).filter(
-        Achievement.player_id == player_id
-    ).all()
-    existing_ids = {a.achievement_id for a in existing_achievements}
-
-    # Check achievements based on action type
-    if action_type == "complete_class":
-        newly_unlocked.extend(_check_class_completion_achievements(
-            player_id, stats, existing_ids, action_data, db
-        ))
-    elif action_type == "bug_hunt_win":
-        newly_unlocked.extend(_check_bug_hunt_achievements(
-            player_id, stats, existing_ids, action_data, db
-        ))
-    elif action_type == "complete_exercise":
-        newly_unlocked.extend(_check_exercise_achievements(
-            player_id, stats, existing_ids, db
-        ))
-
-    return newly_unlocked
-
-
-def _check_class_completion_achievements(
-    player_id: int,
-    stats: PlayerStats,
-    existing_ids: set,
-    action_data: dict | None,
-    db: Session
-) -> list[AchievementWithDetails]:
-    """Check achievements related to class completion."""
-    unlocked = []
+@dataclass
+class StatsSnapshot:
+    """Everything the rules read, loaded once per evaluation."""
+    stats: PlayerStats
+    existing_ids: set[str]
+    completed_by_module: dict[int, int] = field(default_factory=dict)
+    streak: streak_service.Streak = field(default_factory=streak_service.Streak)
 
-    # First class
-    if "first_class" not in existing_ids and stats.classes_completed == 1:
-        unlocked.append(_unlock_achievement(player_id, "first_class", db))
 
-    # 10 classes
-    if "ten_classes" not in existing_ids and stats.classes_completed >= 10:
-        unlocked.append(_unlock_achievement(player_id, "ten_classes", db))
+def _module_complete_rule(module_number: int, class_count: int) -> AchievementRule:
+    return AchievementRule(
+        f"module_{module_number}_complete",
+        ("complete_class",),
+        lambda snapshot, data: snapshot.completed_by_module.get(module_number, 0) >= class_count,
+        needs_module_progress=True
+    )
 
-    # 20 classes
-    if "twenty_classes" not in existing_ids and stats.classes_completed >= 20:
-        unlocked.append(_unlock_achievement(player_id, "twenty_classes", db))
 
-    # Module completion (check if all classes in a module are completed)
-    if action_data and "module_number" in action_data:
-        module_num = action_data["module_number"]
-        achievement_id = f"module_{module_num}_complete"
+TOTAL_CLASSES = content_service.get_total_classes()
+
+RULES: tuple[AchievementRule, ...] = (
+    # Class completion
+    AchievementRule("first_class", ("complete_class",),
+                    lambda snapshot, data: snapshot.stats.classes_completed >= 1),
+    AchievementRule("ten_classes", ("complete_class",),
+                    lambda snapshot, data: snapshot.stats.classes_completed >= 10),
+    AchievementRule("twenty_classes", ("complete_class",),
+                    lambda snapshot, data: snapshot.stats.classes_completed >= 20),
+    AchievementRule("half_curriculum", ("complete_class",),
+                    lambda snapshot, data: snapshot.stats.classes_completed >= TOTAL_CLASSES / 2),
+    AchievementRule("curriculum_complete", ("complete_class",),
+                    lambda snapshot, data: snapshot.stats.classes_completed >= TOTAL_CLASSES),
+    *(
+        _module_complete_rule(module.module_number, len(module.classes))
+        for module in content_service.get_all_modules()
+        if f"module_{module.module_number}_complete" in ACHIEVEMENT_DEFINITIONS
+    ),
 
-        if achievement_id not in existing_ids and _is_module_complete(player_id, module_num, db):
-            unlocked.append(_unlock_achievement(player_id, achievement_id, db))
+    # Bug Hunt
+    AchievementRule("first_bug_hunt", ("bug_hunt_win",),
+                    lambda snapshot, data: snapshot.stats.bug_hunt_wins >= 1),
+    AchievementRule("bug_hunt_5_wins", ("bug_hunt_win",),
+                    lambda snapshot, data: snapshot.stats.bug_hunt_wins >= 5),
+    AchievementRule("bug_hunt_10_wins", ("bug_hunt_win",),
+                    lambda snapshot, data: snapshot.stats.bug_hunt_wins >= 10),
+    AchievementRule("bug_hunt_perfect", ("bug_hunt_win",),
+                    lambda snapshot, data: data.get("accuracy") == 100),
+    AchievementRule("bug_hunt_speed_demon", ("bug_hunt_win",),
+                    lambda snapshot, data: data.get("time_seconds", float("inf")) < 60),
+
+    # Streaks (longest run, so a run reached before a backfill still counts)
+    *(
+        AchievementRule(achievement_id, ("complete_class",),
+                        lambda snapshot, data, days=days: snapshot.streak.longest_streak >= days,
+                        needs_streak=True)
+        for achievement_id, days in (("three_day_streak", 3), ("seven_day_streak", 7), ("thirty_day_streak", 30))
+    ),
 
-    # 50% curriculum
-    total_classes = 45  # Approximate total from content_service
-    if "half_curriculum" not in existing_ids and stats.classes_completed >= total_classes / 2:
-        unlocked.append(_unlock_achievement(player_id, "half_curriculum", db))
+    # Exercises
+    AchievementRule("hundred_exercises", ("complete_exercise",),
+                    lambda snapshot, data: snapshot.stats.exercises_completed >= 100),
+)
 
-    # Full curriculum
-    if "curriculum_complete" not in existing_ids and stats.classes_completed >= total_classes:
-        unlocked.append(_unlock_achievement(player_id, "curriculum_complete", db))
+# action_type -> rules it can trigger
+RULES_BY_ACTION: dict[str, tuple[AchievementRule, ...]] = {
+    action_type: tuple(rule for rule in RULES if action_type in rule.triggers)
+    for action_type in {trigger for rule in RULES for trigger in rule.triggers}
+}
 
-    return [a for a in unlocked if a is not None]
 
+async def _load_snapshot(
+    player_id: int,
+    candidates: tuple[AchievementRule, ...],
+    db: AsyncSession
+) -> StatsSnapshot | None:
+    """
+    Load stats, unlocked ids and what pending rules need: the streak is
+    joined to the stats query, per-module progress is one more query.
+    Without a streak rule, stats the request already loaded are reused.
+    """
+    if any(rule.needs_streak for rule in candidates):
+        query = select(PlayerStats, PlayerStreak).where(PlayerStats.player_id == player_id).outerjoin(
+            PlayerStreak, PlayerStreak.player_id == PlayerStats.player_id
+        )
+        row = (await db.execute(query)).first()
+    else:
+        stats = await player_service.get_stats(db, player_id)
+        row = (stats,) if stats else None
+    if not row:
+        return None
 
-def _check_bug_hunt_achievements(
+    result = await db.execute(
+        select(Achievement.achievement_id).where(Achievement.player_id == player_id)
+    )
+    snapshot = StatsSnapshot(stats=row[0], existing_ids=set(result.scalars().all()))
+    if len(row) > 1:
+        snapshot.streak = streak_service.Streak.from_row(row[1])
+
+    pending = [rule for rule in candidates if rule.achievement_id not in snapshot.existing_ids]
+    if any(rule.needs_module_progress for rule in pending):
+        result = await db.execute(
+            select(Progress.module_number, func.count(Progress.id))
+            .where(
+                Progress.player_id == player_id,
+                Progress.status == ProgressStatus.COMPLETED
+            )
+            .group_by(Progress.module_number)
+        )
+        snapshot.completed_by_module = dict(result.all())
+
+    return snapshot
+
+
+async def check_and_unlock_achievements(
     player_id: int,
-    stats: PlayerStats,
-    existing_ids: set,
+    action_type: str,
     action_data: dict | None,
-    db: Session
+    db: AsyncSession
 ) -> list[AchievementWithDetails]:
-    """Check achievements related to Bug Hunt mini-game."""
-    unlocked = []
-
-    # First win
-    if "first_bug_hunt" not in existing_ids and stats.bug_hunt_wins == 1:
-        unlocked.append(_unlock_achievement(player_id, "first_bug_hunt", db))
-
-    # 5 wins
-    if "bug_hunt_5_wins" not in existing_ids and stats.bug_hunt_wins >= 5:
-        unlocked.append(_unlock_achievement(player_id, "bug_hunt_5_wins", db))
-
-    # 10 wins
-    if "bug_hunt_10_wins" not in existing_ids and stats.bug_hunt_wins >= 10:
-        unlocked.append(_unlock_achievement(player_id, "bug_hunt_10_wins", db))
+    """
+    Check if any achievements should be unlocked based on an action.
 
-    # Perfect game (100% accuracy)
-    if action_data and "accuracy" in action_data:
-        if "bug_hunt_perfect" not in existing_ids and action_data["accuracy"] == 100:
-            unlocked.append(_unlock_achievement(player_id, "bug_hunt_perfect", db))
+    Evaluates only the rules indexed under `action_type` against a single
+    stats snapshot, then writes every unlock and the summed XP in one
+    transaction.
 
-    # Speed demon (under 60 seconds)
-    if action_data and "time_seconds" in action_data:
-        if "bug_hunt_speed_demon" not in existing_ids and action_data["time_seconds"] < 60:
-            unlocked.append(_unlock_achievement(player_id, "bug_hunt_speed_demon", db))
+    Args:
+        player_id: Player ID
+        action_type: Type of action (e.g., 'complete_class', 'bug_hunt_win')
+        action_data: Additional data about the action
+        db: Database session
 
-    return [a for a in unlocked if a is not None]
+    Returns:
+        List of newly unlocked achievements
+    """
+    return await check_and_unlock_for_actions(player_id, [(action_type, action_data or {})], db)
 
 
-def _check_exercise_achievements(
+async def check_and_unlock_for_actions(
     player_id: int,
-    stats: PlayerStats,
-    existing_ids: set,
-    db: Session
+    actions: list[tuple[str, dict]],
+    db: AsyncSession,
+    commit: bool = True
 ) -> list[AchievementWithDetails]:
-    """Check achievements related to exercise completion."""
-    unlocked = []
-
-    # 100 exercises
-    if "hundred_exercises" not in existing_ids and stats.exercises_completed >= 100:
-        unlocked.append(_unlock_achievement(player_id, "hundred_exercises", db))
-
-    return [a for a in unlocked if a is not None]
-
-
-def _is_module_complete(player_id: int, module_number: int, db: Session) -> bool:
-    """Check if all classes in a module are completed."""
-    from app.services import content_service
+    """
+    Check several (action_type, action_data) actions in one evaluation.
 
-    module_info = content_service.get_module_info(module_number)
-    if not module_info:
-        return False
+    One stats snapshot for all of them: each rule any action can trigger is
+    evaluated once per triggering action's data, and is due if any holds.
+    Used by batches (offline sync), which pass commit=False to keep the
+    unlocks in their own transaction.
+    """
+    candidates = tuple({
+        rule.achievement_id: rule
+        for action_type, _ in actions
+        for rule in RULES_BY_ACTION.get(action_type, ())
+    }.values())
+    if not candidates:
+        return []
 
-    total_classes = len(module_info.classes)
+    snapshot = await _load_snapshot(player_id, candidates, db)
+    if snapshot is None:
+        return []
 
-    # Count completed classes in this module
-    from app.schemas.progress import ProgressStatus
-    completed_count = db.query(Progress).filter(
-        Progress.player_id == player_id,
-        Progress.module_number == module_number,
-        Progress.status == ProgressStatus.COMPLETED
-    ).count()
+    due = [
+        rule.achievement_id
+        for rule in candidates
+        if rule.achievement_id not in snapshot.existing_ids and any(
+            rule.condition(snapshot, data) for action_type, data in actions if action_type in rule.triggers
+        )
+    ]
+    if not due:
+        return []
 
-    return completed_count == total_classes
+    return await unlock_achievements(player_id, due, db, commit=commit)
 
 
-def _unlock_achievement(
+async def unlock_achievements(
     player_id: int,
-    achievement_id: str,
-    db: Session
-) -> AchievementWithDetails | None:
-    """Unlock an achievement for a player."""
-    # Check if already unlocked
-    existing = db.query(Achievement).filter(
-        Achievement.player_id == player_id,
-        Achievement.achievement_id == achievement_id
-    ).first()
-
-    if existing:
-        return None
+    achievement_ids: list[str],
+    db: AsyncSession,
+    commit: bool = True
+) -> list[AchievementWithDetails]:
+    """
+    Unlock several achievements for a player in one transaction.
 
-    # Get achievement definition
-    definition = get_achievement_definition(achievement_id)
-    if not definition:
-        return None
+    One multi-row INSERT skips anything already unlocked (so concurrent
+    checks cannot double-award), then the XP of the rows actually
+    inserted is awarded once and everything is committed together
+    (unless commit=False: part of the caller's transaction).
+    Unknown ids are ignored.
 
-    # Create achievement record
-    new_achievement = Achievement(
-        player_id=player_id,
-        achievement_id=achievement_id
-    )
+    Returns:
+        The achievements that were newly unlocked
+    """
+    definitions = {
+        achievement_id: ACHIEVEMENT_DEFINITIONS[achievement_id]
+        for achievement_id in achievement_ids
+        if achievement_id in ACHIEVEMENT_DEFINITIONS
+    }
+    if not definitions:
+        return []
 
-    db.add(new_achievement)
-    db.flush()
+    result = await db.execute(
+        sqlite_insert(Achievement)
+        .values([{"player_id": player_id, "achievement_id": a_id} for a_id in definitions])
+        .on_conflict_do_nothing(index_elements=["player_id", "achievement_id"])
+        .returning(Achievement.id, Achievement.achievement_id, Achievement.unlocked_at)
+    )
+    rows = {row.achievement_id: row for row in result.all()}
+    if not rows:
+        return []
 
-    # Award XP using centralized service
-    xp_service.award_xp(
+    # Award the summed XP once (same transaction)
+    unlocked_definitions = [definitions[a_id] for a_id in definitions if a_id in rows]
+    await xp_service.award_xp(
         player_id=player_id,
-        xp_amount=definition.xp_reward,
+        xp_amount=sum(definition.xp_reward for definition in unlocked_definitions),
         db=db,
-        reason=f"Unlocked achievement: {definition.title}"
+        reason="Unlocked achievements: " + ", ".join(d.title for d in unlocked_definitions),
+        commit=False
     )
 
-    db.commit()
-    db.refresh(new_achievement)
-
-    # Return achievement with details
-    return AchievementWithDetails(
-        id=new_achievement.id,
-        player_id=new_achievement.player_id,
-        achievement_id=new_achievement.achievement_id,
-        title=definition.title,
-        description=definition.description,
-        icon=definition.icon,
-        category=definition.category,
-        rarity=definition.rarity,
-        xp_reward=definition.xp_reward,
-        unlocked_at=new_achievement.unlocked_at
-    )
+    unlocked = [
+        AchievementWithDetails(
+            id=rows[definition.achievement_id].id,
+            player_id=player_id,
+            achievement_id=definition.achievement_id,
+            title=definition.title,
+            description=definition.description,
+            icon=definition.icon,
+            category=definition.category,
+            rarity=definition.rarity,
+            xp_reward=definition.xp_reward,
+            unlocked_at=rows[definition.achievement_id].unlocked_at
+        )
+        for definition in unlocked_definitions
+    ]
+    for achievement in unlocked:
+        event_service.publish(db, player_id, event_service.ACHIEVEMENT_UNLOCKED, achievement.model_dump())
+
+    if commit:
+        await db.commit()
+
+    return unlocked
@@ -0,0 +1,208 @@
+"""Bug Hunt service - Grades submitted games and records finished ones."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.content.bug_templates import BugResult, false_positive_result, get_answer_key, get_template_by_id
+from app.models import BugHuntGame, PlayerStats
+from app.services import bug_hunt_stats_service, event_service, leaderboard_service, player_service, xp_service
+from app.services.game_session_service import ActiveGame
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class GradedGame:
+    """A submitted game's results, before anything is written."""
+    found_correct: set[int]
+    missed_bugs: set[int]
+    false_positives: set[int]
+    bugs_total: int
+    score: int
+    xp_earned: int
+    accuracy: float
+    is_perfect: bool
+    results: list[BugResult]
+    template_xp: int
+
+
+def calculate_bug_hunt_score(
+    bugs_found: int,
+    bugs_total: int,
+    time_seconds: float,
+    false_positives: int,
+    difficulty: str
+) -> tuple[int, int]:
+    """
+    Calculate score and XP for Bug Hunt game.
+
+    Returns: (score, xp_earned)
+    """
+    # Base score from bugs found
+    base_score = (bugs_found / bugs_total) * 1000 if bugs_total > 0 else 0
+
+    # Accuracy penalty for false positives
+    if false_positives > 0:
+        base_score -= false_positives * 100
+
+    # Time bonus (faster = better, max 200 bonus points)
+    # Perfect time thresholds by difficulty
+    time_thresholds = {
+        "easy": 60,    # 1 minute
+        "medium": 120,  # 2 minutes
+        "hard": 180     # 3 minutes
+    }
+    threshold = time_thresholds.get(difficulty, 120)
+    time_bonus = max(0, int(200 * (1 - min(time_seconds / threshold, 1))))
+
+    # Calculate final score
+    score = max(0, int(base_score + time_bonus))
+
+    # XP calculation
+    xp_multipliers = {
+        "easy": 50,
+        "medium": 75,
+        "hard": 100
+    }
+    base_xp = xp_multipliers.get(difficulty, 50)
+
+    # Perfect game bonus
+    perfect_bonus = 0
+    if bugs_found == bugs_total and false_positives == 0:
+        perfect_bonus = 50
+
+    # Speed bonus
+    speed_bonus = min(25, time_bonus // 4)
+
+    xp_earned = base_xp + perfect_bonus + speed_bonus
+
+    return score, xp_earned
+
+
+def grade_game(game: ActiveGame, found_bug_lines: list[int], time_seconds: float) -> GradedGame:
+    """
+    Grade a game in flight against its template's precomputed answer key.
+
+    Raises ValueError if the template no longer exists.
+    """
+    template = get_template_by_id(game.template_id)
+    answer_key = get_answer_key(game.template_id)
+
+    correct_bug_lines = answer_key.bug_lines
+    submitted_lines = set(found_bug_lines)
+
+    # Calculate results
+    found_correct = submitted_lines & correct_bug_lines
+    missed_bugs = correct_bug_lines - submitted_lines
+    false_positives = submitted_lines - correct_bug_lines
+
+    # Calculate score and XP
+    score, xp_earned = calculate_bug_hunt_score(
+        bugs_found=len(found_correct),
+        bugs_total=len(correct_bug_lines),
+        time_seconds=time_seconds,
+        false_positives=len(false_positives),
+        difficulty=template.difficulty
+    )
+
+    # Build detailed results (prebuilt per bug, plus false positives)
+    results = answer_key.results_for(submitted_lines)
+    results.extend(false_positive_result(line) for line in false_positives)
+
+    return GradedGame(
+        found_correct=found_correct,
+        missed_bugs=missed_bugs,
+        false_positives=false_positives,
+        bugs_total=len(correct_bug_lines),
+        score=score,
+        xp_earned=xp_earned,
+        accuracy=(len(found_correct) / len(correct_bug_lines)) * 100 if correct_bug_lines else 0,
+        is_perfect=len(found_correct) == len(correct_bug_lines) and not false_positives,
+        results=results,
+        template_xp=template.xp_reward
+    )
+
+
+async def record_finished_game(
+    db: AsyncSession,
+    game: ActiveGame,
+    graded: GradedGame,
+    time_seconds: float,
+    completed_at: datetime | None = None
+) -> BugHuntGame:
+    """
+    Write a graded game: stats, the finished row, XP, rollup and leaderboards.
+
+    The finished row is inserted with its final values and flushed together
+    with the stats update, then XP, rollup and leaderboard follow in the
+    same transaction. Not committed.
+    """
+    completed_at = completed_at or datetime.utcnow()
+
+    # Player and stats in one query
+    player = await player_service.get_player(db, game.player_id, with_stats=True)
+
+    # Update player stats
+    stats = player.stats if player else None
+    if not stats:
+        stats = PlayerStats(
+            player_id=game.player_id,
+            bug_hunt_games_played=1,
+            bug_hunt_wins=1 if graded.is_perfect else 0,
+            last_activity_date=completed_at
+        )
+        db.add(stats)
+    else:
+        stats.bug_hunt_games_played += 1
+        if graded.is_perfect:
+            stats.bug_hunt_wins += 1
+        stats.last_activity_date = completed_at
+
+    # The one row this game ever writes, already finished
+    game_row = BugHuntGame(
+        player_id=game.player_id,
+        template_id=game.template_id,
+        difficulty=game.difficulty,
+        bugs_total=graded.bugs_total,
+        bugs_found=len(graded.found_correct),
+        time_seconds=time_seconds,
+        score=graded.score,
+        xp_earned=graded.xp_earned,
+        found_bugs=list(graded.found_correct),
+        missed_bugs=list(graded.missed_bugs),
+        false_positives=list(graded.false_positives),
+        started_at=game.started_at,
+        completed_at=completed_at
+    )
+    db.add(game_row)
+    await db.flush()
+
+    # Update player XP (atomic, same transaction as the game)
+    if player:
+        await xp_service.award_xp(
+            player_id=player.id,
+            xp_amount=graded.xp_earned,
+            db=db,
+            reason=f"Bug Hunt game {game_row.id}",
+            commit=False
+        )
+
+    # Update per-player rollup (the finished game is flushed above)
+    await bug_hunt_stats_service.record_game(db, game_row, graded.is_perfect, graded.accuracy)
+
+    # Update materialized leaderboards (only if this is a new personal best)
+    if player:
+        await leaderboard_service.record_game(db, game_row, player.username)
+
+    event_service.publish(db, game.player_id, event_service.BUG_HUNT_COMPLETED, {
+        "game_id": game_row.id,
+        "template_id": game.template_id,
+        "difficulty": game.difficulty,
+        "score": graded.score,
+        "xp_earned": graded.xp_earned,
+        "bugs_found": len(graded.found_correct),
+        "bugs_total": graded.bugs_total,
+        "accuracy": graded.accuracy,
+        "is_perfect": graded.is_perfect
+    })
+
+    return game_row
@@ -0,0 +1,174 @@
+"""Bug Hunt stats service - Incremental per-player rollups for Bug Hunt statistics."""
+
+from collections.abc import Collection
+
+from app.models.minigame import BugHuntGame, BugHuntGameSummary, PlayerBugHuntRollup
+from app.schemas.minigame import PlayerBugHuntStatsResponse
+from sqlalchemy import Float, case, cast, delete, func, insert, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+ROLLUP_COLUMNS = (
+    "player_id",
+    "games_played",
+    "total_bugs_found",
+    "perfect_games",
+    "best_score",
+    "total_score",
+    "total_accuracy",
+    "total_xp_earned",
+    "easy_games",
+    "medium_games",
+    "hard_games",
+)
+
+
+# Per-game accuracy (%) and perfect flag, as SQL over bug_hunt_games
+GAME_ACCURACY = case(
+    (BugHuntGame.bugs_total > 0, cast(BugHuntGame.bugs_found, Float) * 100 / BugHuntGame.bugs_total),
+    else_=0.0
+)
+GAME_IS_PERFECT = (BugHuntGame.bugs_found == BugHuntGame.bugs_total) & (
+    BugHuntGame.false_positives.is_(None) | (func.json_array_length(BugHuntGame.false_positives) == 0)
+)
+
+
+def _history_aggregate(player_id: int):
+    """
+    One aggregate query over a player's submitted games and archived summaries.
+
+    Produces the same columns as the rollup table (ROLLUP_COLUMNS order),
+    so it serves both as the fallback read and to seed a missing rollup.
+    """
+    games = select(
+        literal(1).label("games"),
+        BugHuntGame.bugs_found.label("bugs_found"),
+        case((GAME_IS_PERFECT, 1), else_=0).label("perfect"),
+        BugHuntGame.score.label("best_score"),
+        BugHuntGame.score.label("score"),
+        GAME_ACCURACY.label("accuracy"),
+        BugHuntGame.xp_earned.label("xp_earned"),
+        BugHuntGame.difficulty.label("difficulty"),
+    ).where(
+        BugHuntGame.player_id == player_id,
+        BugHuntGame.found_bugs.is_not(None)  # Submitted games only
+    )
+    archived = select(
+        BugHuntGameSummary.games_played,
+        BugHuntGameSummary.total_bugs_found,
+        BugHuntGameSummary.perfect_games,
+        BugHuntGameSummary.best_score,
+        BugHuntGameSummary.total_score,
+        BugHuntGameSummary.total_accuracy,
+        BugHuntGameSummary.total_xp_earned,
+        BugHuntGameSummary.difficulty,
+    ).where(BugHuntGameSummary.player_id == player_id)
+    history = union_all(games, archived).subquery()
+
+    return select(
+        literal(player_id).label("player_id"),
+        func.coalesce(func.sum(history.c.games), 0).label("games_played"),
+        func.coalesce(func.sum(history.c.bugs_found), 0).label("total_bugs_found"),
+        func.coalesce(func.sum(history.c.perfect), 0).label("perfect_games"),
+        func.coalesce(func.max(history.c.best_score), 0).label("best_score"),
+        func.coalesce(func.sum(history.c.score), 0).label("total_score"),
+        func.coalesce(func.sum(history.c.accuracy), 0.0).label("total_accuracy"),
+        func.coalesce(func.sum(history.c.xp_earned), 0).label("total_xp_earned"),
+        *[
+            func.coalesce(func.sum(case((history.c.difficulty == difficulty, history.c.games), else_=0)), 0)
+            .label(f"{difficulty}_games")
+            for difficulty in DIFFICULTIES
+        ],
+    )
+
+
+async def record_game(
+    db: AsyncSession,
+    game: BugHuntGame,
+    is_perfect: bool,
+    accuracy: float
+) -> None:
+    """
+    Add a finished game to the player's rollup.
+
+    Normally a single UPDATE of one row. The first time a player submits,
+    the rollup is seeded from their history (which includes this game,
+    so `game` must already be flushed).
+    """
+    increments = {
+        "games_played": PlayerBugHuntRollup.games_played + 1,
+        "total_bugs_found": PlayerBugHuntRollup.total_bugs_found + game.bugs_found,
+        "perfect_games": PlayerBugHuntRollup.perfect_games + (1 if is_perfect else 0),
+        "best_score": func.max(PlayerBugHuntRollup.best_score, game.score),
+        "total_score": PlayerBugHuntRollup.total_score + game.score,
+        "total_accuracy": PlayerBugHuntRollup.total_accuracy + accuracy,
+        "total_xp_earned": PlayerBugHuntRollup.total_xp_earned + game.xp_earned,
+    }
+    if game.difficulty in DIFFICULTIES:
+        difficulty_column = f"{game.difficulty}_games"
+        increments[difficulty_column] = getattr(PlayerBugHuntRollup, difficulty_column) + 1
+
+    result = await db.execute(
+        update(PlayerBugHuntRollup)
+        .where(PlayerBugHuntRollup.player_id == game.player_id)
+        .values(**increments)
+    )
+
+    if result.rowcount == 0:
+        await db.execute(
+            insert(PlayerBugHuntRollup).from_select(ROLLUP_COLUMNS, _history_aggregate(game.player_id))
+        )
+
+
+def _to_response(totals) -> PlayerBugHuntStatsResponse:
+    """Build the stats response from rollup totals (row or aggregate)."""
+    games = totals.games_played
+    if not games:
+        return PlayerBugHuntStatsResponse(
+            total_games_played=0,
+            total_bugs_found=0,
+            total_perfect_games=0,
+            best_score=0,
+            average_score=0.0,
+            average_accuracy=0.0,
+            favorite_difficulty=None,
+            total_xp_earned=0
+        )
+
+    # Most played difficulty (ties go to the easier one)
+    difficulty_counts = {d: getattr(totals, f"{d}_games") for d in DIFFICULTIES}
+    favorite_difficulty = max(difficulty_counts, key=difficulty_counts.get)
+
+    return PlayerBugHuntStatsResponse(
+        total_games_played=games,
+        total_bugs_found=totals.total_bugs_found,
+        total_perfect_games=totals.perfect_games,
+        best_score=totals.best_score,
+        average_score=totals.total_score / games,
+        average_accuracy=totals.total_accuracy / games,
+        favorite_difficulty=favorite_difficulty,
+        total_xp_earned=totals.total_xp_earned
+    )
+
+
+async def get_player_stats(db: AsyncSession, player_id: int) -> PlayerBugHuntStatsResponse:
+    """
+    Get a player's Bug Hunt stats.
+
+    Reads the rollup row (O(1)); players without one yet (e.g. history
+    recorded before rollups existed) fall back to one aggregate query.
+    """
+    rollup = await db.scalar(
+        select(PlayerBugHuntRollup).where(PlayerBugHuntRollup.player_id == player_id)
+    )
+    if rollup is None:
+        rollup = (await db.execute(_history_aggregate(player_id))).one()
+
+    return _to_response(rollup)
+
+
+async def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Remove players' rollups and archived game summaries."""
+    await db.execute(delete(PlayerBugHuntRollup).where(PlayerBugHuntRollup.player_id.in_(player_ids)))
+    await db.execute(delete(BugHuntGameSummary).where(BugHuntGameSummary.player_id.in_(player_ids)))
@@ -0,0 +1,130 @@
+"""Catalog service - Prebuilt, compressed payloads for static catalog endpoints."""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+from app.responses import dumps
+from app.schemas.achievement import AvailableAchievementsResponse
+from app.schemas.progress import ClassInfoResponse, ModuleInfoResponse
+from app.services import achievement_service, content_service
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Catalog content only changes with a deploy, and the ETag changes with it
+CACHE_CONTROL = "public, max-age=86400"
+
+
+# Suffix of each encoding's ETag: each body is its own representation, with its own strong validator
+_ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+@dataclass(frozen=True)
+class StaticPayload:
+    """A serialized response body with its compressed variants and their ETags."""
+    body: bytes
+    digest: str  # Of the identity body
+    encoded: dict[str, bytes]  # Content-Encoding -> body, only when smaller than identity
+
+    def etag(self, encoding: str | None = None) -> str:
+        """Strong ETag of the identity body, or of its `encoding` variant."""
+        return f'"{self.digest}{_ETAG_SUFFIXES.get(encoding, "")}"'
+
+    @property
+    def etags(self) -> set[str]:
+        return {self.etag(), *(self.etag(encoding) for encoding in self.encoded)}
+
+
+def build_payload(content: Any) -> StaticPayload:
+    """Serialize `content` once and precompute its gzip/brotli variants."""
+    body = dumps(content)
+
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+
+    return StaticPayload(
+        body=body,
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        encoded={name: data for name, data in encoded.items() if len(data) < len(body)}
+    )
+
+
+def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Encodings named in Accept-Encoding, minus those refused with q=0."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        key, _, value = params.partition("=")
+        if key.strip() == "q":
+            try:
+                if float(value) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def serve(request: Request, payload: StaticPayload) -> Response:
+    """Serve a prebuilt payload in the best accepted encoding, or 304 if any of its ETags matches."""
+    accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+    encoding = next(
+        (name for name in ("br", "gzip") if name in payload.encoded and (name in accepted or "*" in accepted)),
+        None
+    )
+    headers = {"ETag": payload.etag(encoding), "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Any encoding's tag: the content is the same, only the body's encoding differs
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in candidates or candidates & payload.etags:
+            return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded[encoding], media_type="application/json", headers=headers)
+
+
+def _module_info_response(module: content_service.ModuleInfo) -> ModuleInfoResponse:
+    return ModuleInfoResponse(
+        module_number=module.module_number,
+        title=module.title,
+        description=module.description,
+        total_classes=len(module.classes),
+        classes=[
+            ClassInfoResponse(
+                class_number=c.class_number,
+                title=c.title,
+                description=c.description,
+                exercises_count=c.exercises_count,
+                xp_reward=c.xp_reward
+            )
+            for c in module.classes
+        ]
+    )
+
+
+def _build_catalog() -> tuple[StaticPayload, dict[int, StaticPayload], StaticPayload]:
+    modules = [_module_info_response(module) for module in content_service.get_all_modules()]
+    definitions = achievement_service.get_all_achievement_definitions()
+
+    return (
+        build_payload(modules),
+        {module.module_number: build_payload(module) for module in modules},
+        build_payload(AvailableAchievementsResponse(
+            total_achievements=len(definitions),
+            achievements=definitions
+        ))
+    )
+
+
+# Built once at import (application startup)
+MODULES, MODULES_BY_NUMBER, ACHIEVEMENTS = _build_catalog()
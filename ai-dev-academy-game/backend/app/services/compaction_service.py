@@ -0,0 +1,189 @@
+"""Compaction service - Retention, archiving and incremental vacuum for bug_hunt_games."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.models.minigame import BugHuntDailyBest, BugHuntGame, BugHuntGameSummary, BugHuntLeaderboard
+from app.services import leaderboard_service
+from app.services.bug_hunt_stats_service import GAME_ACCURACY, GAME_IS_PERFECT
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Free pages handed back to the filesystem per run (4 KiB pages: up to 8 MiB)
+VACUUM_PAGES_PER_RUN = 2000
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class CompactionReport:
+    """What one compaction run did."""
+    abandoned_deleted: int = 0
+    games_archived: int = 0
+    buckets_pruned: int = 0
+    pages_vacuumed: int = 0
+
+
+def delete_abandoned_batch(db: Session, started_before: datetime, batch_size: int) -> int:
+    """
+    Delete up to `batch_size` games that were started but never submitted.
+
+    Only databases from before the in-memory session store have such rows.
+    Committed per batch. Returns rows deleted.
+    """
+    batch = (
+        select(BugHuntGame.id)
+        .where(BugHuntGame.found_bugs.is_(None), BugHuntGame.started_at < started_before)
+        .limit(batch_size)
+    )
+    result = db.execute(delete(BugHuntGame).where(BugHuntGame.id.in_(batch.scalar_subquery())))
+    db.commit()
+    return result.rowcount
+
+
+def archive_batch(db: Session, completed_before: datetime, batch_size: int) -> int:
+    """
+    Fold up to `batch_size` old submitted games into per-player, per-template summaries.
+
+    The batch is summed with one INSERT ... SELECT ... GROUP BY that adds
+    onto existing summary rows, then deleted, in one transaction. Games a
+    leaderboard or daily bucket points at (personal bests) are kept, so
+    rebuild_leaderboard still finds every best. Returns games archived.
+    """
+    referenced = (
+        select(BugHuntLeaderboard.game_id).where(BugHuntLeaderboard.game_id.is_not(None))
+        .union(select(BugHuntDailyBest.game_id).where(BugHuntDailyBest.game_id.is_not(None)))
+    )
+    ids = db.scalars(
+        select(BugHuntGame.id)
+        .where(
+            BugHuntGame.found_bugs.is_not(None),
+            BugHuntGame.completed_at < completed_before,
+            BugHuntGame.id.not_in(referenced)
+        )
+        .order_by(BugHuntGame.id)
+        .limit(batch_size)
+    ).all()
+    if not ids:
+        return 0
+
+    totals = (
+        select(
+            BugHuntGame.player_id,
+            BugHuntGame.template_id,
+            func.max(BugHuntGame.difficulty),
+            func.count(),
+            func.sum(BugHuntGame.bugs_found),
+            func.sum(case((GAME_IS_PERFECT, 1), else_=0)),
+            func.max(BugHuntGame.score),
+            func.sum(BugHuntGame.score),
+            func.sum(GAME_ACCURACY),
+            func.sum(BugHuntGame.time_seconds),
+            func.sum(BugHuntGame.xp_earned),
+            func.min(BugHuntGame.completed_at),
+            func.max(BugHuntGame.completed_at),
+        )
+        .where(BugHuntGame.id.in_(ids))  # A WHERE also lets SQLite parse ON CONFLICT after a SELECT
+        .group_by(BugHuntGame.player_id, BugHuntGame.template_id)
+    )
+    insert = sqlite_insert(BugHuntGameSummary).from_select(
+        [
+            "player_id", "template_id", "difficulty", "games_played", "total_bugs_found", "perfect_games",
+            "best_score", "total_score", "total_accuracy", "total_time_seconds", "total_xp_earned",
+            "first_completed_at", "last_completed_at",
+        ],
+        totals
+    )
+    added = insert.excluded
+    db.execute(insert.on_conflict_do_update(
+        index_elements=["player_id", "template_id"],
+        set_={
+            "games_played": BugHuntGameSummary.games_played + added.games_played,
+            "total_bugs_found": BugHuntGameSummary.total_bugs_found + added.total_bugs_found,
+            "perfect_games": BugHuntGameSummary.perfect_games + added.perfect_games,
+            "best_score": func.max(BugHuntGameSummary.best_score, added.best_score),
+            "total_score": BugHuntGameSummary.total_score + added.total_score,
+            "total_accuracy": BugHuntGameSummary.total_accuracy + added.total_accuracy,
+            "total_time_seconds": BugHuntGameSummary.total_time_seconds + added.total_time_seconds,
+            "total_xp_earned": BugHuntGameSummary.total_xp_earned + added.total_xp_earned,
+            "first_completed_at": func.min(BugHuntGameSummary.first_completed_at, added.first_completed_at),
+            "last_completed_at": func.max(BugHuntGameSummary.last_completed_at, added.last_completed_at),
+        }
+    ))
+    db.execute(delete(BugHuntGame).where(BugHuntGame.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def incremental_vacuum(db: Session, max_pages: int = VACUUM_PAGES_PER_RUN) -> int:
+    """
+    Return up to `max_pages` free pages to the filesystem. Returns pages freed.
+
+    Needs auto_vacuum=INCREMENTAL, which init_db sets on new databases
+    (an existing file switches after one manual VACUUM); a no-op otherwise.
+    """
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != _AUTO_VACUUM_INCREMENTAL:
+        return 0
+    free_before = db.execute(text("PRAGMA freelist_count")).scalar()
+    # The pragma frees one page per step and execute() only steps once; executescript() runs it to completion
+    db.connection().connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+    db.commit()
+    return free_before - db.execute(text("PRAGMA freelist_count")).scalar()
+
+
+def run_compaction(db: Session, now: datetime | None = None) -> CompactionReport:
+    """
+    One bounded compaction run.
+
+    Deletes abandoned games, archives games older than
+    BUG_HUNT_RETENTION_DAYS, prunes expired daily leaderboard buckets and
+    runs an incremental vacuum. Each batch is its own short transaction,
+    and at most BUG_HUNT_COMPACTION_MAX_BATCHES batches run per step, so a
+    large backlog is worked off over several runs without holding the
+    write lock for long.
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    batch_size = settings.BUG_HUNT_COMPACTION_BATCH_SIZE
+    report = CompactionReport()
+
+    def in_batches(step: Callable[[], int]) -> int:
+        total = 0
+        for _ in range(settings.BUG_HUNT_COMPACTION_MAX_BATCHES):
+            done = step()
+            total += done
+            if done < batch_size:
+                break
+        return total
+
+    report.abandoned_deleted = in_batches(lambda: delete_abandoned_batch(
+        db, now - timedelta(hours=settings.BUG_HUNT_ABANDONED_HOURS), batch_size
+    ))
+    report.games_archived = in_batches(lambda: archive_batch(
+        db, now - timedelta(days=settings.BUG_HUNT_RETENTION_DAYS), batch_size
+    ))
+    report.buckets_pruned = leaderboard_service.prune_daily_buckets(db)
+    report.pages_vacuumed = incremental_vacuum(db)
+    return report
+
+
+async def run_periodically(session_factory: Callable[[], Session], interval_seconds: float) -> None:
+    """Run compaction every `interval_seconds` in a worker thread, until cancelled."""
+    def run_once() -> CompactionReport:
+        with session_factory() as db:
+            return run_compaction(db)
+
+    while True:
+        try:
+            report = await asyncio.to_thread(run_once)
+            logger.info("Bug Hunt compaction: %s", report)
+        except Exception:
+            logger.exception("Bug Hunt compaction failed")
+        await asyncio.sleep(interval_seconds)
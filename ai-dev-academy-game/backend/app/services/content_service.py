@@ -1,5 +1,7 @@
 """Content service - Manages curriculum structure and content."""
 
+import hashlib
+from collections.abc import Iterable
 from dataclasses import dataclass
 
 
@@ -120,6 +122,69 @@ CURRICULUM: dict[int, ModuleInfo] = {
 }
 
 
+# Compiled curriculum index
+# Built once at import: every class gets a dense integer id in curriculum
+# order (module, then class), so lookups are a dict hit and a player's
+# completed classes fit in one int bitmask (bit `class_id` set = completed).
+
+
+@dataclass(frozen=True)
+class CompiledClass:
+    """A class in the flat curriculum table."""
+    class_id: int
+    module_number: int
+    info: ClassInfo
+    prerequisite_mask: int  # Bits that must all be completed to unlock this class
+
+
+def _compile_curriculum() -> tuple[tuple[CompiledClass, ...], dict[tuple[int, int], CompiledClass], dict[int, int]]:
+    """
+    Flatten CURRICULUM into (class table, (module, class) index, module masks).
+
+    Prerequisite rules:
+    - Module 0 Class 0: Always unlockable (starting point)
+    - Other classes in same module: Previous class must be completed
+    - First class of new module: All classes in previous module must be completed
+    """
+    keys = [
+        (module_number, class_info)
+        for module_number in sorted(CURRICULUM.keys())
+        for class_info in CURRICULUM[module_number].classes
+    ]
+    ids = {(module_number, class_info.class_number): class_id
+           for class_id, (module_number, class_info) in enumerate(keys)}
+
+    module_masks: dict[int, int] = {}
+    for (module_number, _), class_id in ids.items():
+        module_masks[module_number] = module_masks.get(module_number, 0) | (1 << class_id)
+
+    # A bit no completion mask can contain: marks classes that can never unlock
+    unreachable = 1 << len(keys)
+
+    table = []
+    for class_id, (module_number, class_info) in enumerate(keys):
+        if module_number == 0 and class_info.class_number == 0:
+            prerequisite_mask = 0
+        elif class_info.class_number > 0:
+            prev_id = ids.get((module_number, class_info.class_number - 1))
+            prerequisite_mask = unreachable if prev_id is None else 1 << prev_id
+        else:
+            prerequisite_mask = module_masks.get(module_number - 1, unreachable)
+        table.append(CompiledClass(class_id, module_number, class_info, prerequisite_mask))
+
+    index = {(entry.module_number, entry.info.class_number): entry for entry in table}
+    return tuple(table), index, module_masks
+
+
+CLASS_TABLE, _CLASS_INDEX, MODULE_MASKS = _compile_curriculum()
+# Identifies the class id assignment; data keyed by class id is stale if it changes
+CURRICULUM_LAYOUT = hashlib.sha1(
+    repr([(entry.module_number, entry.info.class_number) for entry in CLASS_TABLE]).encode()
+).hexdigest()[:12]
+ALL_CLASSES_MASK = (1 << len(CLASS_TABLE)) - 1
+_TOTAL_XP = sum(entry.info.xp_reward for entry in CLASS_TABLE)
+
+
 def get_module_info(module_number: int) -> ModuleInfo | None:
     """Get information about a specific module."""
     return CURRICULUM.get(module_number)
@@ -127,15 +192,19 @@ def get_module_info(module_number: int) -> ModuleInfo | None:
 
 def get_class_info(module_number: int, class_number: int) -> ClassInfo | None:
     """Get information about a specific class."""
-    module = CURRICULUM.get(module_number)
-    if not module:
-        return None
+    entry = _CLASS_INDEX.get((module_number, class_number))
+    return entry.info if entry else None
+
 
-    for class_info in module.classes:
-        if class_info.class_number == class_number:
-            return class_info
+def get_class_id(module_number: int, class_number: int) -> int | None:
+    """Get the dense class id (bit position in completion masks) of a class."""
+    entry = _CLASS_INDEX.get((module_number, class_number))
+    return entry.class_id if entry else None
 
-    return None
+
+def get_class_entry(module_number: int, class_number: int) -> CompiledClass | None:
+    """Get a class's compiled table entry (id, info and prerequisite mask)."""
+    return _CLASS_INDEX.get((module_number, class_number))
 
 
 def get_all_modules() -> list[ModuleInfo]:
@@ -145,22 +214,34 @@ def get_all_modules() -> list[ModuleInfo]:
 
 def get_total_classes() -> int:
     """Get total number of classes across all modules."""
-    return sum(len(module.classes) for module in CURRICULUM.values())
+    return len(CLASS_TABLE)
 
 
 def get_total_xp() -> int:
     """Get total XP available across all classes."""
-    total = 0
-    for module in CURRICULUM.values():
-        for class_info in module.classes:
-            total += class_info.xp_reward
-    return total
+    return _TOTAL_XP
+
+
+def completed_mask(completed_classes: Iterable[tuple[int, int]]) -> int:
+    """Build a completion bitmask from (module_number, class_number) pairs (unknown classes are ignored)."""
+    mask = 0
+    for module_number, class_number in completed_classes:
+        entry = _CLASS_INDEX.get((module_number, class_number))
+        if entry:
+            mask |= 1 << entry.class_id
+    return mask
+
+
+def _as_mask(completed_classes: int | Iterable[tuple[int, int]]) -> int:
+    if isinstance(completed_classes, int):
+        return completed_classes
+    return completed_mask(completed_classes)
 
 
 def is_class_unlockable(
     module_number: int,
     class_number: int,
-    completed_classes: list[tuple]  # List of (module_number, class_number) tuples
+    completed_classes: int | Iterable[tuple[int, int]]  # Bitmask or (module_number, class_number) pairs
 ) -> bool:
     """
     Check if a class can be unlocked based on prerequisites.
@@ -170,54 +251,28 @@ def is_class_unlockable(
     - Other classes in same module: Previous class must be completed
     - First class of new module: All classes in previous module must be completed
     """
-    # Module 0 Class 0 is always unlockable
-    if module_number == 0 and class_number == 0:
-        return True
-
-    class_info = get_class_info(module_number, class_number)
-    if not class_info:
+    entry = _CLASS_INDEX.get((module_number, class_number))
+    if not entry:
         return False
-
-    # Check if previous class in same module is completed
-    if class_number > 0:
-        prev_class = (module_number, class_number - 1)
-        return prev_class in completed_classes
-
-    # First class of a new module (class_number == 0, module_number > 0)
-    # Requires all classes of previous module to be completed
-    if module_number > 0:
-        prev_module = CURRICULUM.get(module_number - 1)
-        if not prev_module:
-            return False
-
-        # Check all classes in previous module are completed
-        for prev_class_info in prev_module.classes:
-            if (module_number - 1, prev_class_info.class_number) not in completed_classes:
-                return False
-
-        return True
-
-    return False
+    return entry.prerequisite_mask & ~_as_mask(completed_classes) == 0
 
 
 def get_next_unlockable_class(
-    completed_classes: list[tuple]
+    completed_classes: int | Iterable[tuple[int, int]]  # Bitmask or (module_number, class_number) pairs
 ) -> tuple | None:
     """
     Get the next class that can be unlocked.
 
     Returns (module_number, class_number) or None if curriculum is complete.
     """
-    for module_number in sorted(CURRICULUM.keys()):
-        module = CURRICULUM[module_number]
-        for class_info in module.classes:
-            class_tuple = (module_number, class_info.class_number)
-            # Skip if already completed
-            if class_tuple in completed_classes:
-                continue
-            # Check if unlockable
-            if is_class_unlockable(module_number, class_info.class_number, completed_classes):
-                return class_tuple
+    mask = _as_mask(completed_classes)
+    remaining = ALL_CLASSES_MASK & ~mask
+    while remaining:
+        lowest = remaining & -remaining
+        entry = CLASS_TABLE[lowest.bit_length() - 1]
+        if entry.prerequisite_mask & ~mask == 0:
+            return (entry.module_number, entry.info.class_number)
+        remaining ^= lowest
 
     return None  # Curriculum complete!
 
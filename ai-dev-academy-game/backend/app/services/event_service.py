@@ -0,0 +1,153 @@
+"""Event service - In-process pub/sub hub for pushing player events over Server-Sent Events."""
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.config import get_settings
+from app.database import on_commit
+from app.metrics import EVENT_SUBSCRIBERS, EVENTS_DROPPED
+from app.responses import dumps
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Event types
+ACHIEVEMENT_UNLOCKED = "achievement_unlocked"
+XP_AWARDED = "xp_awarded"
+LEVEL_UP = "level_up"
+BUG_HUNT_COMPLETED = "bug_hunt_completed"
+DROPPED = "dropped"  # Last event a slow consumer gets: reconnect and refetch state
+
+RECONNECT_MILLISECONDS = 3000
+
+_event_ids = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Event:
+    """One event for one player, with an id unique within this process."""
+    type: str
+    data: dict
+    id: int = field(default_factory=lambda: next(_event_ids))
+
+    def encode(self) -> str:
+        """The event in `text/event-stream` format."""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {dumps(self.data).decode()}\n\n"
+
+
+class Subscription:
+    """
+    One connection's bounded queue of events for a player.
+
+    Publishing never waits: when the queue is full the subscription is
+    dropped (queue cleared, a DROPPED event queued) instead of buffering
+    without bound or slowing down the writer.
+    """
+
+    def __init__(self, player_id: int, max_size: int):
+        self.player_id = player_id
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(max_size + 1)  # Room for DROPPED
+        self.max_size = max_size
+        self.loop = asyncio.get_running_loop()
+        self.dropped = False
+
+    def push(self, event: Event) -> None:
+        """Queue an event (call on the subscription's event loop)."""
+        if self.dropped:
+            return
+        if self.queue.qsize() >= self.max_size:
+            self.dropped = True
+            EVENTS_DROPPED.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(DROPPED, {"reason": "slow consumer"}))
+            unsubscribe(self)
+            return
+        self.queue.put_nowait(event)
+
+
+# player_id -> open subscriptions
+_subscribers: dict[int, set[Subscription]] = {}
+
+
+def reset() -> None:
+    """Forget every subscription."""
+    _subscribers.clear()
+    EVENT_SUBSCRIBERS.values.clear()
+
+
+def subscribe(player_id: int) -> Subscription:
+    """Open a subscription to a player's events (call from the consumer's event loop)."""
+    subscription = Subscription(player_id, get_settings().EVENT_QUEUE_SIZE)
+    _subscribers.setdefault(player_id, set()).add(subscription)
+    EVENT_SUBSCRIBERS.inc()
+    return subscription
+
+
+def unsubscribe(subscription: Subscription) -> None:
+    """Close a subscription (idempotent)."""
+    subscriptions = _subscribers.get(subscription.player_id)
+    if subscriptions is None or subscription not in subscriptions:
+        return
+    subscriptions.discard(subscription)
+    if not subscriptions:
+        del _subscribers[subscription.player_id]
+    EVENT_SUBSCRIBERS.dec()
+
+
+def subscriber_count(player_id: int) -> int:
+    return len(_subscribers.get(player_id, ()))
+
+
+def _deliver(player_id: int, event_type: str, data: dict[str, Any]) -> None:
+    if player_id not in _subscribers:
+        return
+    event = Event(event_type, dict(data))  # Encoded per stream with app.responses.dumps
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    for subscription in list(_subscribers.get(player_id, ())):
+        if subscription.loop is running:
+            subscription.push(event)
+            continue
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.push, event)
+        except RuntimeError:  # Its event loop is gone
+            unsubscribe(subscription)
+
+
+def publish(db: AsyncSession, player_id: int, event_type: str, data: dict[str, Any]) -> None:
+    """
+    Push an event to the player's subscribers once `db` commits.
+
+    Nothing is sent for a transaction that rolls back. The payload is
+    only encoded if someone is listening at commit time.
+    """
+    on_commit(db, lambda: _deliver(player_id, event_type, data))
+
+
+async def stream(player_id: int) -> AsyncIterator[str]:
+    """
+    A player's events in `text/event-stream` format, until the client goes away.
+
+    Subscribes when iteration starts (the first chunk is the reconnect
+    delay) and always unsubscribes. Sends a keep-alive comment when idle,
+    so proxies keep the connection open, and ends after a DROPPED event.
+    """
+    heartbeat = get_settings().EVENT_HEARTBEAT_SECONDS
+    subscription = subscribe(player_id)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield event.encode()
+            if event.type == DROPPED:
+                return
+    finally:
+        unsubscribe(subscription)
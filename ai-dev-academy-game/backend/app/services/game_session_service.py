@@ -0,0 +1,119 @@
+"""Game session service - In-process TTL store for Bug Hunt games in flight."""
+
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from app.config import get_settings
+
+# Session ids stay exactly representable in JavaScript numbers
+_MAX_SESSION_ID = 2**53 - 1
+
+
+@dataclass
+class ActiveGame:
+    """A started, not yet submitted Bug Hunt game."""
+    session_id: int
+    player_id: int
+    template_id: str
+    difficulty: str
+    started_at: datetime
+    expires_at: float  # Unix time
+
+
+# session_id -> ActiveGame, oldest first (one TTL for all, so also soonest to expire first)
+_sessions: OrderedDict[int, ActiveGame] = OrderedDict()
+
+
+def reset() -> None:
+    """Drop every game in flight."""
+    _sessions.clear()
+
+
+def purge_expired(now: float | None = None) -> int:
+    """Drop expired games from the front of the store. Returns how many were dropped."""
+    now = time.time() if now is None else now
+    purged = 0
+    while _sessions:
+        game = next(iter(_sessions.values()))
+        if game.expires_at > now:
+            break
+        _sessions.popitem(last=False)
+        purged += 1
+    return purged
+
+
+def start_game(player_id: int, template_id: str, difficulty: str, started_at: datetime) -> ActiveGame:
+    """Register a new game in flight (nothing is written to the database)."""
+    purge_expired()
+
+    session_id = secrets.randbelow(_MAX_SESSION_ID) + 1
+    while session_id in _sessions:
+        session_id = secrets.randbelow(_MAX_SESSION_ID) + 1
+
+    game = ActiveGame(
+        session_id=session_id,
+        player_id=player_id,
+        template_id=template_id,
+        difficulty=difficulty,
+        started_at=started_at,
+        expires_at=time.time() + get_settings().BUG_HUNT_SESSION_TTL_SECONDS
+    )
+    _sessions[session_id] = game
+    return game
+
+
+def get_game(session_id: int) -> ActiveGame | None:
+    """Get a game in flight (None if unknown or expired)."""
+    game = _sessions.get(session_id)
+    if game is not None and game.expires_at <= time.time():
+        del _sessions[session_id]
+        return None
+    return game
+
+
+def finish_game(session_id: int) -> ActiveGame | None:
+    """Remove a game from the store, so it can only be submitted once."""
+    return _sessions.pop(session_id, None)
+
+
+def restore_game(game: ActiveGame) -> None:
+    """Put a finished game back (its submit failed before commit)."""
+    _sessions[game.session_id] = game
+
+
+def save(path: str) -> int:
+    """Write unexpired games to `path` (JSON). Returns how many were saved."""
+    purge_expired()
+    games = [
+        {**asdict(game), "started_at": game.started_at.isoformat()}
+        for game in _sessions.values()
+    ]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(games, f)
+    os.replace(tmp_path, path)
+    return len(games)
+
+
+def load(path: str) -> int:
+    """Load games saved by save(), skipping expired ones. Returns how many were loaded."""
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, encoding="utf-8") as f:
+        games = json.load(f)
+
+    now = time.time()
+    loaded = 0
+    for data in sorted(games, key=lambda g: g["expires_at"]):
+        if data["expires_at"] <= now:
+            continue
+        data["started_at"] = datetime.fromisoformat(data["started_at"])
+        _sessions[data["session_id"]] = ActiveGame(**data)
+        loaded += 1
+    return loaded
@@ -0,0 +1,401 @@
+"""Leaderboard service - Materialized Bug Hunt leaderboards (all-time and rolling) with top-K caches."""
+
+import bisect
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from app.database import on_commit
+from app.models.minigame import BugHuntDailyBest, BugHuntGame, BugHuntLeaderboard
+from app.models.player import Player
+from app.services import rank_service
+from sqlalchemy import Integer, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+GLOBAL_BOARD = "all"
+DIFFICULTY_BOARDS = ("easy", "medium", "hard")
+
+# Largest page the leaderboard endpoint serves - the cache keeps this many rows per board
+TOP_K = 100
+
+# Rolling periods -> UTC days merged from the daily buckets (today included)
+ALL_TIME = "all"
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30}
+BUCKET_RETENTION_DAYS = max(PERIOD_DAYS.values())
+
+
+@dataclass
+class CachedBoard:
+    """Top-K entries of one board (best first) plus its total player count."""
+    entries: list[dict]
+    total: int
+
+
+@dataclass
+class CachedWindow:
+    """Top-K entries of one board over a rolling period, for one UTC day."""
+    day: int
+    entries: list[dict]
+    members: set[int] = field(default_factory=set)  # Every player with a game in the window
+
+    @property
+    def total(self) -> int:
+        return len(self.members)
+
+
+# In-process caches (filled lazily, kept in sync on commit):
+# board -> CachedBoard, and (board, period) -> CachedWindow for the current day
+_cache: dict[str, CachedBoard] = {}
+_window_cache: dict[tuple[str, str], CachedWindow] = {}
+
+# Writes applied per board / window key, and cache resets. A load that ran
+# while either moved may predate the write, so it is served but not cached.
+_versions: dict[str | tuple[str, str], int] = {}
+_generation = 0
+
+
+def utc_day(value: datetime | None = None) -> int:
+    """UTC calendar day (`date.toordinal()`) of a naive UTC datetime, default now."""
+    return (value or datetime.utcnow()).date().toordinal()
+
+
+def _sql_day(column):
+    """SQL equivalent of utc_day() for a stored datetime column."""
+    return cast(func.julianday(func.date(column)) - 1721424.5, Integer)
+
+
+def _sort_key(entry: dict) -> tuple:
+    """Higher score first; on ties, whoever got there first."""
+    return (-entry["score"], entry["completed_at"])
+
+
+def reset_cache() -> None:
+    """Drop every cached board (next read reloads from the table)."""
+    global _generation
+    _generation += 1
+    _cache.clear()
+    _window_cache.clear()
+    _versions.clear()
+
+
+def _version(key: str | tuple[str, str]) -> tuple[int, int]:
+    return _generation, _versions.get(key, 0)
+
+
+def _bump(key: str | tuple[str, str]) -> None:
+    _versions[key] = _versions.get(key, 0) + 1
+
+
+def invalidate() -> None:
+    """Invalidate cached boards after usernames change or players are removed."""
+    reset_cache()
+
+
+def _apply_entry(board: str, entry: dict, is_new_player: bool) -> None:
+    """Merge an improved best score into a cached board in place, if it beats the player's listed one."""
+    _bump(board)
+    cached = _cache.get(board)
+    if cached is None:
+        return  # Cold board: next read loads it from the table
+
+    listed = next((e for e in cached.entries if e["player_id"] == entry["player_id"]), None)
+    if listed is not None and _sort_key(listed) <= _sort_key(entry):
+        return  # A concurrent submit already listed a better (or earlier equal) game
+
+    if is_new_player and listed is None:
+        cached.total += 1
+
+    entries = [e for e in cached.entries if e is not listed]
+    if listed is not None or len(entries) < TOP_K or _sort_key(entry) < _sort_key(entries[-1]):
+        bisect.insort(entries, entry, key=_sort_key)
+        del entries[TOP_K:]
+
+    cached.entries = entries
+
+
+def _apply_window_entry(key: tuple[str, str], day: int, entry: dict) -> None:
+    """Merge a new game into a cached rolling board, if it is the player's best in the window."""
+    _bump(key)
+    cached = _window_cache.get(key)
+    if cached is None or cached.day != day:
+        return  # Cold, or the day rolled over: next read reloads
+
+    cached.members.add(entry["player_id"])
+    listed = next((e for e in cached.entries if e["player_id"] == entry["player_id"]), None)
+    if listed is not None and _sort_key(listed) <= _sort_key(entry):
+        return  # Already listed with a better (or earlier equal) game
+
+    entries = [e for e in cached.entries if e is not listed]
+    if listed is not None or len(entries) < TOP_K or _sort_key(entry) < _sort_key(entries[-1]):
+        bisect.insort(entries, entry, key=_sort_key)
+        del entries[TOP_K:]
+
+    cached.entries = entries
+
+
+async def record_game(db: AsyncSession, game: BugHuntGame, username: str) -> None:
+    """
+    Record a finished game on the global and difficulty boards.
+
+    All-time boards are only written when the game beats the player's best
+    score; the day's buckets get one upsert for both boards. Caches are
+    updated after the caller commits.
+    """
+    boards = (GLOBAL_BOARD, game.difficulty)
+    day = utc_day(game.completed_at)
+
+    result = await db.execute(
+        select(BugHuntLeaderboard.board, BugHuntLeaderboard.score).where(
+            BugHuntLeaderboard.player_id == game.player_id,
+            BugHuntLeaderboard.board.in_(boards)
+        )
+    )
+    current_best = dict(result.all())
+
+    snapshot = {
+        "player_id": game.player_id,
+        "game_id": game.id,
+        "score": game.score,
+        "bugs_found": game.bugs_found,
+        "bugs_total": game.bugs_total,
+        "time_seconds": game.time_seconds,
+        "difficulty": game.difficulty,
+        "completed_at": game.completed_at,
+    }
+    entry = {
+        **{key: value for key, value in snapshot.items() if key != "game_id"},
+        "username": username,
+        "accuracy": game.accuracy,
+    }
+
+    for board in boards:
+        if board in current_best and current_best[board] >= game.score:
+            continue  # Ties keep the earlier game
+
+        stmt = sqlite_insert(BugHuntLeaderboard).values(board=board, **snapshot)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["board", "player_id"],
+            set_={key: stmt.excluded[key] for key in snapshot if key != "player_id"},
+            where=BugHuntLeaderboard.score < stmt.excluded.score
+        ).returning(BugHuntLeaderboard.id)
+        if (await db.execute(stmt)).first() is None:
+            continue  # A concurrent submit stored a better score since the read above
+
+        if board == GLOBAL_BOARD:
+            rank_service.record_score(db, rank_service.BUG_HUNT, game.player_id, game.score)
+
+        is_new_player = board not in current_best
+        on_commit(db, lambda board=board, is_new_player=is_new_player: _apply_entry(board, entry, is_new_player))
+
+    # Daily buckets: both boards in one statement, keeping the day's best
+    stmt = sqlite_insert(BugHuntDailyBest).values([{"board": board, "day": day, **snapshot} for board in boards])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["board", "day", "player_id"],
+        set_={key: stmt.excluded[key] for key in snapshot if key != "player_id"},
+        where=BugHuntDailyBest.score < stmt.excluded.score
+    )
+    await db.execute(stmt)
+
+    def apply_windows():
+        for board in boards:
+            for period in PERIOD_DAYS:
+                _apply_window_entry((board, period), day, entry)
+    on_commit(db, apply_windows)
+
+
+async def _load_board(db: AsyncSession, board: str) -> CachedBoard:
+    """Load the top-K rows of a board from the (board, score) index."""
+    result = await db.execute(
+        select(BugHuntLeaderboard, Player.username)
+        .join(Player, BugHuntLeaderboard.player_id == Player.id)
+        .where(BugHuntLeaderboard.board == board)
+        .order_by(BugHuntLeaderboard.score.desc(), BugHuntLeaderboard.completed_at)
+        .limit(TOP_K)
+    )
+    entries = [
+        {
+            "player_id": row.player_id,
+            "username": username,
+            "score": row.score,
+            "bugs_found": row.bugs_found,
+            "bugs_total": row.bugs_total,
+            "time_seconds": row.time_seconds,
+            "accuracy": (row.bugs_found / row.bugs_total) * 100 if row.bugs_total else 0.0,
+            "difficulty": row.difficulty,
+            "completed_at": row.completed_at,
+        }
+        for row, username in result.all()
+    ]
+
+    total = await db.scalar(
+        select(func.count(BugHuntLeaderboard.id)).where(BugHuntLeaderboard.board == board)
+    )
+
+    return CachedBoard(entries=entries, total=total or 0)
+
+
+async def get_leaderboard(db: AsyncSession, board: str, limit: int) -> tuple[list[dict], int]:
+    """
+    Get the best `limit` entries of a board and its total player count.
+
+    Served from the in-process cache; a cold board costs one indexed
+    read of TOP_K rows, independent of how many games were played.
+    """
+    cached = _cache.get(board)
+    if cached is None:
+        version = _version(board)
+        cached = await _load_board(db, board)
+        if _version(board) == version:  # Else a write landed mid-load: serve it, reload next time
+            _cache[board] = cached
+
+    return cached.entries[:limit], cached.total
+
+
+async def _load_window(db: AsyncSession, board: str, period: str, today: int) -> CachedWindow:
+    """Merge the daily buckets of a rolling period: each player's best, top-K by score."""
+    in_window = (BugHuntDailyBest.board == board, BugHuntDailyBest.day > today - PERIOD_DAYS[period])
+    ranked = (
+        select(
+            BugHuntDailyBest,
+            func.row_number().over(
+                partition_by=BugHuntDailyBest.player_id,
+                order_by=(BugHuntDailyBest.score.desc(), BugHuntDailyBest.completed_at)
+            ).label("position")
+        )
+        .where(*in_window)
+        .subquery()
+    )
+    result = await db.execute(
+        select(ranked, Player.username)
+        .join(Player, ranked.c.player_id == Player.id)
+        .where(ranked.c.position == 1)
+        .order_by(ranked.c.score.desc(), ranked.c.completed_at)
+        .limit(TOP_K)
+    )
+    entries = [
+        {
+            "player_id": row.player_id,
+            "username": row.username,
+            "score": row.score,
+            "bugs_found": row.bugs_found,
+            "bugs_total": row.bugs_total,
+            "time_seconds": row.time_seconds,
+            "accuracy": (row.bugs_found / row.bugs_total) * 100 if row.bugs_total else 0.0,
+            "difficulty": row.difficulty,
+            "completed_at": row.completed_at,
+        }
+        for row in result.all()
+    ]
+
+    members = await db.scalars(select(BugHuntDailyBest.player_id).where(*in_window).distinct())
+
+    return CachedWindow(day=today, entries=entries, members=set(members))
+
+
+async def get_window_leaderboard(db: AsyncSession, board: str, period: str, limit: int) -> tuple[list[dict], int]:
+    """
+    Get the best `limit` entries of a board over a rolling period and its player count.
+
+    Served from a per-day cache; a cold window reads only the buckets of
+    its days (at most one row per player per day), so weekly and monthly
+    boards cost about the same as the all-time one.
+    """
+    today = utc_day()
+    cached = _window_cache.get((board, period))
+    if cached is None or cached.day != today:
+        version = _version((board, period))
+        cached = await _load_window(db, board, period, today)
+        if _version((board, period)) == version:  # As get_leaderboard
+            _window_cache[(board, period)] = cached
+
+    return cached.entries[:limit], cached.total
+
+
+async def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Remove players from every board (one statement per table)."""
+    await db.execute(delete(BugHuntLeaderboard).where(BugHuntLeaderboard.player_id.in_(player_ids)))
+    await db.execute(delete(BugHuntDailyBest).where(BugHuntDailyBest.player_id.in_(player_ids)))
+    on_commit(db, invalidate)
+
+
+def rebuild_leaderboard(db: Session) -> int:
+    """
+    Rebuild every board and the recent daily buckets from bug_hunt_games.
+
+    One set-based statement per table. Used to backfill databases created
+    before the leaderboard tables. Returns the number of all-time rows written.
+    """
+    def best_games(board, partition_by, day=None):
+        ranked = (
+            select(
+                board.label("board"),
+                *([day.label("day")] if day is not None else []),
+                BugHuntGame.player_id,
+                BugHuntGame.id.label("game_id"),
+                BugHuntGame.score,
+                BugHuntGame.bugs_found,
+                BugHuntGame.bugs_total,
+                BugHuntGame.time_seconds,
+                BugHuntGame.difficulty,
+                BugHuntGame.completed_at,
+                func.row_number().over(
+                    partition_by=(*partition_by, *([day] if day is not None else [])),
+                    order_by=(BugHuntGame.score.desc(), BugHuntGame.completed_at)
+                ).label("position")
+            )
+            .where(BugHuntGame.found_bugs.is_not(None))  # Submitted games only
+        )
+        if day is not None:
+            ranked = ranked.where(day > utc_day() - BUCKET_RETENTION_DAYS)
+        ranked = ranked.subquery()
+        return select(*[c for c in ranked.c if c.name != "position"]).where(ranked.c.position == 1)
+
+    columns = [
+        "board", "player_id", "game_id", "score", "bugs_found",
+        "bugs_total", "time_seconds", "difficulty", "completed_at",
+    ]
+    rows = union_all(
+        best_games(literal(GLOBAL_BOARD), (BugHuntGame.player_id,)),
+        best_games(BugHuntGame.difficulty, (BugHuntGame.player_id, BugHuntGame.difficulty)),
+    )
+    day = _sql_day(BugHuntGame.completed_at)
+    daily_rows = union_all(
+        best_games(literal(GLOBAL_BOARD), (BugHuntGame.player_id,), day),
+        best_games(BugHuntGame.difficulty, (BugHuntGame.player_id, BugHuntGame.difficulty), day),
+    )
+
+    db.execute(delete(BugHuntLeaderboard))
+    result = db.execute(insert(BugHuntLeaderboard).from_select(columns, rows))
+    db.execute(delete(BugHuntDailyBest))
+    db.execute(insert(BugHuntDailyBest).from_select(["board", "day", *columns[1:]], daily_rows))
+    db.commit()
+    invalidate()
+    rank_service.reset()
+
+    return result.rowcount
+
+
+def prune_daily_buckets(db: Session) -> int:
+    """Delete daily buckets older than the longest rolling period. Returns rows deleted."""
+    result = db.execute(
+        delete(BugHuntDailyBest).where(BugHuntDailyBest.day <= utc_day() - BUCKET_RETENTION_DAYS)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def rebuild_if_empty(db: Session) -> None:
+    """Backfill the leaderboards once for databases that predate them."""
+    has_entries = db.scalar(select(BugHuntLeaderboard.id).limit(1))
+    has_games = db.scalar(select(BugHuntGame.id).limit(1))
+    has_buckets = db.scalar(select(BugHuntDailyBest.id).limit(1))
+    has_recent_games = db.scalar(
+        select(BugHuntGame.id)
+        .where(BugHuntGame.completed_at >= datetime.utcnow() - timedelta(days=BUCKET_RETENTION_DAYS))
+        .limit(1)
+    )
+
+    if (has_games and not has_entries) or (has_recent_games and not has_buckets):
+        rebuild_leaderboard(db)
@@ -0,0 +1,76 @@
+"""Player admin service - Set-based delete and anonymize of many players in one transaction."""
+
+from collections.abc import Collection
+
+from app.database import on_commit
+from app.models.achievement import Achievement, PlayerStats, UnlockedTool
+from app.models.client_event import ClientEvent
+from app.models.minigame import BugHuntGame
+from app.models.player import Player
+from app.models.progress import Progress
+from app.schemas.player import RESERVED_USERNAME_PREFIX
+from app.services import (
+    bug_hunt_stats_service,
+    leaderboard_service,
+    progress_state_service,
+    rank_service,
+    response_cache_service,
+    streak_service,
+    xp_service,
+)
+from sqlalchemy import delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Player rows no service owns, deleted here (games last: leaderboard rows reference them)
+_OWNED_BY_PLAYER = (Progress, Achievement, UnlockedTool, PlayerStats, ClientEvent, BugHuntGame)
+
+# PlayerCreate and PlayerUpdate reject the prefix, so no player can take an anonymized name
+ANONYMOUS_USERNAME = RESERVED_USERNAME_PREFIX + "%08d"
+ANONYMOUS_AVATAR = "default.png"
+
+
+async def delete_players(db: AsyncSession, player_ids: Collection[int]) -> list[int]:
+    """
+    Delete players and everything they own; returns the ids that existed.
+
+    One `DELETE ... WHERE player_id IN (...)` per table, whatever the number
+    of players or the size of their histories: no row is loaded into the
+    session. The foreign keys' ON DELETE CASCADE would remove the children
+    on its own, but only in files created since and on connections with
+    `PRAGMA foreign_keys = ON`, so the tables are cleared explicitly first.
+    Ids without a player are ignored. Does not commit.
+    """
+    await leaderboard_service.remove_players(db, player_ids)
+    await bug_hunt_stats_service.remove_players(db, player_ids)
+    await xp_service.remove_players(db, player_ids)
+    await progress_state_service.remove_players(db, player_ids)
+    await streak_service.remove_players(db, player_ids)
+    for model in _OWNED_BY_PLAYER:
+        await db.execute(delete(model).where(model.player_id.in_(player_ids)))
+
+    deleted = list(await db.scalars(delete(Player).where(Player.id.in_(player_ids)).returning(Player.id)))
+    if deleted:
+        rank_service.remove_players(db, deleted)
+        for player_id in deleted:
+            response_cache_service.bump(db, player_id)
+    return deleted
+
+
+async def anonymize_players(db: AsyncSession, player_ids: Collection[int]) -> list[int]:
+    """
+    Replace players' username and avatar, keeping their history; returns the ids that existed.
+
+    One UPDATE for all of them. Progress, games and XP stay, so leaderboards
+    and rankings keep their entries under the anonymous name. Does not commit.
+    """
+    anonymized = list(await db.scalars(
+        update(Player)
+        .where(Player.id.in_(player_ids))
+        .values(username=func.printf(ANONYMOUS_USERNAME, Player.id), avatar=ANONYMOUS_AVATAR)
+        .returning(Player.id)
+    ))
+    if anonymized:
+        on_commit(db, leaderboard_service.invalidate)  # Cached boards hold usernames
+        for player_id in anonymized:
+            response_cache_service.bump(db, player_id)
+    return anonymized
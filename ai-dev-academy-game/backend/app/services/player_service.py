@@ -0,0 +1,44 @@
+"""Player service - Request-scoped player loading shared by routes and services."""
+
+from app.models.achievement import PlayerStats
+from app.models.player import Player
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.util import identity_key
+
+# A session serves one request (app.database.get_db), so its identity map is
+# the request-scoped cache: a player loaded by the CurrentPlayer dependency is
+# found again here by any service that asks, without another query.
+
+
+def _loaded_player(db: AsyncSession, player_id: int) -> Player | None:
+    """The player if this session already loaded it (never queries)."""
+    return db.sync_session.identity_map.get(identity_key(Player, player_id))
+
+
+async def get_player(db: AsyncSession, player_id: int, with_stats: bool = False) -> Player | None:
+    """
+    Get a player, loading it at most once per session.
+
+    With `with_stats`, PlayerStats is joined into the same query (or loaded
+    onto an already cached player), so `get_stats` needs no query later.
+    """
+    player = _loaded_player(db, player_id)
+    if player is None:
+        query = select(Player).where(Player.id == player_id)
+        if with_stats:
+            query = query.options(joinedload(Player.stats))
+        return await db.scalar(query)
+
+    if with_stats and "stats" in inspect(player).unloaded:
+        await db.refresh(player, ["stats"])
+    return player
+
+
+async def get_stats(db: AsyncSession, player_id: int) -> PlayerStats | None:
+    """Get a player's stats, from the cached player when it was loaded with them."""
+    player = _loaded_player(db, player_id)
+    if player is not None and "stats" not in inspect(player).unloaded:
+        return player.stats
+    return await db.scalar(select(PlayerStats).where(PlayerStats.player_id == player_id))
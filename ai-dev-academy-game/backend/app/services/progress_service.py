@@ -0,0 +1,88 @@
+"""Progress service - Status and exercise updates of a class's progress."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.models.progress import Progress
+from app.schemas.progress import ProgressStatus
+from app.services import content_service, player_service, streak_service, xp_service
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class ProgressChange:
+    """What an update did beyond setting the fields."""
+    completed: bool = False  # The class became completed
+    xp_awarded: int = 0
+    exercises_added: int = 0
+
+
+async def update_progress(
+    db: AsyncSession,
+    progress: Progress,
+    status: ProgressStatus | None = None,
+    exercises_completed: int | None = None,
+    at: datetime | None = None
+) -> ProgressChange:
+    """
+    Apply a status and/or exercise count to a class's progress.
+
+    When the class becomes completed: stamps completed_at, counts the day
+    towards the streak, awards the class XP and counts it in the player's
+    stats. Exercises added are counted in the stats. `at` (UTC, default
+    now) is when it happened. Does not flush, commit or update the
+    progress state.
+    """
+    at = at or datetime.utcnow()
+    change = ProgressChange()
+
+    # Loaded by whichever update below needs it first, then shared
+    stats = None
+
+    # Get class info for XP reward
+    class_info = content_service.get_class_info(progress.module_number, progress.class_number)
+
+    # Update status if provided
+    if status:
+        old_status = progress.status
+        progress.status = status
+
+        # If marking as completed
+        if status == ProgressStatus.COMPLETED and old_status != ProgressStatus.COMPLETED:
+            change.completed = True
+            progress.completed_at = at
+            await streak_service.record_activity(db, progress.player_id, at)
+
+            # Award XP using centralized service
+            if class_info:
+                await xp_service.award_xp(
+                    player_id=progress.player_id,
+                    xp_amount=class_info.xp_reward,
+                    db=db,
+                    reason=f"Completed class {progress.module_number}.{progress.class_number}",
+                    commit=False  # Committed with the progress update
+                )
+                change.xp_awarded = class_info.xp_reward
+
+                # Update player stats
+                stats = stats or await player_service.get_stats(db, progress.player_id)
+                if stats:
+                    stats.classes_completed += 1
+
+        # If marking as in_progress for the first time
+        elif status == ProgressStatus.IN_PROGRESS and not progress.started_at:
+            progress.started_at = at
+
+    # Update exercises completed if provided
+    if exercises_completed is not None:
+        old_count = progress.exercises_completed
+        progress.exercises_completed = exercises_completed
+
+        # Update player stats
+        if exercises_completed > old_count:
+            change.exercises_added = exercises_completed - old_count
+            stats = stats or await player_service.get_stats(db, progress.player_id)
+            if stats:
+                stats.exercises_completed += change.exercises_added
+
+    return change
@@ -0,0 +1,230 @@
+"""Progress state service - Per-player completion bitmaps for single-row progress reads."""
+
+from array import array
+from collections.abc import Collection
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.database import sql_function
+from app.models.progress import PlayerProgressState, Progress
+from app.schemas.progress import ClassProgress, ModuleProgressResponse, ProgressStatus
+from app.services import content_service, response_cache_service
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# SQLite integers are signed 64-bit
+if len(content_service.CLASS_TABLE) > 63:
+    raise RuntimeError("Curriculum too large for 64-bit progress masks")
+
+EXERCISES_TYPECODE = "I"  # uint32
+COMPLETED_AT_TYPECODE = "q"  # int64 microseconds since epoch
+
+# Progress.status value -> bitmap column
+MASK_COLUMNS = {
+    ProgressStatus.UNLOCKED.value: "unlocked_mask",
+    ProgressStatus.IN_PROGRESS.value: "in_progress_mask",
+    ProgressStatus.COMPLETED.value: "completed_mask",
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_MAX_UINT32 = 2**32 - 1
+
+
+def _to_micros(value: datetime | None) -> int:
+    """Encode a (naive UTC or aware) datetime for the packed completed_at array."""
+    if value is None:
+        return 0
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime | None:
+    return _EPOCH + timedelta(microseconds=value) if value else None
+
+
+def _unpack(blob: bytes | None, typecode: str) -> array:
+    """Decode a packed per-class array, padded to one slot per class."""
+    values = array(typecode, blob or b"")
+    missing = len(content_service.CLASS_TABLE) - len(values)
+    if missing > 0:
+        values.extend([0] * missing)
+    return values
+
+
+@sql_function("packed_set", 4)
+def packed_set(blob: bytes | None, typecode: str, index: int, value: int) -> bytes:
+    """SQL: return `blob` (packed array of `typecode`) with slot `index` set to `value`."""
+    values = _unpack(blob, typecode)
+    values[index] = value
+    return values.tobytes()
+
+
+@dataclass
+class ProgressState:
+    """Decoded progress state of one player."""
+    unlocked_mask: int
+    in_progress_mask: int
+    completed_mask: int
+    exercises: array
+    completed_at: array
+
+    @classmethod
+    def from_row(cls, row: PlayerProgressState) -> "ProgressState":
+        return cls(
+            unlocked_mask=row.unlocked_mask,
+            in_progress_mask=row.in_progress_mask,
+            completed_mask=row.completed_mask,
+            exercises=_unpack(row.exercises, EXERCISES_TYPECODE),
+            completed_at=_unpack(row.completed_at, COMPLETED_AT_TYPECODE)
+        )
+
+    @classmethod
+    def from_progress(cls, rows: list[Progress]) -> "ProgressState":
+        """Build the state from a player's Progress rows (seed / fallback path)."""
+        state = cls(0, 0, 0, _unpack(None, EXERCISES_TYPECODE), _unpack(None, COMPLETED_AT_TYPECODE))
+        for progress in rows:
+            class_id = content_service.get_class_id(progress.module_number, progress.class_number)
+            if class_id is None:
+                continue
+            mask_name = MASK_COLUMNS.get(getattr(progress.status, "value", progress.status))
+            if mask_name:
+                setattr(state, mask_name, getattr(state, mask_name) | (1 << class_id))
+            state.exercises[class_id] = min(progress.exercises_completed or 0, _MAX_UINT32)
+            state.completed_at[class_id] = _to_micros(progress.completed_at)
+        return state
+
+    def status(self, class_id: int) -> ProgressStatus:
+        bit = 1 << class_id
+        if self.completed_mask & bit:
+            return ProgressStatus.COMPLETED
+        if self.in_progress_mask & bit:
+            return ProgressStatus.IN_PROGRESS
+        if self.unlocked_mask & bit:
+            return ProgressStatus.UNLOCKED
+        return ProgressStatus.LOCKED
+
+    def class_progress(self, class_id: int, class_number: int) -> ClassProgress:
+        return ClassProgress(
+            class_number=class_number,
+            status=self.status(class_id),
+            exercises_completed=self.exercises[class_id],
+            completed_at=_from_micros(self.completed_at[class_id])
+        )
+
+    def module_progress(self, module_number: int) -> ModuleProgressResponse:
+        """Build the progress summary of one module (module must exist)."""
+        module_info = content_service.get_module_info(module_number)
+        completed_count = (self.completed_mask & content_service.MODULE_MASKS.get(module_number, 0)).bit_count()
+
+        return ModuleProgressResponse(
+            module_number=module_number,
+            module_name=module_info.title,
+            total_classes=len(module_info.classes),
+            completed_classes=completed_count,
+            progress_percentage=content_service.get_module_progress(module_number, completed_count),
+            classes=[
+                self.class_progress(content_service.get_class_id(module_number, c.class_number), c.class_number)
+                for c in module_info.classes
+            ]
+        )
+
+    @property
+    def total_classes_completed(self) -> int:
+        return self.completed_mask.bit_count()
+
+    @property
+    def total_exercises_completed(self) -> int:
+        return sum(self.exercises)
+
+
+async def _load_progress_rows(db: AsyncSession, player_id: int) -> list[Progress]:
+    result = await db.execute(select(Progress).where(Progress.player_id == player_id))
+    return list(result.scalars().all())
+
+
+async def record_progress(db: AsyncSession, progress: Progress) -> None:
+    """
+    Mirror one Progress row into the player's state.
+
+    Normally a single UPDATE that flips the class's status bits and sets
+    its packed slots. If the player has no state row yet, or it was built
+    for another curriculum layout, the row is rebuilt from the player's
+    Progress rows (which include this one, so `progress` must be flushed).
+    """
+    response_cache_service.bump(db, progress.player_id)
+
+    class_id = content_service.get_class_id(progress.module_number, progress.class_number)
+    if class_id is None:
+        return
+
+    bit = 1 << class_id
+    values = {
+        mask_name: getattr(PlayerProgressState, mask_name).op("&")(~bit).op("|")(
+            bit if progress.status == status else 0
+        )
+        for status, mask_name in MASK_COLUMNS.items()
+    }
+    values["exercises"] = func.packed_set(
+        PlayerProgressState.exercises, EXERCISES_TYPECODE, class_id,
+        min(progress.exercises_completed or 0, _MAX_UINT32)
+    )
+    values["completed_at"] = func.packed_set(
+        PlayerProgressState.completed_at, COMPLETED_AT_TYPECODE, class_id,
+        _to_micros(progress.completed_at)
+    )
+
+    result = await db.execute(
+        update(PlayerProgressState)
+        .where(
+            PlayerProgressState.player_id == progress.player_id,
+            PlayerProgressState.layout == content_service.CURRICULUM_LAYOUT
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount == 0:
+        await rebuild(db, progress.player_id)
+
+
+async def rebuild(db: AsyncSession, player_id: int) -> ProgressState:
+    """Rebuild (upsert) a player's state row from their Progress rows."""
+    state = ProgressState.from_progress(await _load_progress_rows(db, player_id))
+    row = {
+        "layout": content_service.CURRICULUM_LAYOUT,
+        "unlocked_mask": state.unlocked_mask,
+        "in_progress_mask": state.in_progress_mask,
+        "completed_mask": state.completed_mask,
+        "exercises": state.exercises.tobytes(),
+        "completed_at": state.completed_at.tobytes(),
+    }
+    await db.execute(
+        sqlite_insert(PlayerProgressState)
+        .values(player_id=player_id, **row)
+        .on_conflict_do_update(index_elements=["player_id"], set_=row)
+    )
+    return state
+
+
+async def get_state(db: AsyncSession, player_id: int) -> ProgressState:
+    """
+    Get a player's progress state.
+
+    Reads the state row (O(1)); players without an up-to-date row (no
+    progress yet, rows written before states existed, or a changed
+    curriculum) fall back to decoding their Progress rows.
+    """
+    row = await db.scalar(
+        select(PlayerProgressState).where(PlayerProgressState.player_id == player_id)
+    )
+    if row is not None and row.layout == content_service.CURRICULUM_LAYOUT:
+        return ProgressState.from_row(row)
+
+    return ProgressState.from_progress(await _load_progress_rows(db, player_id))
+
+
+async def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Remove players' progress states."""
+    await db.execute(delete(PlayerProgressState).where(PlayerProgressState.player_id.in_(player_ids)))
@@ -0,0 +1,247 @@
+"""Rank service - Exact rank and percentile by XP and Bug Hunt best score in O(log n)."""
+
+from collections.abc import Awaitable, Callable, Collection
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.database import on_commit
+from app.models.minigame import BugHuntLeaderboard
+from app.models.player import Player
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+XP = "xp"
+BUG_HUNT = "bug_hunt"  # Best score on the global Bug Hunt board
+
+_GLOBAL_BOARD = "all"  # leaderboard_service.GLOBAL_BOARD (which imports this module)
+
+_INITIAL_CAPACITY = 1024
+
+
+class RankIndex:
+    """
+    Order-statistic index over non-negative integer scores.
+
+    A Fenwick tree counts players per score value, so "how many players
+    score above x" is a prefix sum in O(log max_score); a dict remembers
+    each player's current score so updates can remove the old one first.
+    The tree doubles its capacity when a score outgrows it.
+    """
+
+    def __init__(self, scores: dict[int, int] | None = None):
+        self._scores: dict[int, int] = {}
+        self._tree = [0] * (_INITIAL_CAPACITY + 1)
+        for key, score in (scores or {}).items():
+            self.set(key, score)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._scores
+
+    def _add(self, score: int, delta: int) -> None:
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_up_to(self, score: int) -> int:
+        """Players scoring <= score."""
+        i = min(score + 1, len(self._tree) - 1)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, score: int) -> None:
+        capacity = len(self._tree) - 1
+        while capacity <= score:
+            capacity *= 2
+        # Linear-time rebuild: counts per slot, then push each into its parent
+        tree = [0] * (capacity + 1)
+        for value in self._scores.values():
+            tree[value + 1] += 1
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def set(self, key: int, score: int) -> None:
+        score = max(0, score)
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            self._add(old, -1)
+        self._scores[key] = score
+        if score >= len(self._tree) - 1:
+            self._grow(score)  # Rebuild includes the new score
+        else:
+            self._add(score, 1)
+
+    def remove(self, key: int) -> None:
+        old = self._scores.pop(key, None)
+        if old is not None:
+            self._add(old, -1)
+
+    def score(self, key: int) -> int | None:
+        return self._scores.get(key)
+
+    def count_above(self, score: int) -> int:
+        return len(self._scores) - self._count_up_to(score)
+
+
+@dataclass(frozen=True)
+class Rank:
+    """A player's standing on one ranking."""
+    score: int
+    rank: int  # 1 = best; tied scores share a rank
+    total: int  # Players on the ranking
+
+    @property
+    def percentile(self) -> float:
+        """Share of ranked players at or below this one (100 = top)."""
+        return round(100 * (self.total - self.rank + 1) / self.total, 2)
+
+
+# In-process indexes, loaded on first use and kept in sync after commits.
+# Updates committed while an index is still loading are queued and replayed.
+_indexes: dict[str, RankIndex] = {}
+_loading: dict[str, list[tuple[int, int | None]]] = {}
+
+
+def reset() -> None:
+    """Drop every index (next lookup reloads it)."""
+    _indexes.clear()
+    _loading.clear()
+
+
+def _apply(ranking: str, player_id: int, score: int | None) -> None:
+    if ranking in _loading:
+        _loading[ranking].append((player_id, score))
+    index = _indexes.get(ranking)
+    if index is None:
+        return
+    if score is None:
+        index.remove(player_id)
+    else:
+        index.set(player_id, score)
+
+
+def record_score(db: AsyncSession, ranking: str, player_id: int, score: int) -> None:
+    """Update a player's score on a ranking once the transaction commits."""
+    on_commit(db, lambda: _apply(ranking, player_id, score))
+
+
+def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Drop players from every ranking once the transaction commits."""
+    on_commit(db, lambda: [
+        _apply(ranking, player_id, None) for ranking in (XP, BUG_HUNT) for player_id in player_ids
+    ])
+
+
+async def _load_xp(db: AsyncSession) -> dict[int, int]:
+    result = await db.execute(select(Player.id, Player.xp))
+    return {player_id: xp or 0 for player_id, xp in result.all()}
+
+
+async def _load_bug_hunt(db: AsyncSession) -> dict[int, int]:
+    result = await db.execute(
+        select(BugHuntLeaderboard.player_id, BugHuntLeaderboard.score)
+        .where(BugHuntLeaderboard.board == _GLOBAL_BOARD)
+    )
+    return dict(result.all())
+
+
+_LOADERS: dict[str, Callable[[AsyncSession], Awaitable[dict[int, int]]]] = {
+    XP: _load_xp,
+    BUG_HUNT: _load_bug_hunt,
+}
+
+
+async def _get_index(db: AsyncSession, ranking: str) -> RankIndex:
+    index = _indexes.get(ranking)
+    if index is None:
+        pending = _loading.setdefault(ranking, [])
+        try:
+            index = RankIndex(await _LOADERS[ranking](db))
+            for player_id, score in pending:
+                if score is None:
+                    index.remove(player_id)
+                else:
+                    index.set(player_id, score)
+            _indexes[ranking] = index
+        finally:
+            if _loading.get(ranking) is pending:
+                del _loading[ranking]
+    return index
+
+
+def _score_query(ranking: str, player_id: int) -> Select:
+    if ranking == XP:
+        return select(Player.xp).where(Player.id == player_id)
+    return select(BugHuntLeaderboard.score).where(
+        BugHuntLeaderboard.board == _GLOBAL_BOARD,
+        BugHuntLeaderboard.player_id == player_id
+    )
+
+
+async def _stored_score(db: AsyncSession, ranking: str, player_id: int) -> int | None:
+    return await db.scalar(_score_query(ranking, player_id))
+
+
+async def _rank_from_index(db: AsyncSession, ranking: str, player_id: int) -> Rank | None:
+    index = await _get_index(db, ranking)
+    score = index.score(player_id)
+    if score is None:
+        # Not indexed: unranked, or written by another process since the load
+        score = await _stored_score(db, ranking, player_id)
+        if score is None:
+            return None
+        index.set(player_id, score)
+    return Rank(score=score, rank=index.count_above(score) + 1, total=len(index))
+
+
+async def _rank_from_sql(db: AsyncSession, ranking: str, player_id: int) -> Rank | None:
+    """
+    Indexed counts: players.xp (ix_players_xp) or the global board's (board, score) index.
+
+    The player's score and the `COUNT(*) WHERE score > :mine` range search
+    come back in one statement. The total is a separate count (taken from
+    the rank index instead, if one is loaded), only for ranked players:
+    counting both in one statement would turn the range search into a
+    full index scan.
+    """
+    if ranking == XP:
+        table, column, where = Player, Player.xp, ()
+    else:
+        table, column = BugHuntLeaderboard, BugHuntLeaderboard.score
+        where = (BugHuntLeaderboard.board == _GLOBAL_BOARD,)
+
+    mine = _score_query(ranking, player_id).scalar_subquery()
+    above = select(func.count()).select_from(table).where(*where, column > mine).scalar_subquery()
+    score, above = (await db.execute(select(mine, above))).one()
+    if score is None:
+        return None
+
+    index = _indexes.get(ranking)
+    if index is not None:
+        total = len(index)
+    else:
+        total = await db.scalar(select(func.count()).select_from(table).where(*where))
+    return Rank(score=score, rank=above + 1, total=total)
+
+
+async def get_rank(db: AsyncSession, ranking: str, player_id: int) -> Rank | None:
+    """
+    A player's rank on `ranking` (XP or BUG_HUNT), or None if not ranked.
+
+    Answered from the in-memory index (O(log n) after a one-off load), or
+    with indexed SQL counts when RANK_INDEX_ENABLED is off.
+    """
+    if get_settings().RANK_INDEX_ENABLED:
+        return await _rank_from_index(db, ranking, player_id)
+    return await _rank_from_sql(db, ranking, player_id)
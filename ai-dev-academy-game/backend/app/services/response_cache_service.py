@@ -0,0 +1,92 @@
+"""Response cache service - Versioned per-player response cache with ETags."""
+
+import secrets
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.database import on_commit
+from app.responses import dumps
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Most (player, resource) responses kept in memory
+MAX_ENTRIES = 2048
+
+# Changes on every restart, so ETags from a previous process never match
+_BOOT_ID = secrets.token_hex(4)
+
+# player_id -> version, bumped after every committed write that changes the player's data
+_versions: dict[int, int] = {}
+
+# (player_id, resource) -> (version, serialized body), least recently used first
+_responses: OrderedDict[tuple[int, str], tuple[int, bytes]] = OrderedDict()
+
+
+def reset() -> None:
+    """Drop every version and cached response."""
+    _versions.clear()
+    _responses.clear()
+
+
+def current_version(player_id: int) -> int:
+    """Get a player's data version (0 until their first write in this process)."""
+    return _versions.get(player_id, 0)
+
+
+def _bump(player_id: int) -> None:
+    _versions[player_id] = _versions.get(player_id, 0) + 1
+
+
+def bump(db: AsyncSession, player_id: int) -> None:
+    """Mark a player's cached responses stale once `db` commits."""
+    on_commit(db, lambda: _bump(player_id))
+
+
+def _etag(player_id: int, resource: str, version: int) -> str:
+    return f'"{_BOOT_ID}-{player_id}-{version}-{resource}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def cached_response(
+    request: Request,
+    player_id: int,
+    resource: str,
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a player's resource from the versioned cache.
+
+    A poll whose If-None-Match still matches gets `304 Not Modified`, and
+    a cached body is returned as is; neither touches the database. Only
+    on a miss is `build()` awaited and its JSON cached under the version
+    read *before* building, so a write racing the build can only make the
+    entry stale, never hide newer data.
+    """
+    version = current_version(player_id)
+    etag = _etag(player_id, resource, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (player_id, resource)
+    cached = _responses.get(key)
+    if cached is not None and cached[0] == version:
+        _responses.move_to_end(key)
+        body = cached[1]
+    else:
+        body = dumps(await build())
+        _responses[key] = (version, body)
+        _responses.move_to_end(key)
+        while len(_responses) > MAX_ENTRIES:
+            _responses.popitem(last=False)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,215 @@
+"""Streak service - Daily activity streaks, updated in O(1) per activity."""
+
+from collections.abc import Collection
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.database import sql_function
+from app.models.progress import Progress
+from app.models.streak import PlayerStreak
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+@lru_cache(maxsize=512)
+def get_zone(name: str | None) -> ZoneInfo | None:
+    """ZoneInfo for an IANA timezone name (None if unknown)."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+@sql_function("local_day", 2)
+def local_day(timestamp: datetime | str | None, timezone_name: str | None) -> int | None:
+    """
+    SQL: calendar day (`date.toordinal()`) of a UTC timestamp in a timezone.
+
+    Naive timestamps are UTC (as written by datetime.utcnow()); unknown
+    timezones fall back to UTC.
+    """
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    zone = get_zone(timezone_name) or get_zone(DEFAULT_TIMEZONE)
+    return timestamp.astimezone(zone).date().toordinal()
+
+
+@dataclass(frozen=True)
+class Streak:
+    """A player's streak as stored (current run as of its last activity day)."""
+    timezone: str = DEFAULT_TIMEZONE
+    last_activity_day: int | None = None
+    current_streak: int = 0
+    longest_streak: int = 0
+
+    @property
+    def last_activity_date(self) -> date | None:
+        return date.fromordinal(self.last_activity_day) if self.last_activity_day else None
+
+    def current_as_of(self, now: datetime | None = None) -> int:
+        """Current run at `now`: still alive if the last activity was today or yesterday (player's time)."""
+        if self.last_activity_day is None:
+            return 0
+        today = local_day(now or datetime.utcnow(), self.timezone)
+        return self.current_streak if today - self.last_activity_day <= 1 else 0
+
+    @classmethod
+    def from_row(cls, row: PlayerStreak | None) -> "Streak":
+        if row is None:
+            return cls()
+        return cls(row.timezone, row.last_activity_day, row.current_streak, row.longest_streak)
+
+
+async def record_activity(db: AsyncSession, player_id: int, at: datetime | None = None) -> Streak:
+    """
+    Count an activity at `at` (UTC, default now) towards the player's streak.
+
+    One upsert: the activity's local day is computed in SQL with the
+    player's stored timezone, then compared with the last activity day:
+    same day keeps the run, the next day extends it, a gap restarts it at 1.
+    Activities older than the last activity day (late offline syncs) leave
+    the run unchanged. Not committed.
+    """
+    at = at or datetime.utcnow()
+    day = func.local_day(at, PlayerStreak.timezone)
+    last_day = PlayerStreak.last_activity_day
+    current = case(
+        (last_day.is_(None), 1),
+        (day <= last_day, PlayerStreak.current_streak),
+        (day == last_day + 1, PlayerStreak.current_streak + 1),
+        else_=1
+    )
+
+    result = await db.execute(
+        sqlite_insert(PlayerStreak)
+        .values(
+            player_id=player_id,
+            timezone=DEFAULT_TIMEZONE,
+            last_activity_day=func.local_day(at, DEFAULT_TIMEZONE),
+            current_streak=1,
+            longest_streak=1
+        )
+        .on_conflict_do_update(
+            index_elements=["player_id"],
+            set_={
+                # SET expressions all read the row as it was before the update
+                "current_streak": current,
+                "longest_streak": func.max(PlayerStreak.longest_streak, current),
+                "last_activity_day": func.max(func.coalesce(last_day, day), day),
+            }
+        )
+        .returning(
+            PlayerStreak.timezone,
+            PlayerStreak.last_activity_day,
+            PlayerStreak.current_streak,
+            PlayerStreak.longest_streak
+        )
+    )
+    return Streak(*result.one())
+
+
+async def get_streak(db: AsyncSession, player_id: int) -> Streak:
+    """Get a player's stored streak (zeros if they have no activity yet)."""
+    row = await db.scalar(select(PlayerStreak).where(PlayerStreak.player_id == player_id))
+    return Streak.from_row(row)
+
+
+async def set_timezone(db: AsyncSession, player_id: int, timezone_name: str) -> None:
+    """Set the timezone activity days are counted in (applies to future activity). Not committed."""
+    await db.execute(
+        sqlite_insert(PlayerStreak)
+        .values(player_id=player_id, timezone=timezone_name, current_streak=0, longest_streak=0)
+        .on_conflict_do_update(index_elements=["player_id"], set_={"timezone": timezone_name})
+    )
+
+
+async def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Remove players' streaks."""
+    await db.execute(delete(PlayerStreak).where(PlayerStreak.player_id.in_(player_ids)))
+
+
+def rebuild_streaks(db: Session) -> int:
+    """
+    Rebuild every player's streak from Progress.completed_at in one set-based pass.
+
+    Gaps and islands: distinct local activity days per player, minus their
+    row number, are constant within a run of consecutive days. The longest
+    run and the run ending on the last day become the player's streak.
+    Stored timezones are kept. Returns the number of players with activity.
+    """
+    zone = func.coalesce(
+        select(PlayerStreak.timezone).where(PlayerStreak.player_id == Progress.player_id).scalar_subquery(),
+        DEFAULT_TIMEZONE
+    )
+    days = (
+        select(Progress.player_id, func.local_day(Progress.completed_at, zone).label("day"))
+        .where(Progress.completed_at.is_not(None))
+        .distinct()
+        .subquery()
+    )
+    numbered = select(
+        days.c.player_id,
+        days.c.day,
+        (days.c.day - func.row_number().over(partition_by=days.c.player_id, order_by=days.c.day)).label("run")
+    ).subquery()
+    runs = (
+        select(
+            numbered.c.player_id,
+            func.max(numbered.c.day).label("end_day"),
+            func.count().label("length")
+        )
+        .group_by(numbered.c.player_id, numbered.c.run)
+        .subquery()
+    )
+    ranked = select(
+        runs.c.player_id,
+        runs.c.end_day,
+        runs.c.length,
+        func.max(runs.c.length).over(partition_by=runs.c.player_id).label("longest"),
+        func.row_number().over(partition_by=runs.c.player_id, order_by=runs.c.end_day.desc()).label("recency")
+    ).subquery()
+    latest = (
+        select(
+            ranked.c.player_id,
+            literal(DEFAULT_TIMEZONE),
+            ranked.c.end_day,
+            ranked.c.length,
+            ranked.c.longest
+        )
+        .where(ranked.c.recency == 1)  # A WHERE is also what lets SQLite parse ON CONFLICT after a SELECT
+    )
+
+    db.execute(update(PlayerStreak).values(last_activity_day=None, current_streak=0, longest_streak=0))
+    insert = sqlite_insert(PlayerStreak).from_select(
+        ["player_id", "timezone", "last_activity_day", "current_streak", "longest_streak"], latest
+    )
+    result = db.execute(insert.on_conflict_do_update(
+        index_elements=["player_id"],
+        set_={
+            "last_activity_day": insert.excluded.last_activity_day,
+            "current_streak": insert.excluded.current_streak,
+            "longest_streak": insert.excluded.longest_streak,
+        }
+    ))
+    db.commit()
+
+    return result.rowcount
+
+
+def rebuild_if_empty(db: Session) -> None:
+    """Backfill streaks once for databases that predate them."""
+    has_streaks = db.scalar(select(PlayerStreak.id).limit(1))
+    has_activity = db.scalar(select(Progress.id).where(Progress.completed_at.is_not(None)).limit(1))
+
+    if has_activity and not has_streaks:
+        rebuild_streaks(db)
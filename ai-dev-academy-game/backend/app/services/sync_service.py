@@ -0,0 +1,219 @@
+"""Sync service - Applies a player's queued client events in one transaction."""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from app.models.client_event import ClientEvent
+from app.models.progress import Progress
+from app.schemas.achievement import AchievementWithDetails
+from app.schemas.events import (
+    MAX_BATCH_EVENTS,
+    BugHuntEvent,
+    EventOutcome,
+    EventResult,
+    ExerciseEvent,
+    ProgressEvent,
+)
+from app.schemas.progress import ProgressStatus
+from app.services import (
+    achievement_service,
+    bug_hunt_service,
+    game_session_service,
+    progress_service,
+    progress_state_service,
+    response_cache_service,
+)
+from app.services.game_session_service import ActiveGame
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Event = ProgressEvent | ExerciseEvent | BugHuntEvent
+
+# Statements a batch issues whatever its events: the player, the key claim,
+# the progress rows, the state rebuild, achievements and the commit
+_BATCH_QUERIES = 16
+# The most one event adds (a finished Bug Hunt game: stats and game row,
+# XP, rollup and leaderboard); completions add 3, exercise counts 1
+_EVENT_QUERIES = 7
+BATCH_QUERY_BUDGET = _BATCH_QUERIES + _EVENT_QUERIES * MAX_BATCH_EVENTS
+
+
+@dataclass
+class SyncResult:
+    """What a batch did: one result per event (request order), XP and achievements."""
+    results: list[EventResult] = field(default_factory=list)
+    xp_earned: int = 0
+    achievements_unlocked: list[AchievementWithDetails] = field(default_factory=list)
+
+
+@dataclass
+class _Batch:
+    """State shared by the events of a batch while it is applied."""
+    player_id: int
+    progress: dict[int, Progress]  # The player's rows the batch refers to, by id
+    xp_earned: int = 0
+    progress_changed: bool = False
+    actions: list[tuple[str, dict]] = field(default_factory=list)  # For the achievement evaluation
+    finished_games: list[ActiveGame] = field(default_factory=list)
+
+
+def _utc(value: datetime) -> datetime:
+    """A client timestamp as naive UTC, like the rest of the database."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _claim_keys(db: AsyncSession, player_id: int, events: Sequence[Event]) -> set[str]:
+    """Insert the events' idempotency keys; returns those this batch inserted (the rest were applied before)."""
+    result = await db.execute(
+        sqlite_insert(ClientEvent)
+        .values([
+            {
+                "player_id": player_id,
+                "idempotency_key": event.idempotency_key,
+                "event_type": event.type,
+                "client_timestamp": _utc(event.client_timestamp),
+            }
+            for event in events
+        ])
+        .on_conflict_do_nothing(index_elements=["player_id", "idempotency_key"])
+        .returning(ClientEvent.idempotency_key)
+    )
+    return set(result.scalars())
+
+
+async def _apply_progress(
+    db: AsyncSession, batch: _Batch, event: ProgressEvent | ExerciseEvent, at: datetime
+) -> str | None:
+    """Apply a status or exercise event (as PATCH /api/progress/{id}). Returns why it was rejected, if it was."""
+    progress = batch.progress.get(event.progress_id)
+    if progress is None:
+        return f"Progress with ID {event.progress_id} not found"
+
+    status = exercises = None
+    if isinstance(event, ProgressEvent):
+        # A completed class stays completed (a stale event from another device must not reopen it)
+        if progress.status not in (ProgressStatus.COMPLETED, event.status):
+            status = event.status
+    elif event.exercises_completed > progress.exercises_completed:
+        # Counts only go up, whatever order devices synced in
+        exercises = event.exercises_completed
+    if status is None and exercises is None:
+        return None  # Applied, but nothing to change: no state rebuild or cache bump for it
+
+    change = await progress_service.update_progress(db, progress, status, exercises, at)
+    batch.progress_changed = True
+    batch.xp_earned += change.xp_awarded
+    if change.completed:
+        batch.actions.append(("complete_class", {
+            "module_number": progress.module_number,
+            "class_number": progress.class_number
+        }))
+    if change.exercises_added:
+        batch.actions.append(("complete_exercise", {}))
+    return None
+
+
+async def _apply_bug_hunt(db: AsyncSession, batch: _Batch, event: BugHuntEvent, at: datetime) -> str | None:
+    """Apply a finished game (as the Bug Hunt submit). Returns why it was rejected, if it was."""
+    game = game_session_service.get_game(event.session_id)
+    if game is None:
+        return "Game session not found"
+    if game.player_id != batch.player_id:
+        return "This session belongs to another player"
+    try:
+        graded = bug_hunt_service.grade_game(game, event.found_bug_lines, event.time_seconds)
+    except ValueError:
+        return "Template not found"
+
+    # Claimed before the first await, like the submit endpoint; restored if the batch fails
+    game_session_service.finish_game(game.session_id)
+    batch.finished_games.append(game)
+    await bug_hunt_service.record_finished_game(
+        db, game, graded, event.time_seconds, completed_at=max(at, game.started_at)
+    )
+    batch.xp_earned += graded.xp_earned
+    if graded.is_perfect:
+        batch.actions.append(("bug_hunt_win", {"accuracy": graded.accuracy, "time_seconds": event.time_seconds}))
+    return None
+
+
+async def apply_batch(db: AsyncSession, player_id: int, events: Sequence[Event]) -> SyncResult:
+    """
+    Apply an existing player's events in order, in one transaction, and commit.
+
+    Deduplication: the batch's idempotency keys are inserted first with
+    ON CONFLICT DO NOTHING, and an event whose key this batch did not
+    insert (applied by an earlier batch, or earlier in this one) is
+    skipped. Claiming first takes SQLite's write lock, so a batch resent
+    while the first is still running waits, then finds its keys taken.
+
+    Each event runs the same code as its single-event endpoint, with its
+    client timestamp (taken as now if later) as the time it happened.
+    Events that cannot be applied are rejected and their keys released;
+    the rest of the batch goes on. The progress state is rebuilt once and
+    achievements are evaluated once, over every applied event, at the end.
+    """
+    now = datetime.utcnow()
+    first = {}
+    for event in events:
+        first.setdefault(event.idempotency_key, event)
+    claimed = await _claim_keys(db, player_id, list(first.values()))
+
+    # Every progress row the claimed events refer to, in one query
+    progress_ids = {
+        event.progress_id for event in first.values()
+        if event.idempotency_key in claimed and not isinstance(event, BugHuntEvent)
+    }
+    rows = []
+    if progress_ids:
+        rows = await db.scalars(select(Progress).where(Progress.player_id == player_id, Progress.id.in_(progress_ids)))
+    batch = _Batch(player_id, {progress.id: progress for progress in rows})
+
+    result = SyncResult()
+    rejected: list[str] = []
+    try:
+        for event in events:
+            key = event.idempotency_key
+            if key not in claimed or first[key] is not event:
+                result.results.append(EventResult(idempotency_key=key, outcome=EventOutcome.DUPLICATE))
+                continue
+
+            at = min(_utc(event.client_timestamp), now)
+            if isinstance(event, BugHuntEvent):
+                detail = await _apply_bug_hunt(db, batch, event, at)
+            else:
+                detail = await _apply_progress(db, batch, event, at)
+
+            if detail is None:
+                result.results.append(EventResult(idempotency_key=key, outcome=EventOutcome.APPLIED))
+            else:
+                rejected.append(key)
+                result.results.append(EventResult(idempotency_key=key, outcome=EventOutcome.REJECTED, detail=detail))
+
+        # Rejected events may be fixed and resent under the same key
+        if rejected:
+            await db.execute(
+                delete(ClientEvent).where(ClientEvent.player_id == player_id, ClientEvent.idempotency_key.in_(rejected))
+            )
+
+        if batch.progress_changed:
+            await db.flush()
+            await progress_state_service.rebuild(db, player_id)
+            response_cache_service.bump(db, player_id)
+
+        result.achievements_unlocked = await achievement_service.check_and_unlock_for_actions(
+            player_id, batch.actions, db, commit=False
+        )
+        result.xp_earned = batch.xp_earned + sum(a.xp_reward for a in result.achievements_unlocked)
+
+        await db.commit()
+    except Exception:
+        for game in batch.finished_games:
+            game_session_service.restore_game(game)  # Nothing was committed, allow a retry
+        raise
+
+    return result
@@ -0,0 +1,150 @@
+"""Unlock service - Class unlocks as one conflict-free INSERT with the prerequisite check inside it."""
+
+from dataclasses import dataclass
+
+from app.models.player import Player
+from app.models.progress import Progress
+from app.schemas.progress import ProgressStatus
+from app.services import content_service, progress_state_service, response_cache_service
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Why an unlock inserted nothing
+NOT_FOUND = "not_found"  # Class not in the curriculum
+ALREADY_EXISTS = "already_exists"
+PREREQUISITES_NOT_MET = "prerequisites_not_met"
+
+_UNIQUE_KEY = ["player_id", "module_number", "class_number"]
+
+
+@dataclass(frozen=True)
+class SkippedClass:
+    """A class a batch unlock left alone, and why."""
+    module_number: int
+    class_number: int
+    reason: str
+
+
+def _prerequisites(entry: content_service.CompiledClass) -> tuple[list[tuple[int, int]], int]:
+    """(module, class) pairs of a class's prerequisites, and how many must be completed."""
+    mask = entry.prerequisite_mask
+    pairs = [
+        (prerequisite.module_number, prerequisite.info.class_number)
+        for prerequisite in content_service.CLASS_TABLE
+        if mask >> prerequisite.class_id & 1
+    ]
+    return pairs, mask.bit_count()  # The "unreachable" bit has no pair: never satisfied
+
+
+async def unlock_class(
+    db: AsyncSession,
+    player_id: int,
+    entry: content_service.CompiledClass,
+    status: ProgressStatus = ProgressStatus.UNLOCKED
+) -> Progress | None:
+    """
+    Insert a class's Progress row if the player exists and has completed its prerequisites.
+
+    One `INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING`: the
+    player check, the prerequisite check (a count over the player's
+    completed prerequisites, served by the unique index) and the insert are
+    a single statement, so two concurrent unlocks of the same class cannot
+    both insert and neither fails on the unique constraint. Returns the new
+    row, or None if nothing was inserted (see `failure_reason`).
+    """
+    pairs, required = _prerequisites(entry)
+    source = select(
+        Player.id,
+        literal(entry.module_number),
+        literal(entry.info.class_number),
+        literal(status.value),
+        literal(0)
+    ).where(Player.id == player_id)
+    if required:
+        completed = (
+            select(func.count())
+            .where(
+                Progress.player_id == player_id,
+                Progress.status == ProgressStatus.COMPLETED.value,
+                tuple_(Progress.module_number, Progress.class_number).in_(pairs)
+            )
+            .scalar_subquery()
+        )
+        source = source.where(completed == required)
+
+    # The WHERE also lets SQLite parse ON CONFLICT after a SELECT
+    insert = (
+        sqlite_insert(Progress)
+        .from_select(["player_id", "module_number", "class_number", "status", "exercises_completed"], source)
+        .on_conflict_do_nothing(index_elements=_UNIQUE_KEY)
+        .returning(Progress)
+    )
+    return await db.scalar(insert)
+
+
+async def failure_reason(db: AsyncSession, player_id: int, module_number: int, class_number: int) -> str | None:
+    """
+    Why `unlock_class` inserted nothing: None (no such player), ALREADY_EXISTS or PREREQUISITES_NOT_MET.
+
+    One query, only run on the failure path.
+    """
+    row = (await db.execute(
+        select(Player.id, Progress.id)
+        .outerjoin(Progress, (Progress.player_id == Player.id)
+                   & (Progress.module_number == module_number)
+                   & (Progress.class_number == class_number))
+        .where(Player.id == player_id)
+    )).first()
+    if row is None:
+        return None
+    return ALREADY_EXISTS if row[1] is not None else PREREQUISITES_NOT_MET
+
+
+async def unlock_classes(
+    db: AsyncSession,
+    player_id: int,
+    classes: list[tuple[int, int]],
+    status: ProgressStatus = ProgressStatus.UNLOCKED
+) -> tuple[list[Progress], list[SkippedClass]]:
+    """
+    Unlock several classes for an existing player, in order, in the caller's transaction.
+
+    Each class is one `unlock_class` statement, so a class whose
+    prerequisites are completed earlier in the same batch (status
+    "completed") unlocks too. Classes that cannot be unlocked are skipped
+    rather than failing the batch. The progress state is rebuilt once at
+    the end instead of updated per class. Does not commit.
+    """
+    unlocked: list[Progress] = []
+    failed: list[tuple[int, int]] = []
+    skipped: list[SkippedClass] = []
+
+    for module_number, class_number in classes:
+        entry = content_service.get_class_entry(module_number, class_number)
+        if entry is None:
+            skipped.append(SkippedClass(module_number, class_number, NOT_FOUND))
+            continue
+        progress = await unlock_class(db, player_id, entry, status)
+        if progress is None:
+            failed.append((module_number, class_number))
+        else:
+            unlocked.append(progress)
+
+    if failed:
+        existing = set((await db.execute(
+            select(Progress.module_number, Progress.class_number).where(
+                Progress.player_id == player_id,
+                tuple_(Progress.module_number, Progress.class_number).in_(failed)
+            )
+        )).tuples())
+        skipped.extend(
+            SkippedClass(*pair, ALREADY_EXISTS if pair in existing else PREREQUISITES_NOT_MET)
+            for pair in failed
+        )
+
+    if unlocked:
+        await progress_state_service.rebuild(db, player_id)
+        response_cache_service.bump(db, player_id)
+
+    return unlocked, skipped
@@ -1,9 +1,17 @@
 """XP service - Centralized XP and leveling logic."""
 
+from collections.abc import Collection
+
+from app.database import commit_buffer, sql_function
 from app.models.player import Player
+from app.models.xp_ledger import XPLedgerEntry
+from app.services import event_service, player_service, rank_service, response_cache_service
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
+@sql_function("xp_level", 1)
 def calculate_level_from_xp(xp: int) -> int:
     """
     Calculate player level based on total XP.
@@ -76,20 +84,46 @@ def get_xp_progress_to_next_level(current_xp: int) -> dict:
     }
 
 
-def award_xp(
+def _write_ledger(session: Session, entries: list[dict]) -> None:
+    """Insert buffered ledger entries in one batch (runs right before commit)."""
+    session.execute(insert(XPLedgerEntry), entries)
+
+
+async def _set_xp(db: AsyncSession, player_id: int, new_xp, *guards):
+    """Set a player's XP (value or SQL expression) and recompute the level; returns (xp, level), None if no row."""
+    result = await db.execute(
+        update(Player)
+        .where(Player.id == player_id, *guards)
+        .values(xp=new_xp, level=func.xp_level(new_xp))
+        .returning(Player.xp, Player.level)
+    )
+    return result.one_or_none()
+
+
+async def award_xp(
     player_id: int,
     xp_amount: int,
-    db: Session,
-    reason: str = ""
+    db: AsyncSession,
+    reason: str = "",
+    commit: bool = True
 ) -> dict:
     """
     Award XP to a player and update their level.
 
+    A single atomic `UPDATE ... RETURNING`: XP is added in the database and
+    the level recomputed in the same statement (SQL function `xp_level`), so
+    concurrent awards never overwrite each other. Penalties, which are
+    clamped at 0, read the balance first and apply it guarded on it being
+    unchanged, so the previous balance is the real one. The award is buffered for
+    the xp_ledger and inserted with the rest of the transaction's entries
+    right before commit.
+
     Args:
         player_id: Player ID
         xp_amount: Amount of XP to award (can be negative for penalties)
         db: Database session
         reason: Optional reason for XP award (for logging)
+        commit: Commit immediately (False when part of a larger transaction)
 
     Returns:
         dict with:
@@ -101,32 +135,71 @@ def award_xp(
         - leveled_up: True if player leveled up
         - reason: Reason for XP award
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
-        raise ValueError(f"Player with ID {player_id} not found")
-
-    previous_xp = player.xp
-    previous_level = player.level
-
-    # Award XP (ensure non-negative)
-    player.xp = max(0, player.xp + xp_amount)
-
-    # Recalculate level
-    player.level = calculate_level_from_xp(player.xp)
-
-    db.commit()
-    db.refresh(player)
-
-    return {
+    if xp_amount >= 0:
+        row = await _set_xp(db, player_id, Player.xp + xp_amount)
+        if row is None:
+            raise ValueError(f"Player with ID {player_id} not found")
+        previous_xp = row.xp - xp_amount  # Nothing was clamped, so the returned balance gives it exactly
+    else:
+        # A penalty is clamped at 0, so the returned balance does not tell what it was: read it,
+        # and apply only if no concurrent award changed it in between (else read again)
+        row = None
+        while row is None:
+            previous_xp = await db.scalar(select(Player.xp).where(Player.id == player_id))
+            if previous_xp is None:
+                raise ValueError(f"Player with ID {player_id} not found")
+            row = await _set_xp(db, player_id, max(0, previous_xp + xp_amount), Player.xp == previous_xp)
+
+    response_cache_service.bump(db, player_id)
+    rank_service.record_score(db, rank_service.XP, player_id, row.xp)
+    commit_buffer(db, "xp_ledger", _write_ledger).append({
+        "player_id": player_id,
+        "amount": xp_amount,
+        "balance_after": row.xp,
+        "level_after": row.level,
+        "reason": reason,
+    })
+
+    previous_level = calculate_level_from_xp(previous_xp)
+    award = {
         "previous_xp": previous_xp,
-        "new_xp": player.xp,
+        "new_xp": row.xp,
         "xp_gained": xp_amount,
         "previous_level": previous_level,
-        "new_level": player.level,
-        "leveled_up": player.level > previous_level,
+        "new_level": row.level,
+        "leveled_up": row.level > previous_level,
         "reason": reason
     }
 
+    event_service.publish(db, player_id, event_service.XP_AWARDED, award)
+    if award["leveled_up"]:
+        event_service.publish(db, player_id, event_service.LEVEL_UP, {
+            "previous_level": previous_level,
+            "new_level": row.level,
+            "new_xp": row.xp
+        })
+
+    if commit:
+        await db.commit()
+
+    return award
+
+
+async def get_xp_history(player_id: int, db: AsyncSession, limit: int = 50) -> list[XPLedgerEntry]:
+    """Get a player's most recent XP awards from the ledger (newest first)."""
+    result = await db.execute(
+        select(XPLedgerEntry)
+        .where(XPLedgerEntry.player_id == player_id)
+        .order_by(XPLedgerEntry.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def remove_players(db: AsyncSession, player_ids: Collection[int]) -> None:
+    """Remove players' ledger entries."""
+    await db.execute(delete(XPLedgerEntry).where(XPLedgerEntry.player_id.in_(player_ids)))
+
 
 def get_level_title(level: int) -> str:
     """
@@ -157,7 +230,7 @@ def get_level_title(level: int) -> str:
         return "Legend"
 
 
-def get_player_rank_info(player_id: int, db: Session) -> dict:
+async def get_player_rank_info(player_id: int, db: AsyncSession) -> dict:
     """
     Get complete rank information for a player.
 
@@ -167,7 +240,7 @@ def get_player_rank_info(player_id: int, db: Session) -> dict:
     - xp: Total XP
     - xp_progress: Progress info to next level
     """
-    player = db.query(Player).filter(Player.id == player_id).first()
+    player = await player_service.get_player(db, player_id)
     if not player:
         raise ValueError(f"Player with ID {player_id} not found")
 
@@ -0,0 +1 @@
+"""Benchmarks package - performance measurements for the game backend."""
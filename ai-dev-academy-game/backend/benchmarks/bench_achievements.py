@@ -0,0 +1,135 @@
+"""
+Query-count benchmark for achievement evaluation.
+
+Seeds a temporary SQLite database with players whose stats make 0, 1 or
+several achievements due, then runs achievement_service.check_and_unlock_achievements
+for each and reports SQL statements, commits and latency per scenario.
+
+Evaluation loads one stats snapshot and writes every unlock plus the
+summed XP in a single transaction, so statements and commits stay flat no
+matter how many achievements unlock at once.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_achievements
+    python -m benchmarks.bench_achievements --iterations 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_achievements_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'bench.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import AsyncSessionLocal, Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.models import Player, PlayerStats  # noqa: E402
+from app.services import achievement_service  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+# scenario -> (classes_completed, expected unlocks)
+SCENARIOS = {
+    "no_unlock": (0, 0),
+    "one_unlock": (1, 1),
+    "four_unlocks": (20, 4),
+}
+
+
+class StatementCounter:
+    """Counts statements and commits on the async engine."""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._on_statement)
+        event.listen(async_engine.sync_engine, "commit", self._on_commit)
+
+    def _on_statement(self, *_):
+        self.statements += 1
+
+    def _on_commit(self, *_):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def seed_players(iterations: int) -> dict[str, list[int]]:
+    """Create `iterations` fresh players per scenario (each unlock runs once per player)."""
+    Base.metadata.create_all(bind=engine)
+    player_ids = {}
+
+    with SessionLocal() as db:
+        for scenario, (classes_completed, _) in SCENARIOS.items():
+            players = [Player(username=f"{scenario}_{i}", avatar="default.png") for i in range(iterations)]
+            db.add_all(players)
+            db.flush()
+            db.add_all([PlayerStats(player_id=p.id, classes_completed=classes_completed) for p in players])
+            player_ids[scenario] = [p.id for p in players]
+        db.commit()
+
+    return player_ids
+
+
+async def run_scenario(player_ids: list[int], expected: int, counter: StatementCounter) -> dict:
+    latencies = []
+    statements = []
+    commits = []
+
+    for player_id in player_ids:
+        counter.reset()
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            unlocked = await achievement_service.check_and_unlock_achievements(
+                player_id, "complete_class", {}, db
+            )
+        latencies.append((time.perf_counter() - start) * 1000)
+        statements.append(counter.statements)
+        commits.append(counter.commits)
+        assert len(unlocked) == expected, (len(unlocked), expected)
+
+    return {
+        "unlocks": expected,
+        "statements": max(statements),
+        "commits": max(commits),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    player_ids = seed_players(args.iterations)
+    counter = StatementCounter()
+
+    results = {
+        scenario: await run_scenario(player_ids[scenario], expected, counter)
+        for scenario, (_, expected) in SCENARIOS.items()
+    }
+
+    return {
+        "benchmark": "achievement_evaluation",
+        "iterations": args.iterations,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100, help="Players evaluated per scenario")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Concurrency benchmark for the async database layer.
+
+Seeds a temporary SQLite database, then fires batches of concurrent read
+requests at the app in-process (httpx + ASGITransport) and reports
+throughput per concurrency level for two modes:
+
+- blocking: routes get a sync Session behind an async facade, so every
+  query blocks the event loop (the behaviour before AsyncSession).
+- async: routes get the real AsyncSession from app.database.get_db.
+
+The headline results are measured against the database as it is, with
+nothing injected. A local SQLite file answers in microseconds, so there
+the two modes are close.
+
+With --io-latency-ms N > 0 a second pass follows, in which every
+statement also waits N ms to model a disk or network database: the sync
+driver blocks the thread while waiting, the async driver awaits. The
+scaling that pass shows (flat with the blocking session, growing with the
+async one until the pool saturates) comes from the simulated wait and is
+only as real as that latency is for the deployment.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_async_db
+    python -m benchmarks.bench_async_db --requests 600 --concurrency 1 8 32 --io-latency-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_async_db_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'bench.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import BugHuntGame, Player, PlayerStats  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+
+
+class BlockingSession:
+    """Async-looking facade over a sync Session: every call blocks the event loop."""
+
+    def __init__(self, session):
+        self._session = session
+
+    @property
+    def sync_session(self):
+        return self._session  # Services read the identity map through it, as on AsyncSession
+
+    async def execute(self, *args, **kwargs):
+        return self._session.execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return self._session.scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return self._session.scalars(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self._session.get(*args, **kwargs)
+
+    async def commit(self):
+        self._session.commit()
+
+    async def flush(self):
+        self._session.flush()
+
+    async def refresh(self, instance):
+        self._session.refresh(instance)
+
+    async def delete(self, instance):
+        self._session.delete(instance)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+async def get_blocking_db():
+    """Dependency override reproducing the pre-async session behaviour."""
+    db = SessionLocal()
+    try:
+        yield BlockingSession(db)
+    finally:
+        db.close()
+
+
+# Simulated I/O wait per statement in seconds (0 = none), set per pass
+_io_latency = 0.0
+
+
+def install_io_latency() -> None:
+    """Make every statement wait `_io_latency`, blocking on the sync engine and awaiting on the async one."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def blocking_wait(*_):
+        if _io_latency:
+            time.sleep(_io_latency)
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def async_wait(*_):
+        if _io_latency:
+            await_only(asyncio.sleep(_io_latency))
+
+
+def seed_database(players: int, games: int) -> list[int]:
+    """Create players and a bug hunt history large enough for real query cost."""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with SessionLocal() as db:
+        db.execute(insert(Player), [
+            {"username": f"bench_{i}", "avatar": "default.png", "level": 1, "xp": rng.randint(0, 5000)}
+            for i in range(players)
+        ])
+        player_ids = [row[0] for row in db.execute(Player.__table__.select().with_only_columns(Player.id))]
+        db.execute(insert(PlayerStats), [{"player_id": pid} for pid in player_ids])
+        db.execute(insert(BugHuntGame), [
+            {
+                "player_id": rng.choice(player_ids),
+                "template_id": "bug_001",
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+                "bugs_found": 1,
+                "bugs_total": 1,
+                "time_seconds": rng.uniform(10, 200),
+                "score": rng.randint(0, 1200),
+                "xp_earned": 50,
+                "started_at": now - timedelta(minutes=i),
+                "completed_at": now - timedelta(minutes=i),
+            }
+            for i in range(games)
+        ])
+        db.commit()
+
+    return player_ids
+
+
+async def run_level(client: httpx.AsyncClient, paths: list[str], concurrency: int) -> dict:
+    """Send all paths with at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(path: str) -> None:
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in paths))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(paths),
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(len(paths) / elapsed, 1),
+    }
+
+
+async def run_modes(paths: list[str], concurrency: list[int], io_latency_ms: float) -> dict:
+    """Run every concurrency level in both modes, with `io_latency_ms` injected per statement."""
+    global _io_latency
+    _io_latency = io_latency_ms / 1000
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    for mode in ("blocking", "async"):
+        if mode == "blocking":
+            app.dependency_overrides[get_db] = get_blocking_db
+        else:
+            app.dependency_overrides.pop(get_db, None)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run_level(client, paths[:20], 4)  # Warm up pools and caches
+            results[mode] = [await run_level(client, paths, c) for c in concurrency]
+
+    app.dependency_overrides.pop(get_db, None)
+    _io_latency = 0.0
+    return results
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    player_ids = seed_database(args.players, args.games)
+    install_io_latency()
+    rng = random.Random(7)
+    paths = [
+        "/api/minigames/bug-hunt/leaderboard?limit=10" if i % 2 else f"/api/player/{rng.choice(player_ids)}"
+        for i in range(args.requests)
+    ]
+
+    report = {
+        "benchmark": "async_db_concurrency",
+        "players": args.players,
+        "games": args.games,
+        "io_latency_ms": 0,
+        "results": await run_modes(paths, args.concurrency, 0),
+    }
+    if args.io_latency_ms > 0:
+        report["simulated_io"] = {
+            "io_latency_ms": args.io_latency_ms,
+            "note": "Every statement waits io_latency_ms on top of the database; "
+                    "the async-vs-blocking gap here depends on that simulated wait",
+            "results": await run_modes(paths, args.concurrency, args.io_latency_ms),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument(
+        "--io-latency-ms", type=float, default=2.0,
+        help="Simulated I/O wait per statement for the second pass (0 skips it; the headline pass never waits)"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
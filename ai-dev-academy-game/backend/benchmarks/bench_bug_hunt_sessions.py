@@ -0,0 +1,241 @@
+"""
+Load test for Bug Hunt start + submit.
+
+Seeds a temporary SQLite database with players, then plays games through
+the app in-process (httpx + ASGITransport) and reports throughput for two
+modes:
+
+- database: the previous flow, mounted here under /legacy. Start inserts
+  and commits a placeholder bug_hunt_games row; submit re-reads it,
+  updates it and commits again.
+- store: the real endpoints. Start keeps the game in the in-process
+  session store and writes nothing; submit inserts one finished row.
+
+A share of the started games (--abandon-rate) is never submitted, as
+happens when players close the tab. With the store those games cost no
+SQLite writes at all; the report includes the rows each mode leaves behind.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_bug_hunt_sessions
+    python -m benchmarks.bench_bug_hunt_sessions --games 1000 --concurrency 1 16 --abandon-rate 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_bug_hunt_sessions_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'bench.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from app.content.bug_templates import get_answer_key, get_random_template, get_template_by_id  # noqa: E402
+from app.database import Base, SessionLocal, engine, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import (  # noqa: E402
+    BugHuntDailyBest,
+    BugHuntGame,
+    BugHuntLeaderboard,
+    Player,
+    PlayerBugHuntRollup,
+    PlayerStats,
+)
+from app.schemas.minigame import BugHuntStartRequest, BugHuntSubmitRequest  # noqa: E402
+from app.services import bug_hunt_stats_service, game_session_service, leaderboard_service, xp_service  # noqa: E402
+from app.services.bug_hunt_service import calculate_bug_hunt_score  # noqa: E402
+from fastapi import APIRouter, Depends, HTTPException  # noqa: E402
+from sqlalchemy import delete, func, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+legacy_router = APIRouter()
+
+
+@legacy_router.post("/start")
+async def legacy_start(request: BugHuntStartRequest, db: AsyncSession = Depends(get_db)):
+    """Start as it was: a placeholder row inserted and committed per game."""
+    player = await db.scalar(select(Player).where(Player.id == request.player_id))
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    template = get_random_template(difficulty=request.difficulty)
+    game = BugHuntGame(
+        player_id=request.player_id,
+        template_id=template.id,
+        difficulty=template.difficulty,
+        bugs_total=len(template.bugs),
+        bugs_found=0,
+        time_seconds=0,
+        score=0,
+        xp_earned=0,
+        started_at=datetime.utcnow()
+    )
+    db.add(game)
+    await db.commit()
+    await db.refresh(game)
+    return {"session_id": game.id, "template_id": template.id}
+
+
+@legacy_router.post("/submit")
+async def legacy_submit(request: BugHuntSubmitRequest, db: AsyncSession = Depends(get_db)):
+    """Submit as it was: re-read the placeholder row, update it, commit again."""
+    game = await db.scalar(select(BugHuntGame).where(BugHuntGame.id == request.session_id))
+    if not game:
+        raise HTTPException(status_code=404, detail="Game session not found")
+
+    template = get_template_by_id(game.template_id)
+    answer_key = get_answer_key(game.template_id)
+    submitted = set(request.found_bug_lines)
+    found = submitted & answer_key.bug_lines
+    false_positives = submitted - answer_key.bug_lines
+    score, xp_earned = calculate_bug_hunt_score(
+        len(found), len(answer_key.bug_lines), request.time_seconds, len(false_positives), template.difficulty
+    )
+    is_perfect = found == answer_key.bug_lines and not false_positives
+
+    game.bugs_found = len(found)
+    game.time_seconds = request.time_seconds
+    game.score = score
+    game.xp_earned = xp_earned
+    game.found_bugs = list(found)
+    game.missed_bugs = list(answer_key.bug_lines - submitted)
+    game.false_positives = list(false_positives)
+    game.completed_at = datetime.utcnow()
+
+    player = await db.scalar(select(Player).where(Player.id == request.player_id))
+    await xp_service.award_xp(player.id, xp_earned, db, reason=f"Bug Hunt game {game.id}", commit=False)
+    stats = await db.scalar(select(PlayerStats).where(PlayerStats.player_id == request.player_id))
+    stats.bug_hunt_games_played += 1
+    if is_perfect:
+        stats.bug_hunt_wins += 1
+
+    await db.flush()
+    await bug_hunt_stats_service.record_game(db, game, is_perfect, game.accuracy)
+    await leaderboard_service.record_game(db, game, player.username)
+    await db.commit()
+    return {"score": score}
+
+
+app.include_router(legacy_router, prefix="/legacy/bug-hunt")
+
+MODES = {
+    "database": "/legacy/bug-hunt",
+    "store": "/api/minigames/bug-hunt",
+}
+
+
+def seed_database(players: int) -> list[int]:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(insert(Player), [
+            {"username": f"bench_{i}", "avatar": "default.png", "level": 1, "xp": 0}
+            for i in range(players)
+        ])
+        player_ids = list(db.scalars(select(Player.id)))
+        db.execute(insert(PlayerStats), [{"player_id": pid} for pid in player_ids])
+        db.commit()
+    return player_ids
+
+
+def reset_games() -> None:
+    """Clear game data between runs so both modes start from the same state."""
+    with SessionLocal() as db:
+        for model in (BugHuntLeaderboard, BugHuntDailyBest, PlayerBugHuntRollup, BugHuntGame):  # Games last: referenced
+            db.execute(delete(model))
+        db.commit()
+    game_session_service.reset()
+    leaderboard_service.reset_cache()
+
+
+def count_games() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count(BugHuntGame.id)))
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    prefix: str,
+    player_ids: list[int],
+    games: int,
+    concurrency: int,
+    abandon_rate: float
+) -> dict:
+    """Play `games` games with at most `concurrency` in flight."""
+    rng = random.Random(11)
+    plan = [(rng.choice(player_ids), rng.random() < abandon_rate) for _ in range(games)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(player_id: int, abandon: bool) -> None:
+        async with semaphore:
+            response = await client.post(f"{prefix}/start", json={"player_id": player_id})
+            response.raise_for_status()
+            if abandon:
+                return
+            start = response.json()
+            lines = sorted(get_answer_key(start["template_id"]).bug_lines)
+            response = await client.post(f"{prefix}/submit", json={
+                "session_id": start["session_id"],
+                "player_id": player_id,
+                "found_bug_lines": lines,
+                "time_seconds": 42.0,
+            })
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(player_id, abandon) for player_id, abandon in plan))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "games_started": games,
+        "games_submitted": sum(1 for _, abandon in plan if not abandon),
+        "seconds": round(elapsed, 4),
+        "games_per_second": round(games / elapsed, 1),
+        "bug_hunt_game_rows": count_games(),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    player_ids = seed_database(args.players)
+    transport = httpx.ASGITransport(app=app)
+
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode, prefix in MODES.items():
+            results[mode] = []
+            for concurrency in args.concurrency:
+                reset_games()
+                results[mode].append(
+                    await run_level(client, prefix, player_ids, args.games, concurrency, args.abandon_rate)
+                )
+
+    return {
+        "benchmark": "bug_hunt_start_submit",
+        "players": args.players,
+        "abandon_rate": args.abandon_rate,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--games", type=int, default=400, help="Games started per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--abandon-rate", type=float, default=0.3, help="Share of started games never submitted")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Mixed-traffic load test for the game API.
+
+Seeds players through the API itself (each completes a random prefix of
+the curriculum, has one class in progress, plays a few Bug Hunt games and
+gets its achievements checked), then replays a fixed, seeded plan of mixed
+requests with a pool of concurrent clients:
+
+- progress polling: full progress and next-unlockable, sent with the last
+  ETag seen for that player, as the dashboard does
+- player profile and achievement reads
+- exercise increments on the class in progress
+- Bug Hunt start + submit
+- leaderboard reads (global and per difficulty, all-time and rolling)
+
+By default requests go to the app in-process (httpx + ASGITransport) over a
+throwaway SQLite database. With --url they go to a running server instead
+(e.g. `uvicorn app.main:app`), which is seeded the same way over HTTP.
+
+The JSON report has latency percentiles (ms) and status codes per endpoint,
+overall throughput and the git commit, so runs can be diffed across commits
+(--output writes it to a file as well).
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --players 500 --requests 20000 --concurrency 32 --output before.json
+    python -m benchmarks.bench_load --url http://127.0.0.1:8000 --players 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_load_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'bench.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from app.content.bug_templates import get_answer_key  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.content_service import CLASS_TABLE  # noqa: E402
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Share of the request plan per operation (Bug Hunt counts as one operation, two requests)
+DEFAULT_MIX = {
+    "progress_poll": 35,
+    "next_unlockable_poll": 10,
+    "player_read": 10,
+    "achievements_read": 10,
+    "exercise_update": 10,
+    "bug_hunt_game": 10,
+    "leaderboard_read": 15,
+    "rank_read": 5,
+}
+
+
+class Recorder:
+    """Latencies and status codes per endpoint (route template)."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.enabled = True
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if self.enabled:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][response.status_code] += 1
+        return response
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, seconds: float) -> dict:
+    endpoints = {}
+    for endpoint, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "requests_per_second": round(len(values) / seconds, 1),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            **{f"p{p}_ms": round(percentile(values, p) * 1000, 3) for p in (50, 90, 99)},
+            "max_ms": round(values[-1] * 1000, 3),
+            "status_codes": {str(code): count for code, count in sorted(recorder.statuses[endpoint].items())},
+        }
+    total = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "requests": total,
+        "seconds": round(seconds, 4),
+        "requests_per_second": round(total / seconds, 1),
+        "endpoints": endpoints,
+    }
+
+
+# Seeding
+
+
+class SeededPlayer:
+    def __init__(self, player_id: int):
+        self.player_id = player_id
+        self.in_progress_id: int | None = None
+        self.exercises = 0
+        self.etags: dict[str, str] = {}
+
+
+async def play_bug_hunt(client: httpx.AsyncClient, recorder: Recorder, player_id: int, rng: random.Random) -> None:
+    """Start a game and submit a plausible answer (most bugs found, the odd false positive)."""
+    response = await recorder.request(
+        client, "POST /api/minigames/bug-hunt/start", "POST", "/api/minigames/bug-hunt/start",
+        json={"player_id": player_id, "difficulty": rng.choice(DIFFICULTIES)}
+    )
+    response.raise_for_status()
+    start = response.json()
+
+    bug_lines = sorted(get_answer_key(start["template_id"]).bug_lines)
+    found = [line for line in bug_lines if rng.random() < 0.8]
+    if rng.random() < 0.2:
+        found.append(max(bug_lines) + 1)
+    response = await recorder.request(
+        client, "POST /api/minigames/bug-hunt/submit", "POST", "/api/minigames/bug-hunt/submit",
+        json={
+            "session_id": start["session_id"],
+            "player_id": player_id,
+            "found_bug_lines": found,
+            "time_seconds": round(rng.uniform(20, 300), 1),
+        }
+    )
+    response.raise_for_status()
+
+
+async def seed_player(client: httpx.AsyncClient, index: int, rng: random.Random) -> SeededPlayer:
+    """One player with a realistic history, built through the public API."""
+    recorder = Recorder()
+    recorder.enabled = False
+
+    response = await client.post("/api/player/", json={"username": f"load_{index}", "avatar": "default.png"})
+    response.raise_for_status()
+    player = SeededPlayer(response.json()["id"])
+
+    # Most players are early in the curriculum, a few have finished it
+    completed = min(len(CLASS_TABLE) - 1, int(rng.betavariate(1.2, 3) * len(CLASS_TABLE)))
+    for entry in CLASS_TABLE[:completed + 1]:
+        response = await client.post("/api/progress/", json={
+            "player_id": player.player_id,
+            "module_number": entry.module_number,
+            "class_number": entry.info.class_number,
+            "status": "in_progress",
+        })
+        response.raise_for_status()
+        progress_id = response.json()["id"]
+        if entry is CLASS_TABLE[completed]:
+            player.in_progress_id = progress_id
+            break
+        response = await client.patch(f"/api/progress/{progress_id}", json={
+            "status": "completed", "exercises_completed": entry.info.exercises_count
+        })
+        response.raise_for_status()
+
+    for _ in range(rng.choice((0, 0, 1, 2, 3, 5, 8))):
+        await play_bug_hunt(client, recorder, player.player_id, rng)
+
+    for action_type in ("complete_class", "bug_hunt_win"):
+        response = await client.post("/api/achievements/check", json={
+            "player_id": player.player_id, "action_type": action_type
+        })
+        response.raise_for_status()
+
+    return player
+
+
+async def seed(client: httpx.AsyncClient, players: int, concurrency: int, seed_value: int) -> list[SeededPlayer]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> SeededPlayer:
+        async with semaphore:
+            return await seed_player(client, index, random.Random(seed_value * 100_003 + index))
+
+    return list(await asyncio.gather(*(one(index) for index in range(players))))
+
+
+# Traffic
+
+
+async def run_operation(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    operation: str,
+    player: SeededPlayer,
+    rng: random.Random
+) -> None:
+    pid = player.player_id
+
+    async def poll(endpoint: str, url: str) -> None:
+        headers = {"If-None-Match": player.etags[url]} if url in player.etags else {}
+        response = await recorder.request(client, endpoint, "GET", url, headers=headers)
+        if "etag" in response.headers:
+            player.etags[url] = response.headers["etag"]
+
+    if operation == "progress_poll":
+        await poll("GET /api/progress/{player_id}", f"/api/progress/{pid}")
+    elif operation == "next_unlockable_poll":
+        await poll("GET /api/progress/{player_id}/next-unlockable", f"/api/progress/{pid}/next-unlockable")
+    elif operation == "player_read":
+        await recorder.request(client, "GET /api/player/{player_id}", "GET", f"/api/player/{pid}")
+    elif operation == "achievements_read":
+        await recorder.request(
+            client, "GET /api/achievements/player/{player_id}", "GET", f"/api/achievements/player/{pid}"
+        )
+    elif operation == "exercise_update":
+        player.exercises += 1
+        await recorder.request(
+            client, "PATCH /api/progress/{progress_id}", "PATCH", f"/api/progress/{player.in_progress_id}",
+            json={"exercises_completed": player.exercises}
+        )
+    elif operation == "bug_hunt_game":
+        await play_bug_hunt(client, recorder, pid, rng)
+    elif operation == "leaderboard_read":
+        params = {"limit": rng.choice((10, 10, 50, 100))}
+        if rng.random() < 0.5:
+            params["difficulty"] = rng.choice(DIFFICULTIES)
+        params["period"] = rng.choice(("all", "all", "day", "week", "month"))
+        await recorder.request(
+            client, "GET /api/minigames/bug-hunt/leaderboard", "GET", "/api/minigames/bug-hunt/leaderboard",
+            params=params
+        )
+    elif operation == "rank_read":
+        await recorder.request(client, "GET /api/player/{player_id}/rank", "GET", f"/api/player/{pid}/rank")
+    else:
+        raise ValueError(f"Unknown operation: {operation}")
+
+
+async def run_traffic(
+    client: httpx.AsyncClient,
+    players: list[SeededPlayer],
+    operations: int,
+    concurrency: int,
+    mix: dict[str, int],
+    rng: random.Random,
+    recorder: Recorder
+) -> float:
+    """Run a seeded plan of `operations` operations with `concurrency` workers. Returns seconds taken."""
+    names = list(mix)
+    plan = list(zip(
+        rng.choices(names, weights=[mix[name] for name in names], k=operations),
+        rng.choices(players, k=operations),
+        [random.Random(rng.random()) for _ in range(operations)]
+    ))
+    queue = iter(plan)
+
+    async def worker() -> None:
+        for operation, player, op_rng in queue:
+            await run_operation(client, recorder, operation, player, op_rng)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(values: list[str] | None) -> dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for value in values or []:
+        name, _, weight = value.partition("=")
+        if name not in DEFAULT_MIX or not weight.isdigit():
+            raise SystemExit(f"--mix expects name=weight with name in {sorted(DEFAULT_MIX)}, got {value!r}")
+        mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        Base.metadata.create_all(bind=engine)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    rng = random.Random(args.seed)
+    async with client:
+        seed_start = time.perf_counter()
+        players = await seed(client, args.players, args.concurrency, args.seed)
+        seed_seconds = time.perf_counter() - seed_start
+
+        mix = parse_mix(args.mix)
+        warmup = Recorder()
+        warmup.enabled = False
+        await run_traffic(client, players, args.warmup, args.concurrency, mix, rng, warmup)
+
+        recorder = Recorder()
+        seconds = await run_traffic(client, players, args.requests, args.concurrency, mix, rng, recorder)
+
+    return {
+        "benchmark": "mixed_load",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "players": args.players,
+        "operations": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "mix": mix,
+        "seed_seconds": round(seed_seconds, 2),
+        "results": summarize(recorder, seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000, help="Operations in the measured run")
+    parser.add_argument("--warmup", type=int, default=500, help="Operations run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mix", nargs="*", metavar="NAME=WEIGHT", help=f"Override weights of {sorted(DEFAULT_MIX)}")
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
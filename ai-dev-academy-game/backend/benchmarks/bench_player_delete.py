@@ -0,0 +1,190 @@
+"""
+Player deletion benchmark: object-graph delete vs set-based bulk delete.
+
+Seeds a SQLite file with players that have large histories (every class
+of the curriculum, achievements, thousands of Bug Hunt games and XP
+ledger entries each), then deletes the same players three ways, each on
+a fresh copy of the data:
+
+- orm_graph: what deleting through the ORM costs without passive deletes:
+  each player is loaded with all its relationships and every row is
+  deleted through the session (plus the service-owned tables)
+- db_cascade: one `DELETE FROM players WHERE id IN (...)`, children removed
+  by the foreign keys' ON DELETE CASCADE (PRAGMA foreign_keys = ON)
+- bulk: player_admin_service.delete_players, one DELETE per table for all
+  players (what DELETE /api/player/{id} and the admin bulk endpoint run)
+
+Reports elapsed time and SQL statements per mode, and checks that every
+mode leaves the same rows behind.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_player_delete
+    python -m benchmarks.bench_player_delete --players 40 --delete 20 --games 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it (settings are read at import)
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_player_delete_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'unused.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import Base, apply_sqlite_pragmas, sqlite_pragmas  # noqa: E402
+from app.metrics import count_queries, instrument_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Achievement,
+    BugHuntGame,
+    Player,
+    PlayerStats,
+    Progress,
+    XPLedgerEntry,
+)
+from app.services import (  # noqa: E402
+    bug_hunt_stats_service,
+    content_service,
+    leaderboard_service,
+    player_admin_service,
+    progress_state_service,
+    streak_service,
+    xp_service,
+)
+from sqlalchemy import create_engine, delete, func, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+PRAGMAS = sqlite_pragmas("performance")
+MODES = ("orm_graph", "db_cascade", "bulk")
+COUNTED = (Player, PlayerStats, Progress, Achievement, BugHuntGame, XPLedgerEntry)
+
+
+def seed_database(path: Path, args: argparse.Namespace) -> list[int]:
+    """Create players with large histories."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with engine.begin() as connection:
+        connection.execute(insert(Player), [
+            {"username": f"bench_{i}", "avatar": "default.png", "level": 1, "xp": 0} for i in range(args.players)
+        ])
+        player_ids = list(connection.scalars(select(Player.id)))
+        connection.execute(insert(PlayerStats), [{"player_id": pid} for pid in player_ids])
+        for player_id in player_ids:
+            connection.execute(insert(Progress), [
+                {"player_id": player_id, "module_number": entry.module_number,
+                 "class_number": entry.info.class_number, "status": "completed", "exercises_completed": 0}
+                for entry in content_service.CLASS_TABLE
+            ])
+            connection.execute(insert(Achievement), [
+                {"player_id": player_id, "achievement_id": f"bench_{i}"} for i in range(10)
+            ])
+            connection.execute(insert(BugHuntGame), [
+                {
+                    "player_id": player_id, "template_id": "bug_001", "difficulty": "easy", "bugs_found": 1,
+                    "bugs_total": 1, "time_seconds": 30.0, "score": rng.randint(0, 1200), "xp_earned": 50,
+                    "started_at": now - timedelta(minutes=i), "completed_at": now - timedelta(minutes=i),
+                }
+                for i in range(args.games)
+            ])
+            connection.execute(insert(XPLedgerEntry), [
+                {"player_id": player_id, "amount": 50, "balance_after": 50 * (i + 1), "level_after": 1,
+                 "reason": "bug_hunt"}
+                for i in range(args.games)
+            ])
+    engine.dispose()
+    return player_ids
+
+
+async def orm_graph(db, player_ids: list[int]) -> None:
+    players = await db.scalars(
+        select(Player).where(Player.id.in_(player_ids)).options(
+            selectinload(Player.progress), selectinload(Player.achievements), selectinload(Player.stats),
+            selectinload(Player.unlocked_tools), selectinload(Player.bug_hunt_games)
+        )
+    )
+    for player in players.all():
+        await leaderboard_service.remove_players(db, [player.id])
+        await bug_hunt_stats_service.remove_players(db, [player.id])
+        await xp_service.remove_players(db, [player.id])
+        await progress_state_service.remove_players(db, [player.id])
+        await streak_service.remove_players(db, [player.id])
+        for game in player.bug_hunt_games:  # No delete cascade on this relationship
+            await db.delete(game)
+        await db.delete(player)  # Cascades to the loaded progress, achievements, tools and stats
+        await db.flush()
+
+
+async def db_cascade(db, player_ids: list[int]) -> None:
+    await db.execute(delete(Player).where(Player.id.in_(player_ids)))
+
+
+async def bulk(db, player_ids: list[int]) -> None:
+    await player_admin_service.delete_players(db, player_ids)
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> dict:
+    path = Path(_TMP_DIR) / f"{mode}.db"
+    player_ids = seed_database(path, args)
+    targets = random.Random(7).sample(player_ids, args.delete)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    apply_sqlite_pragmas(engine.sync_engine, PRAGMAS)
+    instrument_engine(engine.sync_engine)
+    session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async with session_factory() as db:
+        with count_queries() as stats:
+            started = time.perf_counter()
+            await globals()[mode](db, targets)
+            await db.commit()
+            elapsed = time.perf_counter() - started
+        remaining = {
+            model.__tablename__: await db.scalar(select(func.count()).select_from(model)) for model in COUNTED
+        }
+    await engine.dispose()
+
+    return {
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "ms_per_player": round(elapsed * 1000 / args.delete, 2),
+        "statements": stats.count,
+        "remaining_rows": remaining,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    results = {mode: await run_mode(mode, args) for mode in MODES}
+    remaining = {json.dumps(result["remaining_rows"], sort_keys=True) for result in results.values()}
+    assert len(remaining) == 1, "modes left different rows behind"
+    return {
+        "benchmark": "player_delete",
+        "players": args.players,
+        "deleted": args.delete,
+        "games_per_player": args.games,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--delete", type=int, default=10, help="Players deleted per mode")
+    parser.add_argument("--games", type=int, default=2000, help="Bug Hunt games (and XP ledger entries) per player")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
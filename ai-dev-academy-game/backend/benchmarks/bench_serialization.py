@@ -0,0 +1,265 @@
+"""
+Serialization microbenchmark for the largest game API responses.
+
+For each endpoint, times turning the same raw data (rows as the services
+hand them to the route) into response bytes:
+
+- before: how the endpoint used to respond - response models built with
+  validation, FastAPI's response_model round trip (dump, validate again,
+  serialize) and stdlib json rendering; cached progress bodies went
+  through jsonable_encoder and stdlib json
+- model_construct: response models built without validation and dumped
+  once (for reference: on Pydantic 2 it is several times slower than
+  plain dicts, and no faster than validating for small models)
+- served: what the endpoint does now - plain dicts through
+  trusted_response, one model dump for cached progress bodies, or the
+  unchanged round trip rendered by FastJSONResponse
+
+Every mode must produce the same bytes. Reports microseconds per response.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --iterations 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Point the app at a throwaway database BEFORE importing it (nothing is written)
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_serialization_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'bench.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.responses import FastJSONResponse, dumps, orjson, trusted_response  # noqa: E402
+from app.routes.minigames import _ENTRY_FIELDS  # noqa: E402
+from app.schemas.achievement import AchievementWithDetails, PlayerAchievementsResponse  # noqa: E402
+from app.schemas.minigame import LeaderboardEntry, LeaderboardResponse  # noqa: E402
+from app.schemas.player import PlayerResponse  # noqa: E402
+from app.schemas.progress import FullProgressResponse  # noqa: E402
+from app.services import achievement_service, content_service  # noqa: E402
+from app.services.progress_state_service import ProgressState  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+NOW = datetime(2026, 1, 15, 12, 30, 45, 123456)
+
+_FIELDS: dict = {}
+
+
+def _fastapi_round_trip(response_model, content: object) -> object:
+    """FastAPI's response_model handling (a coroutine that never awaits: step it directly)."""
+    if response_model not in _FIELDS:
+        _FIELDS[response_model] = create_model_field("response", response_model, mode="serialization")
+    coroutine = serialize_response(field=_FIELDS[response_model], response_content=content)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response awaited")
+
+
+# Raw data, as the services hand it to the routes
+
+# A full page of 100 leaderboard entries
+LEADERBOARD_ROWS = [
+    {
+        "player_id": rank, "username": f"player_{rank}", "score": 2000 - rank * 7, "bugs_found": 3,
+        "bugs_total": 4, "time_seconds": 30.5 + rank, "accuracy": 75.0, "difficulty": "medium",
+        "completed_at": NOW - timedelta(minutes=rank),
+    }
+    for rank in range(1, 101)
+]
+
+# A player who has unlocked every achievement
+ACHIEVEMENT_ROWS = [
+    (SimpleNamespace(id=index, player_id=1, achievement_id=definition.achievement_id, unlocked_at=NOW), definition)
+    for index, definition in enumerate(achievement_service.get_all_achievement_definitions(), start=1)
+]
+
+# A page of 100 players
+PLAYER_ROWS = [
+    SimpleNamespace(
+        id=index, username=f"player_{index}", avatar="default.png", level=3, xp=450, created_at=NOW, last_login=NOW
+    )
+    for index in range(1, 101)
+]
+
+
+def _progress_state() -> ProgressState:
+    """A player halfway through the curriculum."""
+    state = ProgressState.from_progress([])
+    half = len(content_service.CLASS_TABLE) // 2
+    for class_id in range(half):
+        state.completed_mask |= 1 << class_id
+        state.exercises[class_id] = 3
+        state.completed_at[class_id] = int((NOW - timedelta(days=class_id)).timestamp() * 1_000_000)
+    state.in_progress_mask |= 1 << half
+    return state
+
+
+PROGRESS_STATE = _progress_state()
+
+
+# GET /api/minigames/bug-hunt/leaderboard?limit=100
+
+def leaderboard_before() -> bytes:
+    entries = [LeaderboardEntry(rank=rank, **entry) for rank, entry in enumerate(LEADERBOARD_ROWS, start=1)]
+    response = LeaderboardResponse(total_entries=2500, entries=entries, difficulty_filter=None, period="all")
+    return JSONResponse(_fastapi_round_trip(LeaderboardResponse, response)).body
+
+
+def leaderboard_model_construct() -> bytes:
+    entries = [
+        LeaderboardEntry.model_construct(rank=rank, **entry) for rank, entry in enumerate(LEADERBOARD_ROWS, start=1)
+    ]
+    return dumps(LeaderboardResponse.model_construct(
+        total_entries=2500, entries=entries, difficulty_filter=None, period="all"
+    ))
+
+
+def leaderboard_served() -> bytes:
+    entries = [
+        {"rank": rank, **{name: entry[name] for name in _ENTRY_FIELDS}}
+        for rank, entry in enumerate(LEADERBOARD_ROWS, start=1)
+    ]
+    return trusted_response({
+        "total_entries": 2500, "entries": entries, "difficulty_filter": None, "period": "all"
+    }).body
+
+
+# GET /api/achievements/player/{player_id}
+
+def _achievement_fields(achievement, definition) -> dict:
+    return {
+        "id": achievement.id,
+        "player_id": achievement.player_id,
+        "achievement_id": achievement.achievement_id,
+        "title": definition.title,
+        "description": definition.description,
+        "icon": definition.icon,
+        "category": definition.category,
+        "rarity": definition.rarity,
+        "xp_reward": definition.xp_reward,
+        "unlocked_at": achievement.unlocked_at,
+    }
+
+
+def achievements_before() -> bytes:
+    achievements = [AchievementWithDetails(**_achievement_fields(*row)) for row in ACHIEVEMENT_ROWS]
+    response = PlayerAchievementsResponse(
+        player_id=1, total_achievements=len(achievements), achievements=achievements
+    )
+    return JSONResponse(_fastapi_round_trip(PlayerAchievementsResponse, response)).body
+
+
+def achievements_model_construct() -> bytes:
+    achievements = [AchievementWithDetails.model_construct(**_achievement_fields(*row)) for row in ACHIEVEMENT_ROWS]
+    return dumps(PlayerAchievementsResponse.model_construct(
+        player_id=1, total_achievements=len(achievements), achievements=achievements
+    ))
+
+
+def achievements_served() -> bytes:
+    achievements = [_achievement_fields(*row) for row in ACHIEVEMENT_ROWS]
+    return trusted_response({
+        "player_id": 1, "total_achievements": len(achievements), "achievements": achievements
+    }).body
+
+
+# GET /api/progress/{player_id} (a response cache miss: built once per data version)
+
+def _full_progress() -> FullProgressResponse:
+    state = PROGRESS_STATE
+    return FullProgressResponse(
+        player_id=1,
+        total_classes_completed=state.total_classes_completed,
+        total_exercises_completed=state.total_exercises_completed,
+        overall_progress_percentage=50.0,
+        modules=[state.module_progress(module.module_number) for module in content_service.get_all_modules()]
+    )
+
+
+def progress_before() -> bytes:
+    return JSONResponse(jsonable_encoder(_full_progress())).body
+
+
+def progress_served() -> bytes:
+    return dumps(_full_progress())
+
+
+# GET /api/player/?limit=100 (still validated: only the rendering changed)
+
+def players_before() -> bytes:
+    return JSONResponse(_fastapi_round_trip(list[PlayerResponse], PLAYER_ROWS)).body
+
+
+def players_served() -> bytes:
+    return FastJSONResponse(_fastapi_round_trip(list[PlayerResponse], PLAYER_ROWS)).body
+
+
+ENDPOINTS: dict[str, dict[str, Callable[[], bytes]]] = {
+    "GET /api/minigames/bug-hunt/leaderboard?limit=100": {
+        "before": leaderboard_before,
+        "model_construct": leaderboard_model_construct,
+        "served": leaderboard_served,
+    },
+    "GET /api/achievements/player/{player_id}": {
+        "before": achievements_before,
+        "model_construct": achievements_model_construct,
+        "served": achievements_served,
+    },
+    "GET /api/progress/{player_id}": {"before": progress_before, "served": progress_served},
+    "GET /api/player/?limit=100": {"before": players_before, "served": players_served},
+}
+
+
+def _time(fn: Callable[[], bytes], iterations: int) -> float:
+    """Best of three runs, microseconds per call."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1_000_000
+
+
+def run_endpoint(modes: dict[str, Callable[[], bytes]], iterations: int) -> dict:
+    bodies = {name: fn() for name, fn in modes.items()}
+    assert len(set(bodies.values())) == 1, f"Serializations differ: {sorted(bodies)}"
+
+    results = {name: round(_time(fn, iterations), 2) for name, fn in modes.items()}
+    return {
+        "bytes": len(bodies["before"]),
+        "us_per_response": results,
+        "speedup": round(results["before"] / results["served"], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000, help="Responses serialized per mode and run")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "response_serialization",
+        "orjson": orjson is not None,
+        "iterations": args.iterations,
+        "results": {endpoint: run_endpoint(modes, args.iterations) for endpoint, modes in ENDPOINTS.items()},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Concurrent read/write benchmark for the SQLite connection profile.
+
+For each setting below, seeds a fresh SQLite file and runs reader and
+writer tasks against it through an async engine for a fixed time:
+
+- readers: Bug Hunt leaderboard (top 10 by score, joined to players)
+  and a player lookup, alternating
+- writers: one transaction inserting a finished game and adding its XP
+  to the player
+
+Settings add one change at a time, from SQLite's defaults to the
+"performance" profile of app/database.py, and finally the same profile
+without the connection pool (a new connection, and pragmas, per session).
+The driver's own busy handler is disabled (timeout=0), so lock waits come
+from busy_timeout alone. Reports operations per second, p50/p99 latency
+and "database is locked" errors per setting.
+
+Usage (from ai-dev-academy-game/backend):
+    python -m benchmarks.bench_sqlite_profile
+    python -m benchmarks.bench_sqlite_profile --readers 16 --writers 4 --seconds 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Point the app at a throwaway database BEFORE importing it (settings are read at import)
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_sqlite_profile_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP_DIR) / 'unused.db'}"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import Base, apply_sqlite_pragmas, pool_options, sqlite_pragmas  # noqa: E402
+from app.models import BugHuntGame, Player, PlayerStats  # noqa: E402
+from sqlalchemy import create_engine, insert, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+PERFORMANCE = sqlite_pragmas("performance")
+
+# name -> (pragmas, pooled)
+SETTINGS: dict[str, tuple[dict, bool]] = {
+    "default": ({}, True),
+    "wal": ({"journal_mode": "WAL"}, True),
+    "wal+synchronous_normal": ({"journal_mode": "WAL", "synchronous": "NORMAL"}, True),
+    "wal+synchronous_normal+busy_timeout": (
+        {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": PERFORMANCE["busy_timeout"]}, True
+    ),
+    "performance": (PERFORMANCE, True),
+    "performance_no_pool": (PERFORMANCE, False),
+}
+
+
+def seed_database(path: Path, players: int, games: int) -> list[int]:
+    """Create players and a Bug Hunt history large enough for real query cost."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    with engine.begin() as connection:
+        connection.execute(insert(Player), [
+            {"username": f"bench_{i}", "avatar": "default.png", "level": 1, "xp": rng.randint(0, 5000)}
+            for i in range(players)
+        ])
+        player_ids = list(connection.scalars(select(Player.id)))
+        connection.execute(insert(PlayerStats), [{"player_id": pid} for pid in player_ids])
+        connection.execute(insert(BugHuntGame), [
+            {
+                "player_id": rng.choice(player_ids), "template_id": "bug_001",
+                "difficulty": rng.choice(["easy", "medium", "hard"]), "bugs_found": 1, "bugs_total": 1,
+                "time_seconds": rng.uniform(10, 200), "score": rng.randint(0, 1200), "xp_earned": 50,
+                "started_at": now - timedelta(minutes=i), "completed_at": now - timedelta(minutes=i),
+            }
+            for i in range(games)
+        ])
+    engine.dispose()
+    return player_ids
+
+
+def _summary(latencies: list[float], errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ordered),
+        "ops_per_second": round(len(ordered) / seconds, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2) if ordered else None,
+        "p99_ms": round(ordered[int(len(ordered) * 0.99)] * 1000, 2) if ordered else None,
+        "locked_errors": errors,
+    }
+
+
+async def run_setting(name: str, pragmas: dict, pooled: bool, args: argparse.Namespace) -> dict:
+    path = Path(_TMP_DIR) / f"{name}.db"
+    player_ids = seed_database(path, args.players, args.games)
+    url = f"sqlite+aiosqlite:///{path}"
+    options = pool_options(url) if pooled else {"poolclass": NullPool}
+    engine = create_async_engine(url, connect_args={"timeout": 0}, **options)
+    apply_sqlite_pragmas(engine.sync_engine, pragmas)
+
+    leaderboard = (
+        select(BugHuntGame.score, Player.username)
+        .join(Player, Player.id == BugHuntGame.player_id)
+        .order_by(BugHuntGame.score.desc())
+        .limit(10)
+    )
+    reads: list[float] = []
+    writes: list[float] = []
+    errors = {"read": 0, "write": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    async def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        turn = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with engine.connect() as connection:
+                    if turn % 2:
+                        (await connection.execute(leaderboard)).all()
+                    else:
+                        await connection.scalar(select(Player).where(Player.id == rng.choice(player_ids)))
+                reads.append(time.perf_counter() - start)
+            except OperationalError:
+                errors["read"] += 1
+            turn += 1
+
+    async def writer(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            player_id = rng.choice(player_ids)
+            now = datetime.utcnow()
+            start = time.perf_counter()
+            try:
+                async with engine.begin() as connection:
+                    await connection.execute(insert(BugHuntGame).values(
+                        player_id=player_id, template_id="bug_001", difficulty="easy", bugs_found=1,
+                        bugs_total=1, time_seconds=30.0, score=rng.randint(0, 1200), xp_earned=50,
+                        started_at=now, completed_at=now
+                    ))
+                    await connection.execute(update(Player).where(Player.id == player_id).values(xp=Player.xp + 50))
+                writes.append(time.perf_counter() - start)
+            except OperationalError:
+                errors["write"] += 1
+                await asyncio.sleep(0)  # Let the lock holder make progress before retrying
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(reader(i) for i in range(args.readers)),
+        *(writer(1000 + i) for i in range(args.writers))
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "pragmas": pragmas,
+        "pooled": pooled,
+        "reads": _summary(reads, errors["read"], elapsed),
+        "writes": _summary(writes, errors["write"], elapsed),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    results = {}
+    for name, (pragmas, pooled) in SETTINGS.items():
+        results[name] = await run_setting(name, pragmas, pooled, args)
+    return {
+        "benchmark": "sqlite_profile_concurrency",
+        "players": args.players,
+        "games": args.games,
+        "readers": args.readers,
+        "writers": args.writers,
+        "seconds_per_setting": args.seconds,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reader tasks")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer tasks")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Run time per setting")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,25 @@
 """Pytest configuration for Bug Hunt tests."""
 
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path for imports
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
+
+# Endpoints over their query budget fail the test (see app/query_budget.py)
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+
+@pytest.fixture(autouse=True)
+def count_test_engine_queries(request):
+    """Count statements on the test module's own engines, so query budgets apply."""
+    from app import metrics
+
+    for name in ("engine", "async_engine"):
+        target = getattr(request.module, name, None)
+        if target is not None:
+            metrics.instrument_engine(getattr(target, "sync_engine", target))
@@ -6,22 +6,25 @@ from app.main import app
 from app.models.achievement import PlayerStats
 from app.models.player import Player
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_achievements.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same file (NullPool: TestClient runs each request in its own event loop)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_achievements.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
-def override_get_db():
+
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -380,3 +383,73 @@ def test_player_achievements_with_details(test_player):
     assert "rarity" in achievement
     assert "xp_reward" in achievement
     assert "unlocked_at" in achievement
+
+
+def _count_statements(fn):
+    """Run fn and return how many SQL statements the app's async engine executed."""
+    statements = []
+
+    def count(*_):
+        statements.append(1)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        fn()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return len(statements)
+
+
+def _set_classes_completed(player_id, classes_completed):
+    db = TestingSessionLocal()
+    stats = db.query(PlayerStats).filter(PlayerStats.player_id == player_id).first()
+    stats.classes_completed = classes_completed
+    db.commit()
+    db.close()
+
+
+def test_check_achievements_single_transaction(test_player):
+    """Several unlocks cost the same queries as one: one insert, one XP update, one commit."""
+    def check(player_id):
+        return client.post(
+            "/api/achievements/check",
+            json={"player_id": player_id, "action_type": "complete_class", "action_data": {}}
+        )
+
+    _set_classes_completed(test_player, 1)
+    one_unlock = _count_statements(lambda: check(test_player))
+
+    db = TestingSessionLocal()
+    other = Player(username="achievementtest2", avatar="avatar.png")
+    db.add(other)
+    db.commit()
+    db.add(PlayerStats(player_id=other.id, classes_completed=20))
+    db.commit()
+    other_id = other.id
+    db.close()
+
+    responses = []
+    many_unlocks = _count_statements(lambda: responses.append(check(other_id)))
+
+    data = responses[0].json()
+    assert {a["achievement_id"] for a in data["achievements_unlocked"]} == {
+        "first_class", "ten_classes", "twenty_classes", "half_curriculum"
+    }
+    assert many_unlocks == one_unlock
+
+    # Summed XP landed on the player in the same transaction
+    player = client.get(f"/api/player/{other_id}").json()
+    assert player["xp"] == data["xp_earned"] == 50 + 200 + 500 + 800
+
+
+def test_check_achievements_is_idempotent(test_player):
+    """Re-checking never re-awards or re-inserts already unlocked achievements."""
+    _set_classes_completed(test_player, 10)
+    payload = {"player_id": test_player, "action_type": "complete_class", "action_data": {}}
+
+    first = client.post("/api/achievements/check", json=payload).json()
+    second = client.post("/api/achievements/check", json=payload).json()
+
+    assert len(first["achievements_unlocked"]) == 2
+    assert second["achievements_unlocked"] == []
+    assert client.get(f"/api/player/{test_player}").json()["xp"] == first["xp_earned"]
@@ -1,26 +1,39 @@
 """Tests for Bug Hunt mini-game."""
 
+import asyncio
+import contextvars
+from datetime import datetime, timedelta
+
 import pytest
 from app.database import Base, get_db
 from app.main import app
-from app.models import Player
+from app.responses import FastJSONResponse, trusted_response
+from app.routes import minigames
+from app.config import get_settings
+from app.models import BugHuntDailyBest, BugHuntGame, BugHuntGameSummary, Player, PlayerBugHuntRollup
+from app.services import compaction_service, game_session_service, leaderboard_service, rank_service
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_bug_hunt.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same file (NullPool: TestClient runs each request in its own event loop)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_bug_hunt.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -33,6 +46,9 @@ client = TestClient(app)
 def setup_database():
     """Create fresh database for each test."""
     Base.metadata.create_all(bind=engine)
+    leaderboard_service.reset_cache()
+    game_session_service.reset()
+    rank_service.reset()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -247,6 +263,91 @@ def test_submit_bug_hunt_with_false_positives(test_player):
     assert submit_data["is_perfect"] is False
 
 
+def test_start_bug_hunt_writes_nothing(test_player):
+    """Test games in flight live in the session store until submitted, once."""
+    start_data = client.post(
+        "/api/minigames/bug-hunt/start",
+        json={"player_id": test_player, "difficulty": "easy"}
+    ).json()
+
+    db = TestingSessionLocal()
+    assert db.query(BugHuntGame).count() == 0
+
+    submit = {
+        "session_id": start_data["session_id"],
+        "player_id": test_player,
+        "found_bug_lines": [],
+        "time_seconds": 30.0
+    }
+    assert client.post("/api/minigames/bug-hunt/submit", json=submit).status_code == 200
+    assert db.query(BugHuntGame).count() == 1
+    db.close()
+
+    # A session can only be submitted once
+    assert client.post("/api/minigames/bug-hunt/submit", json=submit).status_code == 404
+
+
+def test_expired_bug_hunt_session(test_player, monkeypatch):
+    """Test abandoned sessions expire without touching the database."""
+    start_data = client.post(
+        "/api/minigames/bug-hunt/start",
+        json={"player_id": test_player}
+    ).json()
+
+    expired_at = game_session_service.get_game(start_data["session_id"]).expires_at
+    monkeypatch.setattr(game_session_service.time, "time", lambda: expired_at + 1)
+
+    response = client.post(
+        "/api/minigames/bug-hunt/submit",
+        json={
+            "session_id": start_data["session_id"],
+            "player_id": test_player,
+            "found_bug_lines": [],
+            "time_seconds": 30.0
+        }
+    )
+    assert response.status_code == 404
+    assert game_session_service.purge_expired() == 0
+
+
+def test_bug_hunt_sessions_save_and_load(test_player, tmp_path):
+    """Test games in flight survive a save/load round trip."""
+    start_data = client.post(
+        "/api/minigames/bug-hunt/start",
+        json={"player_id": test_player}
+    ).json()
+    path = str(tmp_path / "sessions.json")
+
+    assert game_session_service.save(path) == 1
+    game_session_service.reset()
+    assert game_session_service.load(path) == 1
+
+    game = game_session_service.get_game(start_data["session_id"])
+    assert game.player_id == test_player
+    assert game.template_id == start_data["template_id"]
+
+
+def test_template_registry_answer_keys():
+    """Test the template registry indexes every template with a matching answer key."""
+    from app.content import bug_templates
+
+    for template in bug_templates.get_all_templates():
+        assert bug_templates.get_template_by_id(template.id) is template
+        assert template in bug_templates.TEMPLATES_BY_DIFFICULTY[template.difficulty]
+
+        answer_key = bug_templates.get_answer_key(template.id)
+        assert answer_key.bug_lines == {bug["line"] for bug in template.bugs}
+
+        first_line = template.bugs[0]["line"]
+        results = answer_key.results_for({first_line})
+        assert [r.line for r in results] == [bug["line"] for bug in template.bugs]
+        assert all(r.found is (r.line == first_line) for r in results)
+
+    assert bug_templates.get_random_template("hard").difficulty == "hard"
+    with pytest.raises(ValueError):
+        bug_templates.get_template_by_id("bug_999")
+
+
 def test_leaderboard_empty():
     """Test leaderboard when no games have been played."""
     response = client.get("/api/minigames/bug-hunt/leaderboard")
@@ -291,6 +392,240 @@ def test_leaderboard_with_games(test_player):
     assert data["entries"][0]["rank"] == 1
 
 
+def play_game(player_id, difficulty="easy", time_seconds=30.0, perfect=True):
+    """Start and submit a Bug Hunt game, returning the submit response data."""
+    start_data = client.post(
+        "/api/minigames/bug-hunt/start",
+        json={"player_id": player_id, "difficulty": difficulty}
+    ).json()
+
+    from app.content.bug_templates import get_template_by_id
+    template = get_template_by_id(start_data["template_id"])
+    lines = [bug["line"] for bug in template.bugs] if perfect else []
+
+    return client.post(
+        "/api/minigames/bug-hunt/submit",
+        json={
+            "session_id": start_data["session_id"],
+            "player_id": player_id,
+            "found_bug_lines": lines,
+            "time_seconds": time_seconds
+        }
+    ).json()
+
+
+def test_leaderboard_keeps_best_score_per_player(test_player):
+    """Test leaderboard lists each player once, with their best game."""
+    best = play_game(test_player, time_seconds=10.0)
+    play_game(test_player, perfect=False)
+
+    data = client.get("/api/minigames/bug-hunt/leaderboard").json()
+
+    assert data["total_entries"] == 1
+    assert len(data["entries"]) == 1
+    assert data["entries"][0]["score"] == best["score"]
+
+
+def test_leaderboard_cache_ignores_stale_lower_entry(test_player):
+    """Test a late cache update from a losing concurrent submit neither lowers the entry nor recounts the player."""
+    best = play_game(test_player, time_seconds=10.0)
+    cached = client.get("/api/minigames/bug-hunt/leaderboard").json()["entries"][0]
+
+    # Both submits read the board before either committed, so both think the player is new
+    stale = {**cached, "score": best["score"] - 100, "completed_at": datetime.utcnow()}
+    leaderboard_service._apply_entry(leaderboard_service.GLOBAL_BOARD, stale, is_new_player=True)
+
+    data = client.get("/api/minigames/bug-hunt/leaderboard").json()
+    assert data["total_entries"] == 1
+    assert data["entries"][0]["score"] == best["score"]
+
+
+def submit_during_load(monkeypatch, loader: str, player_id: int) -> None:
+    """Make the next cold load of `loader` see the tables just before a submit commits (once)."""
+    load = getattr(leaderboard_service, loader)
+
+    async def load_then_submit(*args):
+        monkeypatch.setattr(leaderboard_service, loader, load)
+        loaded = await load(*args)  # Snapshot taken before the submit below
+        # Another request's submit (own context: not counted against this request's query budget)
+        await asyncio.create_task(submit(), context=contextvars.Context())
+        return loaded
+
+    async def submit():
+        async with TestingAsyncSessionLocal() as other:
+            now = datetime.utcnow()
+            game = BugHuntGame(
+                player_id=player_id, template_id="bug_001", difficulty="easy", bugs_found=1, bugs_total=1,
+                time_seconds=20.0, score=900, xp_earned=50, found_bugs=[1], missed_bugs=[], false_positives=[],
+                started_at=now, completed_at=now
+            )
+            other.add(game)
+            await other.flush()
+            await leaderboard_service.record_game(other, game, "test_player")
+            await other.commit()
+
+    monkeypatch.setattr(leaderboard_service, loader, load_then_submit)
+
+
+def test_leaderboard_submit_during_cold_load_is_not_lost(test_player, monkeypatch):
+    """Test a board loaded while a submit commits is not cached without that submit."""
+    submit_during_load(monkeypatch, "_load_board", test_player)
+
+    assert client.get("/api/minigames/bug-hunt/leaderboard").json()["entries"] == []
+
+    data = client.get("/api/minigames/bug-hunt/leaderboard").json()
+    assert data["total_entries"] == 1
+    assert data["entries"][0]["score"] == 900
+
+
+def test_window_leaderboard_submit_during_cold_load_is_not_lost(test_player, monkeypatch):
+    """Test a rolling board loaded while a submit commits is not cached without that submit."""
+    submit_during_load(monkeypatch, "_load_window", test_player)
+    board = "/api/minigames/bug-hunt/leaderboard?period=week"
+
+    assert client.get(board).json()["entries"] == []
+
+    data = client.get(board).json()
+    assert data["total_entries"] == 1
+    assert data["entries"][0]["score"] == 900
+
+
+def test_leaderboard_trusted_response_matches_response_model_bytes(monkeypatch):
+    """Test the trusted fast path sends the same bytes as validating through response_model would."""
+    username = "Zoë 测试"
+    player_id = client.post("/api/player/", json={"username": username, "avatar": "a.png"}).json()["id"]
+    play_game(player_id, time_seconds=33.3)
+
+    sent = []
+
+    def recording_trusted_response(content, **kwargs):
+        sent.append(content)
+        return trusted_response(content, **kwargs)
+
+    monkeypatch.setattr(minigames, "trusted_response", recording_trusted_response)
+    response = client.get("/api/minigames/bug-hunt/leaderboard")
+
+    # What FastAPI does with a returned value: validate against response_model, dump as JSON-able data
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/api/minigames/bug-hunt/leaderboard")
+    validated = asyncio.run(serialize_response(field=route.response_field, response_content=sent[0]))
+
+    assert response.content == FastJSONResponse(validated).body
+    assert response.content == JSONResponse(validated).body  # The stdlib renderer it replaced
+    entry = response.json()["entries"][0]
+    assert entry["username"] == username
+    assert entry["completed_at"] == validated["entries"][0]["completed_at"]
+    assert username.encode() in response.content  # UTF-8, not \u escapes
+
+
+def test_leaderboard_ranks_players_and_filters_difficulty(test_player):
+    """Test ranking across players and per-difficulty boards."""
+    # Warm the cache first so the submits below must update it in place
+    client.get("/api/minigames/bug-hunt/leaderboard")
+
+    other = client.post("/api/player/", json={"username": "rival", "avatar": "a.png"}).json()["id"]
+    play_game(test_player, difficulty="easy", perfect=False)
+    play_game(other, difficulty="medium", time_seconds=5.0)
+
+    data = client.get("/api/minigames/bug-hunt/leaderboard").json()
+    assert data["total_entries"] == 2
+    assert [e["player_id"] for e in data["entries"]] == [other, test_player]
+    assert [e["rank"] for e in data["entries"]] == [1, 2]
+
+    easy = client.get("/api/minigames/bug-hunt/leaderboard?difficulty=easy").json()
+    assert easy["total_entries"] == 1
+    assert easy["entries"][0]["player_id"] == test_player
+    assert easy["difficulty_filter"] == "easy"
+
+
+def test_leaderboard_rebuild_from_games(test_player):
+    """Test backfilling the leaderboard from existing game history."""
+    play_game(test_player, difficulty="easy", time_seconds=10.0)
+    play_game(test_player, difficulty="hard", perfect=False)
+
+    db = TestingSessionLocal()
+    best_score = max(g.score for g in db.query(BugHuntGame).all())
+    written = leaderboard_service.rebuild_leaderboard(db)
+    db.close()
+
+    # One global row plus one row per difficulty played
+    assert written == 3
+    data = client.get("/api/minigames/bug-hunt/leaderboard").json()
+    assert data["entries"][0]["score"] == best_score
+
+
+def add_old_bucket(player_id, days_ago, score):
+    """Insert a daily bucket row for a game played `days_ago` days ago."""
+    completed_at = datetime.utcnow() - timedelta(days=days_ago)
+    db = TestingSessionLocal()
+    db.add(BugHuntDailyBest(
+        board="all", day=leaderboard_service.utc_day(completed_at), player_id=player_id, score=score,
+        bugs_found=3, bugs_total=3, time_seconds=30.0, difficulty="easy", completed_at=completed_at
+    ))
+    db.commit()
+    db.close()
+
+
+def test_rolling_leaderboards_merge_daily_buckets(test_player):
+    """Test day/week/month boards only count games inside their window."""
+    other = client.post("/api/player/", json={"username": "veteran", "avatar": "a.png"}).json()["id"]
+    today = play_game(test_player, perfect=False)
+    add_old_bucket(other, days_ago=3, score=9000)
+    add_old_bucket(test_player, days_ago=10, score=8000)
+
+    board = "/api/minigames/bug-hunt/leaderboard?period="
+    day = client.get(board + "day").json()
+    assert [(e["player_id"], e["score"]) for e in day["entries"]] == [(test_player, today["score"])]
+    assert day["period"] == "day"
+
+    week = client.get(board + "week").json()
+    assert [(e["player_id"], e["score"]) for e in week["entries"]] == [(other, 9000), (test_player, today["score"])]
+
+    month = client.get(board + "month").json()
+    assert month["total_entries"] == 2
+    assert [(e["player_id"], e["score"]) for e in month["entries"]] == [(other, 9000), (test_player, 8000)]
+
+
+def test_rolling_leaderboard_cache_updates_on_submit(test_player):
+    """Test warm rolling boards take new games in place and match a cold reload."""
+    board = "/api/minigames/bug-hunt/leaderboard?period=week"
+    assert client.get(board).json()["total_entries"] == 0
+
+    other = client.post("/api/player/", json={"username": "newcomer", "avatar": "a.png"}).json()["id"]
+    play_game(test_player, perfect=False)
+    play_game(other, time_seconds=5.0)
+    play_game(test_player, time_seconds=10.0)
+    warm = client.get(board).json()
+
+    leaderboard_service.reset_cache()
+    cold = client.get(board).json()
+
+    assert warm == cold
+    assert warm["total_entries"] == 2
+
+
+def test_leaderboard_invalid_period():
+    """Test unknown periods are rejected."""
+    response = client.get("/api/minigames/bug-hunt/leaderboard?period=decade")
+    assert response.status_code == 400
+
+
+def test_rebuild_fills_daily_buckets(test_player):
+    """Test the backfill also rebuilds the recent daily buckets."""
+    play_game(test_player, difficulty="easy", time_seconds=10.0)
+    play_game(test_player, difficulty="easy", perfect=False)
+    before = client.get("/api/minigames/bug-hunt/leaderboard?period=week&difficulty=easy").json()
+
+    db = TestingSessionLocal()
+    db.query(BugHuntDailyBest).delete()
+    db.commit()
+    leaderboard_service.rebuild_leaderboard(db)
+    assert db.query(BugHuntDailyBest).count() == 2  # Global and easy board, today
+    db.close()
+
+    after = client.get("/api/minigames/bug-hunt/leaderboard?period=week&difficulty=easy").json()
+    assert after == before
+
+
 def test_player_stats_no_games(test_player):
     """Test player stats when no games have been played."""
     response = client.get(f"/api/minigames/bug-hunt/stats/{test_player}")
@@ -336,3 +671,131 @@ def test_player_stats_with_games(test_player):
     assert data["best_score"] > 0
     assert data["average_score"] > 0
     assert data["favorite_difficulty"] is not None
+
+
+def test_player_stats_rollup_totals(test_player):
+    """Test stats rollup sums, best score, perfect games and favorite difficulty."""
+    first = play_game(test_player, difficulty="hard", time_seconds=10.0)
+    second = play_game(test_player, difficulty="hard", perfect=False)
+    third = play_game(test_player, difficulty="easy", time_seconds=20.0)
+    games = [first, second, third]
+
+    data = client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json()
+
+    assert data["total_games_played"] == 3
+    assert data["total_perfect_games"] == 2
+    assert data["total_bugs_found"] == sum(g["bugs_found"] for g in games)
+    assert data["best_score"] == max(g["score"] for g in games)
+    assert data["average_score"] == pytest.approx(sum(g["score"] for g in games) / 3)
+    assert data["average_accuracy"] == pytest.approx(sum(g["accuracy"] for g in games) / 3)
+    assert data["total_xp_earned"] == sum(g["xp_earned"] for g in games)
+    assert data["favorite_difficulty"] == "hard"
+
+
+def test_player_stats_fallback_without_rollup(test_player):
+    """Test stats fall back to one aggregate query when the rollup row is missing."""
+    from app.models import PlayerBugHuntRollup
+
+    played = [play_game(test_player, difficulty="medium"), play_game(test_player, difficulty="medium")]
+    expected = client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json()
+
+    db = TestingSessionLocal()
+    db.query(PlayerBugHuntRollup).delete()
+    db.commit()
+    db.close()
+
+    data = client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json()
+    assert data == expected
+    assert data["total_games_played"] == len(played)
+
+    # Next submit seeds the rollup from history, then keeps counting incrementally
+    play_game(test_player, difficulty="easy")
+    data = client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json()
+    assert data["total_games_played"] == 3
+
+
+def test_player_rank_follows_bug_hunt_games(test_player):
+    """Test XP and Bug Hunt ranks stay in sync with submitted games once the index is warm."""
+    other = client.post("/api/player/", json={"username": "rival", "avatar": "a.png"}).json()["id"]
+    assert client.get(f"/api/player/{test_player}/rank").json()["bug_hunt"] is None
+
+    play_game(other, time_seconds=30.0)
+    play_game(test_player, perfect=False)
+    rank = client.get(f"/api/player/{test_player}/rank").json()
+    assert rank["bug_hunt"]["rank"] == 2
+    assert rank["bug_hunt"]["total"] == 2
+
+    best = play_game(test_player, time_seconds=5.0)
+    warm = client.get(f"/api/player/{test_player}/rank").json()
+    assert warm["bug_hunt"] == {"score": best["score"], "rank": 1, "total": 2, "percentile": 100.0}
+    assert warm["xp"]["rank"] == 1
+
+    rank_service.reset()
+    assert client.get(f"/api/player/{test_player}/rank").json() == warm
+
+
+def age_games(days: int):
+    """Backdate every game by `days` days and drop the daily buckets (as if pruned)."""
+    db = TestingSessionLocal()
+    for game in db.query(BugHuntGame):
+        game.started_at -= timedelta(days=days)
+        game.completed_at -= timedelta(days=days)
+    db.query(BugHuntDailyBest).delete()
+    db.commit()
+    db.close()
+
+
+def test_compaction_archives_old_games(test_player):
+    """Test old games fold into summaries, abandoned ones go, and stats and boards are unchanged."""
+    play_game(test_player, time_seconds=10.0)
+    for _ in range(3):
+        play_game(test_player, perfect=False)
+    play_game(test_player, difficulty="medium", perfect=False)
+    age_games(days=200)
+
+    db = TestingSessionLocal()
+    db.add(BugHuntGame(
+        player_id=test_player, template_id="bug_001", difficulty="easy", bugs_total=3,
+        time_seconds=0, score=0, xp_earned=0, started_at=datetime.utcnow() - timedelta(days=2)
+    ))
+    db.commit()
+    stats_before = client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json()
+    board_before = client.get("/api/minigames/bug-hunt/leaderboard").json()["entries"]
+
+    report = compaction_service.run_compaction(db)
+
+    assert report.abandoned_deleted == 1
+    # Kept: the global/easy best and the medium best, which the leaderboards point at
+    assert report.games_archived == 3
+    assert db.query(BugHuntGame).count() == 2
+    assert sum(summary.games_played for summary in db.query(BugHuntGameSummary)) == 3
+
+    # Same stats from the rollup and from the history fallback (games + summaries)
+    assert client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json() == stats_before
+    db.query(PlayerBugHuntRollup).delete()
+    db.commit()
+    assert client.get(f"/api/minigames/bug-hunt/stats/{test_player}").json() == stats_before
+
+    leaderboard_service.rebuild_leaderboard(db)
+    db.close()
+    board_after = client.get("/api/minigames/bug-hunt/leaderboard").json()["entries"]
+    assert [entry["score"] for entry in board_after] == [entry["score"] for entry in board_before]
+
+
+def test_compaction_runs_in_bounded_batches(test_player, monkeypatch):
+    """Test one run archives at most BATCH_SIZE * MAX_BATCHES games; later runs add to the summaries."""
+    monkeypatch.setattr(get_settings(), "BUG_HUNT_COMPACTION_BATCH_SIZE", 2)
+    monkeypatch.setattr(get_settings(), "BUG_HUNT_COMPACTION_MAX_BATCHES", 1)
+    play_game(test_player, time_seconds=5.0)
+    for _ in range(4):
+        play_game(test_player, perfect=False)
+    age_games(days=200)
+
+    db = TestingSessionLocal()
+    assert compaction_service.run_compaction(db).games_archived == 2
+    assert compaction_service.run_compaction(db).games_archived == 2
+    assert compaction_service.run_compaction(db).games_archived == 0
+
+    archived = sum(summary.games_played for summary in db.query(BugHuntGameSummary))
+    db.close()
+    assert archived == 4
@@ -0,0 +1,241 @@
+"""Tests for Event routes (batched offline sync)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from app.content.bug_templates import get_template_by_id
+from app.database import Base, get_db
+from app.main import app
+from app.models.achievement import PlayerStats
+from app.models.client_event import ClientEvent
+from app.models.player import Player
+from app.models.progress import Progress
+from app.schemas.events import MAX_BATCH_EVENTS
+from app.services import (
+    achievement_service,
+    content_service,
+    game_session_service,
+    leaderboard_service,
+    rank_service,
+    response_cache_service,
+)
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_events.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine over the same file (NullPool: TestClient runs each request in its own event loop)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_events.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_db():
+    """Override database dependency for testing."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+# Create test client
+client = TestClient(app)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    """Create fresh database for each test."""
+    Base.metadata.create_all(bind=engine)
+    leaderboard_service.reset_cache()
+    game_session_service.reset()
+    rank_service.reset()
+    response_cache_service.reset()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_player():
+    """Create a player with stats and the first class unlocked; returns (player_id, progress_id)."""
+    db = TestingSessionLocal()
+    player = Player(username="offline", avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    db.add(PlayerStats(player_id=player.id))
+    progress = Progress(player_id=player.id, module_number=0, class_number=0, status="unlocked")
+    db.add(progress)
+    db.commit()
+    ids = (player.id, progress.id)
+    db.close()
+    return ids
+
+
+def start_game(player_id):
+    """Start a Bug Hunt game; returns (session_id, the template's bug lines)."""
+    data = client.post("/api/minigames/bug-hunt/start", json={"player_id": player_id, "difficulty": "easy"}).json()
+    return data["session_id"], [bug["line"] for bug in get_template_by_id(data["template_id"]).bugs]
+
+
+def send(player_id, *events):
+    return client.post("/api/events/batch", json={"player_id": player_id, "events": list(events)})
+
+
+def event(key, type, at=None, **fields):
+    return {"idempotency_key": key, "type": type, "client_timestamp": (at or datetime.utcnow()).isoformat(), **fields}
+
+
+def test_event_batch_applies_events_in_order(test_player):
+    """Test exercise, completion and Bug Hunt events are applied in one request, at their client time."""
+    player_id, progress_id = test_player
+    session_id, bug_lines = start_game(player_id)
+    completed_at = datetime.utcnow() - timedelta(hours=3)
+
+    response = send(
+        player_id,
+        event("e1", "exercise", progress_id=progress_id, exercises_completed=3),
+        event("e2", "progress", at=completed_at, progress_id=progress_id, status="completed"),
+        event("e3", "bug_hunt", session_id=session_id, found_bug_lines=bug_lines, time_seconds=90.0),
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["outcome"] for r in data["results"]] == ["applied", "applied", "applied"]
+
+    unlocked = {a["achievement_id"] for a in data["achievements_unlocked"]}
+    assert {"first_class", "first_bug_hunt", "bug_hunt_perfect"} <= unlocked
+
+    player = client.get(f"/api/player/{player_id}").json()
+    assert data["xp_earned"] == player["xp"]
+    assert player["xp"] > content_service.get_class_info(0, 0).xp_reward
+
+    stats = client.get(f"/api/player/{player_id}/stats").json()
+    assert stats["classes_completed"] == 1
+    assert stats["exercises_completed"] == 3
+    assert stats["bug_hunt_games_played"] == 1
+
+    db = TestingSessionLocal()
+    progress = db.get(Progress, progress_id)
+    assert progress.status == "completed"
+    assert progress.completed_at == completed_at
+    db.close()
+
+    # The progress state was rebuilt with the batch
+    full = client.get(f"/api/progress/{player_id}").json()
+    assert full["total_classes_completed"] == 1
+    assert full["total_exercises_completed"] == 3
+
+
+def test_event_batch_is_idempotent(test_player):
+    """Test a resent batch and keys repeated within a batch are not applied twice."""
+    player_id, progress_id = test_player
+    events = [
+        event("done", "progress", progress_id=progress_id, status="completed"),
+        event("done", "progress", progress_id=progress_id, status="in_progress"),
+    ]
+
+    first = send(player_id, *events).json()
+    assert [r["outcome"] for r in first["results"]] == ["applied", "duplicate"]
+    xp = client.get(f"/api/player/{player_id}").json()["xp"]
+
+    second = send(player_id, *events).json()
+    assert [r["outcome"] for r in second["results"]] == ["duplicate", "duplicate"]
+    assert second["xp_earned"] == 0
+    assert client.get(f"/api/player/{player_id}").json()["xp"] == xp
+
+    db = TestingSessionLocal()
+    assert db.query(ClientEvent).filter(ClientEvent.player_id == player_id).count() == 1
+    db.close()
+
+
+def test_event_batch_rejects_without_failing(test_player):
+    """Test unknown progress and sessions are rejected, the rest applies, and rejected keys can be retried."""
+    player_id, progress_id = test_player
+
+    response = send(
+        player_id,
+        event("bad-progress", "progress", progress_id=99999, status="completed"),
+        event("bad-game", "bug_hunt", session_id=12345, found_bug_lines=[], time_seconds=10.0),
+        event("ok", "exercise", progress_id=progress_id, exercises_completed=2),
+    ).json()
+    assert [(r["outcome"], r["detail"]) for r in response["results"]] == [
+        ("rejected", "Progress with ID 99999 not found"),
+        ("rejected", "Game session not found"),
+        ("applied", None),
+    ]
+
+    # Lower counts never undo exercises; the rejected key is free again
+    retry = send(
+        player_id,
+        event("bad-progress", "progress", progress_id=progress_id, status="completed"),
+        event("older", "exercise", progress_id=progress_id, exercises_completed=1),
+    ).json()
+    assert [r["outcome"] for r in retry["results"]] == ["applied", "applied"]
+    assert client.get(f"/api/player/{player_id}/stats").json()["exercises_completed"] == 2
+
+
+def test_event_batch_without_changes_keeps_etag(test_player):
+    """Test stale events that change nothing leave the progress ETag (and state) alone."""
+    player_id, progress_id = test_player
+    send(
+        player_id,
+        event("done", "progress", progress_id=progress_id, status="completed"),
+        event("count", "exercise", progress_id=progress_id, exercises_completed=2),
+    )
+    etag = client.get(f"/api/progress/{player_id}").headers["etag"]
+
+    response = send(
+        player_id,
+        event("reopen", "progress", progress_id=progress_id, status="in_progress"),
+        event("older", "exercise", progress_id=progress_id, exercises_completed=1),
+    ).json()
+    assert [r["outcome"] for r in response["results"]] == ["applied", "applied"]
+    assert client.get(f"/api/progress/{player_id}", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_event_batch_evaluates_achievements_once(test_player, monkeypatch):
+    """Test one achievement snapshot serves every event of the batch."""
+    player_id, progress_id = test_player
+    snapshots = []
+    load_snapshot = achievement_service._load_snapshot
+
+    async def counting_load_snapshot(*args, **kwargs):
+        snapshots.append(args)
+        return await load_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(achievement_service, "_load_snapshot", counting_load_snapshot)
+    games = [start_game(player_id) for _ in range(3)]
+
+    response = send(
+        player_id,
+        event("class", "progress", progress_id=progress_id, status="completed"),
+        *(
+            event(f"game-{i}", "bug_hunt", session_id=session_id, found_bug_lines=lines, time_seconds=90.0)
+            for i, (session_id, lines) in enumerate(games)
+        ),
+    )
+    assert response.status_code == 200
+    assert len(snapshots) == 1
+
+
+def test_event_batch_player_not_found():
+    """Test a batch for an unknown player returns 404."""
+    response = send(99999, event("e1", "exercise", progress_id=1, exercises_completed=1))
+    assert response.status_code == 404
+
+
+def test_event_batch_largest_batch_within_budget(test_player):
+    """Test a full batch of the costliest event (a Bug Hunt game) fits the endpoint's query budget."""
+    player_id, _ = test_player
+    games = [start_game(player_id) for _ in range(MAX_BATCH_EVENTS)]
+
+    response = send(player_id, *(
+        event(f"game-{i}", "bug_hunt", session_id=session_id, found_bug_lines=lines, time_seconds=30.0)
+        for i, (session_id, lines) in enumerate(games)
+    ))
+    assert response.status_code == 200
+    assert {r["outcome"] for r in response.json()["results"]} == {"applied"}
+    assert client.get(f"/api/player/{player_id}/stats").json()["bug_hunt_games_played"] == MAX_BATCH_EVENTS
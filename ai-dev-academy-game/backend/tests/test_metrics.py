@@ -0,0 +1,172 @@
+"""Tests for request metrics, the /metrics endpoint and query budgets."""
+
+import asyncio
+import logging
+
+import pytest
+from app import metrics
+from app.config import get_settings
+from app.database import Base, get_db
+from app.main import app
+from app.models import Player
+from app.query_budget import QueryBudgetExceeded, query_budget
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_metrics.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_metrics.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+metrics.instrument_engine(async_engine.sync_engine)
+
+
+async def override_get_db():
+    """Override database dependency for testing."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_db] = override_get_db
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    """Create fresh database and metrics for each test."""
+    Base.metadata.create_all(bind=engine)
+    metrics.reset()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_player():
+    db = TestingSessionLocal()
+    player = Player(username="metrics_player", avatar="test.png")
+    db.add(player)
+    db.commit()
+    player_id = player.id
+    db.close()
+    return player_id
+
+
+def sample(text: str, name: str, **labels) -> float | None:
+    """Value of one sample in Prometheus text output (None if absent)."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{label_text}}} " if labels else f"{name} "
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+def test_metrics_endpoint_format():
+    """/metrics is Prometheus text with HELP/TYPE for every metric."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "# TYPE http_requests_in_progress gauge" in response.text
+
+
+def test_requests_counted_by_route_template(test_player):
+    """Requests are labelled by route template and status code."""
+    client.get(f"/api/player/{test_player}")
+    client.get(f"/api/player/{test_player}")
+    client.get("/api/player/999999")
+    client.get("/does-not-exist")
+
+    text = client.get("/metrics").text
+    route = "/api/player/{player_id}"
+    assert sample(text, "http_requests_total", method="GET", route=route, status="200") == 2
+    assert sample(text, "http_requests_total", method="GET", route=route, status="404") == 1
+    assert sample(text, "http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 3
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 3
+
+
+def test_in_progress_gauge_returns_to_zero():
+    """Only the /metrics request itself is in flight while rendering."""
+    client.get("/health")
+    text = client.get("/metrics").text
+    assert sample(text, "http_requests_in_progress", method="GET") == 1
+    text = client.get("/metrics").text
+    assert sample(text, "http_requests_in_progress", method="GET") == 1
+
+
+def test_sql_queries_counted_per_route(test_player):
+    """SQL statements run while serving a request are attributed to its route."""
+    client.get(f"/api/player/{test_player}")
+    client.get("/health")
+
+    text = client.get("/metrics").text
+    route = "/api/player/{player_id}"
+    assert sample(text, "db_queries_total", method="GET", route=route) >= 1
+    assert sample(text, "db_query_duration_seconds_total", method="GET", route=route) > 0
+    assert sample(text, "http_request_db_queries_count", method="GET", route=route) == 1
+    assert sample(text, "db_queries_total", method="GET", route="/health") == 0
+
+
+def test_queries_outside_requests_not_counted():
+    """Statements outside a request (startup, scripts) are ignored."""
+    db = TestingSessionLocal()
+    db.query(Player).all()
+    db.close()
+    assert metrics.current_query_stats() is None
+    assert sample(metrics.render(), "db_queries_total", method="GET", route="unmatched") is None
+
+
+def test_failed_statement_leaves_no_timing_state():
+    """A statement that raises is not counted and leaves nothing on the pooled connection."""
+    with engine.connect() as conn, metrics.count_queries() as stats:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM missing_table")
+        conn.exec_driver_sql("SELECT 1")
+        info = dict(conn.info)
+
+    assert stats.count == 1
+    assert stats.seconds > 0
+    assert not any(isinstance(value, list) for value in info.values())
+
+
+@query_budget(2)
+async def list_player_names(lookups: int) -> list[str]:
+    async with TestingAsyncSessionLocal() as db:
+        return [(await db.scalars(select(Player.username))).all() for _ in range(lookups)]
+
+
+def test_query_budget_within_limit(monkeypatch):
+    """Endpoints within budget return normally."""
+    monkeypatch.setattr(get_settings(), "QUERY_BUDGET_MODE", "raise")
+    assert asyncio.run(list_player_names(2)) == [[], []]
+
+
+def test_query_budget_exceeded_raises(monkeypatch):
+    """In raise mode an endpoint over budget fails loudly."""
+    monkeypatch.setattr(get_settings(), "QUERY_BUDGET_MODE", "raise")
+    with pytest.raises(QueryBudgetExceeded, match="issued 3 SQL statements \\(budget 2\\)"):
+        asyncio.run(list_player_names(3))
+
+
+def test_query_budget_exceeded_logs(monkeypatch, caplog):
+    """In log mode the response goes through and a warning is logged."""
+    monkeypatch.setattr(get_settings(), "QUERY_BUDGET_MODE", "log")
+    with caplog.at_level(logging.WARNING, logger="app.query_budget"):
+        assert asyncio.run(list_player_names(3)) == [[], [], []]
+    assert "list_player_names issued 3 SQL statements" in caplog.text
+
+
+def test_query_budget_counts_toward_request_totals(test_player):
+    """Statements counted by a budget still show up in the request metrics."""
+    client.get(f"/api/player/{test_player}")
+    text = client.get("/metrics").text
+    assert sample(text, "db_queries_total", method="GET", route="/api/player/{player_id}") == 1
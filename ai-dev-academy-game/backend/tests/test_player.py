@@ -1,25 +1,37 @@
 """Tests for Player routes."""
 
+from datetime import datetime
+
 import pytest
+from app.config import get_settings
 from app.database import Base, get_db
 from app.main import app
+from app.models.achievement import Achievement, PlayerStats
+from app.models.client_event import ClientEvent
+from app.models.minigame import BugHuntGame
+from app.models.player import Player
+from app.models.progress import Progress
+from app.services import leaderboard_service, rank_service
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_player.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same file (NullPool: TestClient runs each request in its own event loop)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_player.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -32,6 +44,8 @@ client = TestClient(app)
 def setup_database():
     """Create fresh database for each test."""
     Base.metadata.create_all(bind=engine)
+    leaderboard_service.reset_cache()
+    rank_service.reset()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -249,6 +263,47 @@ def test_get_player_stats():
     assert data["bug_hunt_wins"] == 0
 
 
+def test_player_stats_streak_after_completing_class():
+    """Test completing a class starts a streak shown in player stats."""
+    player_id = client.post("/api/player/", json={"username": "streaker", "avatar": "avatar1.png"}).json()["id"]
+    client.patch(f"/api/player/{player_id}", json={"timezone": "Europe/Madrid"})
+    progress_id = client.post(
+        "/api/progress/",
+        json={"player_id": player_id, "module_number": 0, "class_number": 0, "status": "in_progress"}
+    ).json()["id"]
+    client.patch(f"/api/progress/{progress_id}", json={"status": "completed"})
+
+    data = client.get(f"/api/player/{player_id}/stats").json()
+    assert data["current_streak"] == 1
+    assert data["longest_streak"] == 1
+
+
+def test_update_player_invalid_timezone():
+    """Test an unknown timezone is rejected."""
+    player_id = client.post("/api/player/", json={"username": "tzplayer", "avatar": "avatar1.png"}).json()["id"]
+    response = client.patch(f"/api/player/{player_id}", json={"timezone": "Mars/Olympus"})
+    assert response.status_code == 422
+
+
+def test_get_player_stats_loads_player_and_stats_together():
+    """Test the stats endpoint loads player and stats in one query, then only the streak."""
+    player_id = client.post("/api/player/", json={"username": "onequery", "avatar": "avatar1.png"}).json()["id"]
+    statements = []
+
+    def count(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        response = client.get(f"/api/player/{player_id}/stats")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    assert len(statements) == 2
+    assert "JOIN player_stats" in statements[0]
+
+
 def test_get_player_stats_not_found():
     """Test getting stats for non-existent player returns 404."""
     response = client.get("/api/player/99999/stats")
@@ -279,6 +334,96 @@ def test_delete_player_not_found():
     assert response.status_code == 404
 
 
+def add_history(player_id, games=3):
+    """Give a player progress, an achievement, a synced event and finished Bug Hunt games directly."""
+    now = datetime.utcnow()
+    db = TestingSessionLocal()
+    db.add_all([
+        Progress(player_id=player_id, module_number=0, class_number=0, status="completed"),
+        Achievement(player_id=player_id, achievement_id="first_steps"),
+        ClientEvent(player_id=player_id, idempotency_key="e1", event_type="exercise", client_timestamp=now),
+        *(BugHuntGame(player_id=player_id, template_id="bug_001", difficulty="easy", bugs_found=1, bugs_total=1,
+                      time_seconds=30.0, score=100, xp_earned=50, started_at=now, completed_at=now)
+          for _ in range(games)),
+    ])
+    db.commit()
+    db.close()
+
+
+def count_rows(model, player_id):
+    db = TestingSessionLocal()
+    try:
+        return db.query(model).filter(model.player_id == player_id).count()
+    finally:
+        db.close()
+
+
+def test_delete_player_with_history():
+    """Test deleting a player with games and progress leaves no rows behind."""
+    player_id = client.post("/api/player/", json={"username": "veteran", "avatar": "a.png"}).json()["id"]
+    add_history(player_id)
+
+    response = client.delete(f"/api/player/{player_id}")
+    assert response.status_code == 204
+
+    for model in (BugHuntGame, Progress, PlayerStats, Achievement, ClientEvent):
+        assert count_rows(model, player_id) == 0
+
+
+def test_bulk_delete_players(monkeypatch):
+    """Test the admin bulk delete: token required, deletes or anonymizes, reports unknown ids."""
+    ids = [
+        client.post("/api/player/", json={"username": f"bulk{i}", "avatar": "a.png"}).json()["id"]
+        for i in range(3)
+    ]
+    for player_id in ids:
+        add_history(player_id)
+    body = {"player_ids": [ids[0], ids[1], 99999], "mode": "delete"}
+
+    # Disabled without ADMIN_TOKEN, forbidden with a wrong one
+    assert client.post("/api/player/admin/bulk-delete", json=body).status_code == 403
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "s3cret")
+    headers = {"X-Admin-Token": "s3cret"}
+    assert client.post(
+        "/api/player/admin/bulk-delete", json=body, headers={"X-Admin-Token": "wrong"}
+    ).status_code == 403
+
+    response = client.post("/api/player/admin/bulk-delete", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"mode": "delete", "processed": ids[:2], "not_found": [99999]}
+    for player_id in ids[:2]:
+        assert client.get(f"/api/player/{player_id}").status_code == 404
+        assert count_rows(BugHuntGame, player_id) == 0
+
+    # Anonymize keeps the player and their history
+    response = client.post(
+        "/api/player/admin/bulk-delete", json={"player_ids": [ids[2]], "mode": "anonymize"}, headers=headers
+    )
+    assert response.json()["processed"] == [ids[2]]
+    player = client.get(f"/api/player/{ids[2]}").json()
+    assert player["username"] == f"deleted-player-{ids[2]:08d}"
+    assert count_rows(BugHuntGame, ids[2]) == 3
+
+
+def test_anonymized_usernames_are_reserved(monkeypatch):
+    """Test no player can take an anonymized name, so anonymizing never hits the unique username."""
+    player_id = client.post("/api/player/", json={"username": "squatter", "avatar": "a.png"}).json()["id"]
+    reserved = f"deleted-player-{player_id:08d}"
+
+    assert client.post("/api/player/", json={"username": "Deleted-Player-1", "avatar": "a.png"}).status_code == 422
+    assert client.patch(f"/api/player/{player_id}", json={"username": reserved}).status_code == 422
+    assert client.patch(f"/api/player/{player_id}", json={"username": reserved.upper()}).status_code == 422
+
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "s3cret")
+    response = client.post(
+        "/api/player/admin/bulk-delete",
+        json={"player_ids": [player_id], "mode": "anonymize"},
+        headers={"X-Admin-Token": "s3cret"}
+    )
+    assert response.status_code == 200
+    assert client.get(f"/api/player/{player_id}").json()["username"] == reserved
+
+
 def test_player_xp_and_level():
     """Test that XP and level are tracked correctly."""
     # Create player
@@ -295,3 +440,54 @@ def test_player_xp_and_level():
 
     # XP and level will be updated through progress/achievements
     # (tested in those test files)
+
+
+def create_players_with_xp(*xp_values):
+    """Create players and set their XP directly, returning their IDs."""
+    ids = [
+        client.post("/api/player/", json={"username": f"ranked{i}", "avatar": "a.png"}).json()["id"]
+        for i in range(len(xp_values))
+    ]
+    db = TestingSessionLocal()
+    for player_id, xp in zip(ids, xp_values):
+        db.get(Player, player_id).xp = xp
+    db.commit()
+    db.close()
+    return ids
+
+
+@pytest.mark.parametrize("index_enabled", [True, False])
+def test_get_player_rank(monkeypatch, index_enabled):
+    """Test XP rank and percentile, with ties sharing a rank (index and SQL paths agree)."""
+    monkeypatch.setattr(get_settings(), "RANK_INDEX_ENABLED", index_enabled)
+    top, tied, other_tied, last = create_players_with_xp(500, 200, 200, 0)
+
+    ranks = {pid: client.get(f"/api/player/{pid}/rank").json() for pid in (top, tied, other_tied, last)}
+
+    assert ranks[top]["xp"] == {"score": 500, "rank": 1, "total": 4, "percentile": 100.0}
+    assert ranks[tied]["xp"]["rank"] == ranks[other_tied]["xp"]["rank"] == 2
+    assert ranks[tied]["xp"]["percentile"] == 75.0
+    assert ranks[last]["xp"]["rank"] == 4
+    assert ranks[last]["xp"]["percentile"] == 25.0
+    assert ranks[top]["bug_hunt"] is None
+
+
+def test_get_player_rank_tracks_new_and_deleted_players():
+    """Test the warm rank index follows player creation and deletion."""
+    first, second = create_players_with_xp(100, 50)
+    assert client.get(f"/api/player/{second}/rank").json()["xp"]["rank"] == 2
+
+    newcomer = client.post("/api/player/", json={"username": "newcomer", "avatar": "a.png"}).json()["id"]
+    assert client.get(f"/api/player/{newcomer}/rank").json()["xp"] == {
+        "score": 0, "rank": 3, "total": 3, "percentile": 33.33
+    }
+
+    client.delete(f"/api/player/{first}")
+    assert client.get(f"/api/player/{second}/rank").json()["xp"]["rank"] == 1
+    assert client.get(f"/api/player/{first}/rank").status_code == 404
+
+
+def test_player_events_not_found():
+    """Test the event stream of an unknown player is a 404, not an open stream."""
+    response = client.get("/api/player/99999/events")
+    assert response.status_code == 404
@@ -1,27 +1,34 @@
 """Tests for Progress routes."""
 
+import asyncio
+
 import pytest
 from app.database import Base, get_db
 from app.main import app
 from app.models.achievement import PlayerStats
 from app.models.player import Player
+from app.models.progress import PlayerProgressState, Progress
+from app.services import content_service, response_cache_service, unlock_service
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_progress.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same file (NullPool: TestClient runs each request in its own event loop)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_progress.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
@@ -34,6 +41,7 @@ client = TestClient(app)
 def setup_database():
     """Create fresh database for each test."""
     Base.metadata.create_all(bind=engine)
+    response_cache_service.reset()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -57,6 +65,46 @@ def test_player():
     return player_id
 
 
+def test_get_curriculum_modules():
+    """Test the prebuilt curriculum catalog is served compressed and cacheable."""
+    response = client.get("/api/progress/modules", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "max-age" in response.headers["cache-control"]
+    assert len(response.json()) == 6
+    assert response.json()[0]["total_classes"] == 6
+
+    etag = response.headers["etag"]
+    response = client.get("/api/progress/modules", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_catalog_etag_per_encoding():
+    """Test each encoding of a catalog body has its own ETag, and any of them revalidates."""
+    etags = {
+        encoding: client.get("/api/progress/modules", headers={"Accept-Encoding": encoding}).headers["etag"]
+        for encoding in ("identity", "gzip")
+    }
+    assert etags["identity"] != etags["gzip"]
+
+    for etag in etags.values():
+        response = client.get("/api/progress/modules", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etags["gzip"]
+
+
+def test_get_curriculum_module():
+    """Test a single prebuilt module, uncompressed when not accepted."""
+    response = client.get("/api/progress/modules/1", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.json()["module_number"] == 1
+
+    assert client.get("/api/progress/modules/99").status_code == 404
+
+
 def test_create_progress_first_class(test_player):
     """Test creating progress for first class (Module 0, Class 0)."""
     response = client.post(
@@ -161,6 +209,78 @@ def test_create_progress_invalid_class():
     assert "not found in curriculum" in response.json()["detail"]
 
 
+def test_create_progress_unknown_player():
+    """Test unlocking a class for a missing player returns 404."""
+    response = client.post(
+        "/api/progress/",
+        json={"player_id": 9999, "module_number": 0, "class_number": 0, "status": "unlocked"}
+    )
+
+    assert response.status_code == 404
+    assert "Player with ID 9999 not found" in response.json()["detail"]
+
+
+def test_concurrent_unlocks_insert_once(test_player):
+    """Test two concurrent unlocks of one class insert one row and raise nothing."""
+    entry = content_service.get_class_entry(0, 0)
+
+    async def unlock():
+        async with TestingAsyncSessionLocal() as db:
+            progress = await unlock_service.unlock_class(db, test_player, entry)
+            await db.commit()
+            return progress
+
+    async def race():
+        return await asyncio.gather(unlock(), unlock())
+
+    results = asyncio.run(race())
+
+    assert sum(progress is not None for progress in results) == 1
+    db = TestingSessionLocal()
+    assert db.query(Progress).filter(Progress.player_id == test_player).count() == 1
+    db.close()
+
+
+def test_batch_unlock(test_player):
+    """Test a batch unlocks in order, skips what it cannot unlock and updates progress."""
+    response = client.post(
+        "/api/progress/batch",
+        json={
+            "player_id": test_player,
+            "status": "completed",
+            "classes": [
+                {"module_number": 0, "class_number": 0},
+                {"module_number": 0, "class_number": 1},  # Needs 0.0, completed just before
+                {"module_number": 0, "class_number": 0},
+                {"module_number": 0, "class_number": 3},  # Needs 0.2
+                {"module_number": 5, "class_number": 99},
+            ]
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [(p["module_number"], p["class_number"], p["status"]) for p in data["unlocked"]] == [
+        (0, 0, "completed"), (0, 1, "completed")
+    ]
+    assert {(s["module_number"], s["class_number"], s["reason"]) for s in data["skipped"]} == {
+        (0, 0, "already_exists"), (0, 3, "prerequisites_not_met"), (5, 99, "not_found")
+    }
+
+    progress = client.get(f"/api/progress/{test_player}").json()
+    assert progress["total_classes_completed"] == 2
+
+
+def test_batch_unlock_unknown_player():
+    """Test a batch unlock for a missing player returns 404."""
+    response = client.post(
+        "/api/progress/batch",
+        json={"player_id": 9999, "classes": [{"module_number": 0, "class_number": 0}]}
+    )
+
+    assert response.status_code == 404
+
+
 def test_get_full_progress(test_player):
     """Test getting full player progress."""
     # Create some progress
@@ -226,6 +346,104 @@ def test_get_module_progress(test_player):
     assert "classes" in data
 
 
+def test_progress_state_mirrors_updates(test_player):
+    """Test full progress served from the state row reflects every update."""
+    create_response = client.post(
+        "/api/progress/",
+        json={"player_id": test_player, "module_number": 0, "class_number": 0, "status": "in_progress"}
+    )
+    progress_id = create_response.json()["id"]
+    client.patch(f"/api/progress/{progress_id}", json={"exercises_completed": 2})
+    client.patch(f"/api/progress/{progress_id}", json={"status": "completed"})
+    client.post(
+        "/api/progress/",
+        json={"player_id": test_player, "module_number": 0, "class_number": 1, "status": "unlocked"}
+    )
+
+    db = TestingSessionLocal()
+    state = db.query(PlayerProgressState).filter_by(player_id=test_player).one()
+    assert state.completed_mask == 0b01
+    assert state.unlocked_mask == 0b10
+    assert state.in_progress_mask == 0
+    completed_at = db.query(Progress).filter_by(id=progress_id).one().completed_at
+    db.close()
+
+    data = client.get(f"/api/progress/{test_player}").json()
+    classes = data["modules"][0]["classes"]
+
+    assert data["total_classes_completed"] == 1
+    assert data["total_exercises_completed"] == 2
+    assert classes[0]["status"] == "completed"
+    assert classes[0]["exercises_completed"] == 2
+    assert classes[0]["completed_at"] == completed_at.isoformat()
+    assert classes[1]["status"] == "unlocked"
+    assert classes[2]["status"] == "locked"
+
+
+def test_progress_state_rebuilt_when_stale(test_player):
+    """Test progress written without (or outside) the state row is still served and resynced."""
+    db = TestingSessionLocal()
+    db.add(Progress(player_id=test_player, module_number=0, class_number=0, status="completed", exercises_completed=3))
+    db.commit()
+    db.close()
+
+    # Fallback: no state row yet
+    data = client.get(f"/api/progress/{test_player}/module/0").json()
+    assert data["completed_classes"] == 1
+    assert data["classes"][0]["exercises_completed"] == 3
+
+    # The next write rebuilds the row from all Progress rows
+    client.post(
+        "/api/progress/",
+        json={"player_id": test_player, "module_number": 0, "class_number": 1, "status": "in_progress"}
+    )
+
+    db = TestingSessionLocal()
+    state = db.query(PlayerProgressState).filter_by(player_id=test_player).one()
+    assert state.completed_mask == 0b01
+    assert state.in_progress_mask == 0b10
+    db.close()
+
+
+def test_progress_etag_not_modified(test_player):
+    """Test unchanged polls get 304 and a progress write changes the ETag."""
+    response = client.get(f"/api/progress/{test_player}")
+    etag = response.headers["etag"]
+
+    response = client.get(f"/api/progress/{test_player}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    client.post(
+        "/api/progress/",
+        json={"player_id": test_player, "module_number": 0, "class_number": 0, "status": "completed"}
+    )
+
+    response = client.get(f"/api/progress/{test_player}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["total_classes_completed"] == 1
+
+
+def test_progress_cache_serves_without_database(test_player):
+    """Test a cached response is served without querying the database."""
+    first = client.get(f"/api/progress/{test_player}/next-unlockable")
+
+    # Removed behind the cache's back: no write went through the app
+    db = TestingSessionLocal()
+    db.query(PlayerStats).delete()
+    db.query(Player).delete()
+    db.commit()
+    db.close()
+
+    cached = client.get(f"/api/progress/{test_player}/next-unlockable")
+    assert cached.status_code == 200
+    assert cached.content == first.content
+
+    # Uncached resources still hit the database
+    assert client.get(f"/api/progress/{test_player}/module/0").status_code == 404
+
+
 def test_get_module_progress_invalid_module(test_player):
     """Test getting progress for non-existent module returns 404."""
     response = client.get(f"/api/progress/{test_player}/module/99")
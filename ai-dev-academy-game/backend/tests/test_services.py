@@ -1,17 +1,41 @@
-"""Tests for backend services (content_service, xp_service)."""
+"""Tests for backend services (content, XP, streak, rank, event and player services; SQLite profile)."""
+
+import asyncio
+import json
+import random
+from datetime import datetime
 
 import pytest
-from app.database import Base
+from app.config import get_settings
+from app.database import Base, apply_sqlite_pragmas, pool_options, sqlite_pragmas
+from app.metrics import count_queries
+from app.models.achievement import PlayerStats
 from app.models.player import Player
-from app.services import content_service, xp_service
-from sqlalchemy import create_engine
+from app.models.progress import Progress
+from app.responses import dumps
+from app.services import content_service, event_service, player_service, rank_service, streak_service, xp_service
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # Test database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_services.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same file (services are async)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_services.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def run_with_async_db(service_fn, *args, **kwargs):
+    """Run an async service function with a fresh async session."""
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            return await service_fn(*args, db=async_db, **kwargs)
+    return asyncio.run(_run())
+
 
 @pytest.fixture(scope="function", autouse=True)
 def setup_database():
@@ -131,6 +155,28 @@ def test_get_next_unlockable_class_curriculum_complete():
     assert next_class is None
 
 
+def test_class_table_dense_ids():
+    """Test compiled class ids are dense and follow curriculum order."""
+    assert [entry.class_id for entry in content_service.CLASS_TABLE] == list(
+        range(content_service.get_total_classes())
+    )
+    assert content_service.get_class_id(0, 0) == 0
+    assert content_service.get_class_id(1, 0) == len(content_service.get_module_info(0).classes)
+    assert content_service.get_class_id(99, 0) is None
+
+
+def test_unlock_checks_with_bitmask():
+    """Test unlock checks accept a completion bitmask."""
+    module_0 = content_service.MODULE_MASKS[0]
+
+    assert content_service.completed_mask([(0, 0), (99, 99)]) == 1
+    assert content_service.is_class_unlockable(0, 1, 0b1) is True
+    assert content_service.is_class_unlockable(1, 0, module_0 & ~0b1) is False
+    assert content_service.is_class_unlockable(1, 0, module_0) is True
+    assert content_service.get_next_unlockable_class(module_0) == (1, 0)
+    assert content_service.get_next_unlockable_class(content_service.ALL_CLASSES_MASK) is None
+
+
 def test_calculate_progress_percentage():
     """Test progress percentage calculation."""
     percentage = content_service.calculate_progress_percentage(10, 40)
@@ -207,10 +253,10 @@ def test_award_xp():
     db.refresh(player)
 
     # Award XP
-    result = xp_service.award_xp(
+    result = run_with_async_db(
+        xp_service.award_xp,
         player_id=player.id,
         xp_amount=100,
-        db=db,
         reason="Test award"
     )
 
@@ -236,10 +282,10 @@ def test_award_xp_no_level_up():
     db.refresh(player)
 
     # Award small XP
-    result = xp_service.award_xp(
+    result = run_with_async_db(
+        xp_service.award_xp,
         player_id=player.id,
         xp_amount=50,
-        db=db,
         reason="Small award"
     )
 
@@ -252,18 +298,14 @@ def test_award_xp_no_level_up():
 
 def test_award_xp_invalid_player():
     """Test awarding XP to non-existent player raises error."""
-    db = TestingSessionLocal()
-
     with pytest.raises(ValueError, match="not found"):
-        xp_service.award_xp(
+        run_with_async_db(
+            xp_service.award_xp,
             player_id=99999,
             xp_amount=100,
-            db=db,
             reason="Test"
         )
 
-    db.close()
-
 
 def test_award_negative_xp():
     """Test awarding negative XP (penalty)."""
@@ -276,10 +318,10 @@ def test_award_negative_xp():
     db.refresh(player)
 
     # Award negative XP
-    result = xp_service.award_xp(
+    result = run_with_async_db(
+        xp_service.award_xp,
         player_id=player.id,
         xp_amount=-50,
-        db=db,
         reason="Penalty"
     )
 
@@ -289,6 +331,215 @@ def test_award_negative_xp():
     db.close()
 
 
+def test_award_penalty_clamped_at_zero():
+    """Test a penalty larger than the balance stops at 0 and reports the real previous balance."""
+    db = TestingSessionLocal()
+
+    player = Player(username="clamptest", avatar="avatar.png", xp=130, level=2)
+    db.add(player)
+    db.commit()
+    db.refresh(player)
+
+    result = run_with_async_db(
+        xp_service.award_xp,
+        player_id=player.id,
+        xp_amount=-200,
+        reason="Penalty"
+    )
+
+    assert result["previous_xp"] == 130
+    assert result["new_xp"] == 0
+    assert result["previous_level"] == 2
+    assert result["new_level"] == 1
+    assert result["leveled_up"] is False
+
+    db.close()
+
+
+def test_award_xp_writes_ledger():
+    """Test every award in a transaction lands in the XP ledger on commit."""
+    db = TestingSessionLocal()
+
+    player = Player(username="ledgertest", avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    db.refresh(player)
+
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            await xp_service.award_xp(player.id, 100, async_db, reason="First", commit=False)
+            await xp_service.award_xp(player.id, 50, async_db, reason="Second", commit=False)
+            await async_db.commit()
+        async with TestingAsyncSessionLocal() as async_db:
+            return await xp_service.get_xp_history(player.id, async_db)
+
+    history = asyncio.run(_run())
+
+    assert [(e.reason, e.amount, e.balance_after, e.level_after) for e in history] == [
+        ("Second", 50, 150, 2),
+        ("First", 100, 100, 2),
+    ]
+
+    db.close()
+
+
+def test_award_xp_rollback_discards_ledger():
+    """Test a rolled back award leaves neither XP nor ledger entries."""
+    db = TestingSessionLocal()
+
+    player = Player(username="rollbacktest", avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    db.refresh(player)
+
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            await xp_service.award_xp(player.id, 100, async_db, reason="Lost", commit=False)
+            await async_db.rollback()
+            await async_db.commit()
+        async with TestingAsyncSessionLocal() as async_db:
+            return await xp_service.get_xp_history(player.id, async_db)
+
+    assert asyncio.run(_run()) == []
+    db.refresh(player)
+    assert player.xp == 0
+
+    db.close()
+
+
+def test_concurrent_awards_are_not_lost():
+    """Test concurrent awards from separate sessions all add up."""
+    db = TestingSessionLocal()
+
+    player = Player(username="concurrenttest", avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    db.refresh(player)
+
+    async def _award():
+        async with TestingAsyncSessionLocal() as async_db:
+            await xp_service.award_xp(player.id, 10, async_db, reason="Concurrent")
+
+    async def _run():
+        await asyncio.gather(*(_award() for _ in range(10)))
+
+    asyncio.run(_run())
+
+    db.refresh(player)
+    assert player.xp == 100
+    assert player.level == 2
+
+    db.close()
+
+
+def record_days(player_id: int, *timestamps: str, timezone: str | None = None) -> streak_service.Streak:
+    """Record one activity per ISO timestamp (UTC) and return the resulting streak."""
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            if timezone:
+                await streak_service.set_timezone(async_db, player_id, timezone)
+            streak = None
+            for timestamp in timestamps:
+                streak = await streak_service.record_activity(async_db, player_id, datetime.fromisoformat(timestamp))
+            await async_db.commit()
+            return streak
+    return asyncio.run(_run())
+
+
+def create_player(username: str) -> int:
+    db = TestingSessionLocal()
+    player = Player(username=username, avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    player_id = player.id
+    db.close()
+    return player_id
+
+
+def test_streak_consecutive_days():
+    """Test activity on consecutive days extends the run; same-day activity does not."""
+    player_id = create_player("streaktest")
+
+    streak = record_days(player_id, "2025-03-01T10:00", "2025-03-01T18:00", "2025-03-02T09:00", "2025-03-03T23:00")
+
+    assert streak.current_streak == 3
+    assert streak.longest_streak == 3
+    assert streak.last_activity_date.isoformat() == "2025-03-03"
+
+
+def test_streak_gap_restarts_run():
+    """Test a missed day restarts the run but keeps the longest."""
+    player_id = create_player("gaptest")
+
+    streak = record_days(player_id, "2025-03-01T10:00", "2025-03-02T10:00", "2025-03-03T10:00", "2025-03-05T10:00")
+
+    assert streak.current_streak == 1
+    assert streak.longest_streak == 3
+
+
+def test_streak_late_activity_is_ignored():
+    """Test an activity older than the last activity day leaves the run unchanged."""
+    player_id = create_player("latetest")
+
+    streak = record_days(player_id, "2025-03-01T10:00", "2025-03-02T10:00", "2025-02-20T10:00")
+
+    assert streak.current_streak == 2
+    assert streak.last_activity_date.isoformat() == "2025-03-02"
+
+
+def test_streak_uses_player_timezone():
+    """Test days are counted in the player's timezone."""
+    player_id = create_player("tztest")
+
+    # 23:30 and 00:30 UTC are the same local day in New York (UTC-5 in winter)
+    streak = record_days(player_id, "2025-01-10T23:30", "2025-01-11T00:30", timezone="America/New_York")
+    assert streak.current_streak == 1
+
+    # Same instants in UTC are two days
+    other_id = create_player("utctest")
+    assert record_days(other_id, "2025-01-10T23:30", "2025-01-11T00:30").current_streak == 2
+
+
+def test_streak_current_as_of():
+    """Test the current run lapses once a whole day passes without activity."""
+    streak = streak_service.Streak(last_activity_day=datetime(2025, 3, 3).toordinal(), current_streak=4, longest_streak=4)
+
+    assert streak.current_as_of(datetime(2025, 3, 3, 12)) == 4
+    assert streak.current_as_of(datetime(2025, 3, 4, 23)) == 4
+    assert streak.current_as_of(datetime(2025, 3, 5, 0, 1)) == 0
+
+
+def test_rebuild_streaks_matches_incremental():
+    """Test the set-based backfill gives the same streaks as the incremental engine."""
+    histories = {
+        "rebuild_a": ["2025-03-01T10:00", "2025-03-02T10:00", "2025-03-02T12:00", "2025-03-03T10:00", "2025-03-07T10:00"],
+        "rebuild_b": ["2025-03-10T10:00", "2025-03-12T10:00", "2025-03-13T10:00"],
+        "rebuild_c": ["2025-01-10T23:30", "2025-01-11T00:30", "2025-01-12T01:00"],
+    }
+    db = TestingSessionLocal()
+    incremental = {}
+    for username, timestamps in histories.items():
+        player_id = create_player(username)
+        timezone = "America/New_York" if username == "rebuild_c" else None
+        incremental[player_id] = record_days(player_id, *timestamps, timezone=timezone)
+        db.add_all(
+            Progress(player_id=player_id, module_number=0, class_number=i, status="completed",
+                     completed_at=datetime.fromisoformat(timestamp))
+            for i, timestamp in enumerate(timestamps)
+        )
+    db.commit()
+
+    assert streak_service.rebuild_streaks(db) == 3
+
+    async def _load():
+        async with TestingAsyncSessionLocal() as async_db:
+            return {pid: await streak_service.get_streak(async_db, pid) for pid in incremental}
+
+    assert asyncio.run(_load()) == incremental
+
+    db.close()
+
+
 def test_get_level_title():
     """Test getting level titles."""
     assert xp_service.get_level_title(1) == "Junior Developer"
@@ -317,7 +568,7 @@ def test_get_player_rank_info():
     db.refresh(player)
 
     # Get rank info
-    rank_info = xp_service.get_player_rank_info(player.id, db)
+    rank_info = run_with_async_db(xp_service.get_player_rank_info, player.id)
 
     assert rank_info["level"] == 2
     assert rank_info["title"] == "Junior Developer"
@@ -329,9 +580,212 @@ def test_get_player_rank_info():
 
 def test_get_player_rank_info_invalid_player():
     """Test getting rank info for non-existent player raises error."""
+    with pytest.raises(ValueError, match="not found"):
+        run_with_async_db(xp_service.get_player_rank_info, 99999)
+
+
+# Player Service Tests
+
+def test_player_service_reuses_loaded_player():
+    """Test a player loaded with stats is found again in the session without queries."""
     db = TestingSessionLocal()
+    player = Player(username="cachedplayer", avatar="avatar.png")
+    db.add(player)
+    db.commit()
+    db.add(PlayerStats(player_id=player.id, classes_completed=3))
+    db.commit()
+    player_id = player.id
+    db.close()
 
-    with pytest.raises(ValueError, match="not found"):
-        xp_service.get_player_rank_info(99999, db)
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            with count_queries() as first:
+                player = await player_service.get_player(async_db, player_id, with_stats=True)
+            with count_queries() as again:
+                same = await player_service.get_player(async_db, player_id)
+                stats = await player_service.get_stats(async_db, player_id)
+            missing = await player_service.get_player(async_db, 9999)
+            return player, same, stats, missing, first.count, again.count
+
+    player, same, stats, missing, first_count, again_count = asyncio.run(_run())
+
+    assert same is player
+    assert stats.classes_completed == 3
+    assert missing is None
+    assert (first_count, again_count) == (1, 0)
+
+
+# Rank Service Tests
+
+def test_rank_index_matches_brute_force():
+    """Test RankIndex counts agree with a sort after random updates, removals and growth."""
+    rng = random.Random(17)
+    index = rank_service.RankIndex()
+    scores: dict[int, int] = {}
+
+    for _ in range(2000):
+        key = rng.randrange(200)
+        if rng.random() < 0.1:
+            index.remove(key)
+            scores.pop(key, None)
+        else:
+            score = rng.randrange(5000)  # Past the initial capacity
+            index.set(key, score)
+            scores[key] = score
+
+    assert len(index) == len(scores)
+    for key, score in scores.items():
+        assert index.score(key) == score
+        assert index.count_above(score) == sum(other > score for other in scores.values())
+
+
+def test_rank_sql_fallback_uses_index_searches():
+    """Test the SQL rank fallback answers correctly with index range searches, not scans."""
+    db = TestingSessionLocal()
+    db.add_all(Player(username=f"ranked{i}", avatar="avatar.png", xp=i * 10) for i in range(20))
+    db.commit()
+    player_id = db.query(Player.id).filter(Player.xp == 150).scalar()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            statements.append((statement, parameters))
 
+    async def _run():
+        async with TestingAsyncSessionLocal() as async_db:
+            return await rank_service._rank_from_sql(async_db, rank_service.XP, player_id)
+
+    rank_service.reset()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        rank = asyncio.run(_run())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    assert (rank.score, rank.rank, rank.total) == (150, 5, 20)
+    ranking_plan = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statements[0][0], statements[0][1]).all()
+    assert not any(step[-1].startswith("SCAN players") for step in ranking_plan)
+    assert any("ix_players_xp (xp>?)" in step[-1] for step in ranking_plan)
     db.close()
+
+
+# Event Service Tests
+
+def read_events(events, count: int) -> list[tuple[str, dict]]:
+    """Read `count` events from an event stream as (type, data)."""
+    async def _read():
+        chunks = []
+        while len(chunks) < count:
+            chunk = await asyncio.wait_for(anext(events), 1)
+            if chunk.startswith("id:"):
+                fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+                chunks.append((fields["event"], json.loads(fields["data"])))
+        return chunks
+    return _read()
+
+
+def test_events_are_published_after_commit():
+    """Test XP and level-up events reach a subscriber on commit, and never on rollback."""
+    player_id = create_player("streamer")
+
+    async def _run():
+        events = event_service.stream(player_id)
+        assert (await anext(events)).startswith("retry:")
+        assert event_service.subscriber_count(player_id) == 1
+
+        async with TestingAsyncSessionLocal() as async_db:
+            await xp_service.award_xp(player_id, 30, async_db, reason="ignored", commit=False)
+            await async_db.rollback()
+            await xp_service.award_xp(player_id, 150, async_db, reason="class")
+
+        received = await read_events(events, 2)
+        await events.aclose()
+        return received
+
+    received = asyncio.run(_run())
+
+    assert received[0] == ("xp_awarded", {
+        "previous_xp": 0, "new_xp": 150, "xp_gained": 150, "previous_level": 1,
+        "new_level": 2, "leveled_up": True, "reason": "class"
+    })
+    assert received[1] == ("level_up", {"previous_level": 1, "new_level": 2, "new_xp": 150})
+    assert event_service.subscriber_count(player_id) == 0
+
+
+def test_event_encodes_like_responses():
+    """Test SSE payloads go through the same JSON encoder as responses (datetimes included)."""
+    at = datetime(2025, 1, 2, 3, 4, 5)
+    event = event_service.Event(event_service.BUG_HUNT_COMPLETED, {"score": 900, "completed_at": at})
+
+    data = event.encode().splitlines()[2].removeprefix("data: ")
+    assert data.encode() == dumps({"score": 900, "completed_at": at})
+    assert json.loads(data) == {"score": 900, "completed_at": "2025-01-02T03:04:05"}
+
+
+def test_slow_event_consumer_is_dropped(monkeypatch):
+    """Test a subscriber that falls behind is dropped instead of buffering without bound."""
+    monkeypatch.setattr(get_settings(), "EVENT_QUEUE_SIZE", 3)
+
+    async def _run():
+        events = event_service.stream(7)
+        await anext(events)
+        for amount in range(5):
+            event_service._deliver(7, event_service.XP_AWARDED, {"xp_gained": amount})
+        assert event_service.subscriber_count(7) == 0
+
+        event_service._deliver(7, event_service.XP_AWARDED, {"xp_gained": 99})  # Nobody listening
+        return await read_events(events, 1), await anext(events, None)
+
+    (dropped,), end = asyncio.run(_run())
+
+    assert dropped == ("dropped", {"reason": "slow consumer"})
+    assert end is None
+
+
+# SQLite Profile Tests
+
+def test_sqlite_performance_profile_applied_on_connect(tmp_path):
+    """Test every new connection gets the performance profile's pragmas."""
+    profile_engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    apply_sqlite_pragmas(profile_engine, sqlite_pragmas("performance"))
+    Base.metadata.create_all(bind=profile_engine)
+
+    with profile_engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == get_settings().SQLITE_BUSY_TIMEOUT_MS
+        assert pragma("cache_size") == -get_settings().SQLITE_CACHE_SIZE_KIB
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("auto_vacuum") == 2  # INCREMENTAL, despite the switch to WAL
+        assert pragma("foreign_keys") == 1
+    profile_engine.dispose()
+
+
+def test_sqlite_performance_profile_cascades_player_deletes(tmp_path):
+    """Test deleting a players row removes the player's rows through ON DELETE CASCADE."""
+    profile_engine = create_engine(f"sqlite:///{tmp_path / 'cascade.db'}")
+    apply_sqlite_pragmas(profile_engine, sqlite_pragmas("performance"))
+    Base.metadata.create_all(bind=profile_engine)
+
+    with profile_engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO players (id, username) VALUES (1, 'gone')")
+        connection.exec_driver_sql("INSERT INTO player_stats (player_id) VALUES (1)")
+        connection.exec_driver_sql(
+            "INSERT INTO progress (player_id, module_number, class_number, status) VALUES (1, 0, 0, 'completed')"
+        )
+        connection.exec_driver_sql("DELETE FROM players WHERE id = 1")
+        assert connection.exec_driver_sql("SELECT count(*) FROM player_stats").scalar() == 0
+        assert connection.exec_driver_sql("SELECT count(*) FROM progress").scalar() == 0
+    profile_engine.dispose()
+
+
+def test_sqlite_default_profile_and_pool_options():
+    """Test the default profile changes nothing and in-memory databases keep their own pool."""
+    assert sqlite_pragmas("default") == {}
+    with pytest.raises(ValueError):
+        sqlite_pragmas("fastest")
+
+    assert pool_options("sqlite:///:memory:") == {}
+    assert pool_options("sqlite+aiosqlite:///./game.db")["pool_size"] == get_settings().DB_POOL_SIZE